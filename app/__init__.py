@@ -5,6 +5,16 @@ from dotenv import load_dotenv
 from .config import get_config
 from .extensions import init_extensions
 from .routes import register_routes
+from .middleware.logging import setup_logging
+from .services.health_service import init_health
+from .services.stats_service import init_stats
+from .services.change_service import init_changes
+from .services.stream_service import init_stream
+from .services.search_service import init_search
+from .services.autocomplete_service import init_autocomplete
+from .services.cache_service import init_entity_cache
+from .services.audit_service import init_audit
+from .services.coalesce_service import init_coalescing
 
 def create_app() -> Flask:
     # Carga variables del .env en la raíz del proyecto
@@ -15,10 +25,38 @@ def create_app() -> Flask:
     # Aplica la configuración (DevConfig o ProdConfig según FLASK_ENV)
     app.config.from_object(get_config())
 
+    # Logging estructurado asíncrono (una línea JSON por petición)
+    setup_logging(app)
+
     # Inicializa extensiones (db, migrate, limiter, cors, jwt, etc.)
     init_extensions(app)
 
     # Registra blueprints de la API
     register_routes(app)
 
+    # Chequeos de salud en segundo plano + conteo de peticiones en vuelo
+    init_health(app)
+
+    # Contadores del dashboard (daily_stats) mantenidos en cada flush
+    init_stats(app)
+
+    # change_log (altas/cambios/bajas en orden) + fan-out SSE por worker
+    init_changes(app)
+    init_stream(app)
+
+    # Índice invertido de la búsqueda global (search_terms) mantenido en cada flush
+    init_search(app)
+
+    # Autocompletado de pacientes (índice de prefijos en memoria por worker)
+    init_autocomplete(app)
+
+    # Caché read-through de detalles (invalidada por eventos del ORM)
+    init_entity_cache(app)
+
+    # Bitácora de auditoría (lecturas/cambios de datos de pacientes) en segundo plano
+    init_audit(app)
+
+    # Single-flight de GET concurrentes idénticos (calendario, dashboard)
+    init_coalescing(app)
+
     return app
@@ -33,6 +33,15 @@ class BaseConfig:
     SQLALCHEMY_DATABASE_URI = _DB_URL or "sqlite:///dev.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Réplicas de lectura (CSV). Cada una queda como bind "replica_N";
+    # las peticiones GET leen de ellas si el lag está bajo el máximo.
+    SQLALCHEMY_BINDS = {
+        f"replica_{i}": _normalize_db_url(url)
+        for i, url in enumerate(_split_csv(os.getenv("DATABASE_REPLICA_URLS")))
+    }
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2"))
+
     # Timezone (para utilidades)
     APP_TZ = os.getenv("TZ", "America/Mexico_City")
 
@@ -58,13 +67,90 @@ class BaseConfig:
     PASSWORD_HASH_MEMORY_COST = int(os.getenv("PASSWORD_HASH_MEMORY_COST", "65536"))
     PASSWORD_HASH_PARALLELISM = int(os.getenv("PASSWORD_HASH_PARALLELISM", "2"))
 
-    # Media (placeholder para futuro storage)
+    # Media (subidas locales, ver services/storage_service.py)
     MEDIA_ROOT = os.getenv("MEDIA_ROOT", "./media")
-    MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "/media")
+    MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", f"{API_PREFIX}/media")
+    # Si hay nginx delante: prefijo de la location "internal" que apunta a
+    # MEDIA_ROOT (ej. /_media/). La app solo autoriza y nginx manda los bytes.
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX")
     MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "10"))
+    # Werkzeug corta con 413 cualquier cuerpo mayor (las subidas van por stream a disco)
+    MAX_CONTENT_LENGTH = MAX_UPLOAD_MB * 1024 * 1024
+    FILES_BULK_MAX_ITEMS = int(os.getenv("FILES_BULK_MAX_ITEMS", "500"))
+    # Procesos para generar thumbnails/WebP (0 = en línea, útil en dev)
+    IMAGE_DERIVATIVE_WORKERS = int(os.getenv("IMAGE_DERIVATIVE_WORKERS", "2"))
+    # Bitácora de auditoría: cola en memoria escrita en lotes por un hilo
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+    AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "20000"))
+    AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "0.05"))
+
+    # Caché de entidades (detalle de pacientes/usuarios/citas)
+    # ENTITY_CACHE_SIZE: entradas LRU por worker (0 = sin tier en memoria)
+    # ENTITY_CACHE_DIR: tier compartido entre workers (ej. /dev/shm/medsystem-cache)
+    ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "2048"))
+    ENTITY_CACHE_DIR = os.getenv("ENTITY_CACHE_DIR") or None
+    # Máximo de valores por petición en /validation/contacts
+    VALIDATION_BATCH_MAX = int(os.getenv("VALIDATION_BATCH_MAX", "1000"))
+    # Importación masiva de pacientes (CSV/XLSX): procesos de validación (0 = en línea)
+    PATIENT_IMPORT_WORKERS = int(os.getenv("PATIENT_IMPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PATIENT_IMPORT_CHUNK = int(os.getenv("PATIENT_IMPORT_CHUNK", "2000"))
+    PATIENT_IMPORT_MAX_ERRORS = int(os.getenv("PATIENT_IMPORT_MAX_ERRORS", "1000"))
+    # Single-flight de GET idénticos (calendario del día, dashboard): la respuesta
+    # se comparte entre peticiones en vuelo y se reutiliza COALESCE_TTL_SECONDS
+    COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "1") == "1"
+    COALESCE_TTL_SECONDS = float(os.getenv("COALESCE_TTL_SECONDS", "0.5"))
+    COALESCE_MAX_ENTRIES = int(os.getenv("COALESCE_MAX_ENTRIES", "256"))
+    COALESCE_WAIT_SECONDS = float(os.getenv("COALESCE_WAIT_SECONDS", "30"))
+    # Stream SSE del calendario (/appointments/stream): cada worker sigue
+    # change_log con un hilo; cada cliente ocupa un hilo de gunicorn mientras
+    # está conectado, por eso el tope por worker y la duración máxima
+    SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "0.5"))
+    SSE_POLL_BATCH = int(os.getenv("SSE_POLL_BATCH", "500"))
+    SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "1000"))
+    SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", str(max(1, int(os.getenv("WEB_THREADS", "2")) // 2))))
+    SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+    SSE_MAX_SECONDS = float(os.getenv("SSE_MAX_SECONDS", "300"))
+    SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+    SSE_REPLAY_LIMIT = int(os.getenv("SSE_REPLAY_LIMIT", "1000"))
+    # Retención de change_log (`flask changes-prune`): un cursor de /changes más
+    # viejo que esto recibe 410 y la app vuelve a descargar todo
+    CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+    CHANGE_LOG_PRUNE_BATCH = int(os.getenv("CHANGE_LOG_PRUNE_BATCH", "5000"))
+    # Autocompletado de pacientes en memoria: cada cuánto aplica cambios de
+    # change_log y cuánto espera una petición a que el índice termine de construirse
+    AUTOCOMPLETE_SYNC_INTERVAL = float(os.getenv("AUTOCOMPLETE_SYNC_INTERVAL", "1.0"))
+    AUTOCOMPLETE_WAIT_SECONDS = float(os.getenv("AUTOCOMPLETE_WAIT_SECONDS", "5"))
+    # Llaves revisadas como máximo por consulta (acota "ma zzz" con miles de "ma...")
+    AUTOCOMPLETE_MAX_SCAN = int(os.getenv("AUTOCOMPLETE_MAX_SCAN", "2000"))
+    # Idempotency-Key en POST de creación: vigencia de la respuesta guardada y
+    # espera máxima de un duplicado mientras la petición original termina
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    # Purga de pacientes borrados lógicamente (`flask patients-purge`)
+    PATIENT_PURGE_AFTER_DAYS = int(os.getenv("PATIENT_PURGE_AFTER_DAYS", "30"))
+    PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "500"))
+    PURGE_PAUSE_SECONDS = float(os.getenv("PURGE_PAUSE_SECONDS", "0.2"))
+    # Tope de puntos por métrica en /patients/<id>/vitals
+    VITALS_MAX_POINTS = int(os.getenv("VITALS_MAX_POINTS", "1000"))
+
+    # Health checks (/health/ready)
+    HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "5"))
+    HEALTH_MAX_STALENESS = float(os.getenv("HEALTH_MAX_STALENESS", "30"))
+    HEALTH_DB_LATENCY_MAX_MS = float(os.getenv("HEALTH_DB_LATENCY_MAX_MS", "500"))
+    HEALTH_POOL_SATURATION_MAX = float(os.getenv("HEALTH_POOL_SATURATION_MAX", "0.9"))
+    HEALTH_REQUIRE_MIGRATIONS = os.getenv("HEALTH_REQUIRE_MIGRATIONS", "1") == "1"
+    HEALTH_OVERLOAD_AFTER_SECONDS = float(os.getenv("HEALTH_OVERLOAD_AFTER_SECONDS", "10"))
+    HEALTH_WORKER_THREADS = int(os.getenv("WEB_THREADS", "2"))
+    # Hilos atorados para marcar al worker "overloaded" (0 = todos los del worker)
+    HEALTH_OVERLOAD_BUSY_THREADS = int(os.getenv("HEALTH_OVERLOAD_BUSY_THREADS", "0"))
 
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    # Fracción de peticiones exitosas que se registran (errores y lentas siempre)
+    LOG_SAMPLE_SUCCESS_RATE = float(os.getenv("LOG_SAMPLE_SUCCESS_RATE", "1.0"))
+    LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
 class DevConfig(BaseConfig):
     DEBUG = True
@@ -0,0 +1,108 @@
+# app/db_routing.py
+import itertools
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_PREFIX = "replica_"
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Postgres en standby: segundos desde la última transacción reproducida.
+# Si no está en recovery (p.ej. una BD local haciendo de réplica) devuelve 0.
+_PG_LAG_SQL = sa.text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_lock = threading.Lock()
+_lag_cache: dict[str, tuple[float, float | None]] = {}  # key -> (checked_at, lag|None)
+_rr = itertools.count()
+
+
+def _measure_lag(engine) -> float | None:
+    """Lag en segundos de la réplica, o None si no responde."""
+    if engine.dialect.name != "postgresql":
+        return 0.0  # SQLite u otros sin replicación real: sin lag
+    try:
+        with engine.connect() as conn:
+            return float(conn.execute(_PG_LAG_SQL).scalar() or 0)
+    except Exception:
+        current_app.logger.warning("Réplica %s no disponible", engine.url)
+        return None
+
+
+def replica_lag(key: str, engine) -> float | None:
+    """Lag cacheado por REPLICA_LAG_CHECK_SECONDS para no medir en cada query."""
+    ttl = current_app.config.get("REPLICA_LAG_CHECK_SECONDS", 2.0)
+    now = time.monotonic()
+    with _lock:
+        cached = _lag_cache.get(key)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        # Marcamos antes de medir para que otros hilos no midan en paralelo
+        _lag_cache[key] = (now, cached[1] if cached else None)
+    lag = _measure_lag(engine)
+    with _lock:
+        _lag_cache[key] = (time.monotonic(), lag)
+    return lag
+
+
+def pick_replica(engines):
+    """Elige una réplica sana (round-robin). None si ninguna cumple el lag máximo."""
+    keys = sorted(k for k in engines if k and k.startswith(REPLICA_PREFIX))
+    if not keys:
+        return None
+    max_lag = current_app.config.get("REPLICA_MAX_LAG_SECONDS", 5.0)
+    start = next(_rr)
+    for i in range(len(keys)):
+        key = keys[(start + i) % len(keys)]
+        lag = replica_lag(key, engines[key])
+        if lag is not None and lag <= max_lag:
+            return engines[key]
+    return None
+
+
+def _is_read_only_request() -> bool:
+    return has_request_context() and request.method in READ_ONLY_METHODS
+
+
+def _is_write(clause) -> bool:
+    if isinstance(clause, sa.sql.expression.UpdateBase):
+        return True
+    # SELECT ... FOR UPDATE también debe ir al primario
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+    """
+    Session que manda las lecturas de peticiones GET/HEAD a una réplica
+    (SQLALCHEMY_BINDS["replica_N"]) y todo lo demás al primario.
+    En cuanto la sesión escribe, queda fijada al primario hasta que termine
+    la petición (read-after-write).
+    La réplica se elige una sola vez por sesión (= por petición): cada réplica
+    va en su propio punto del WAL y mezclarlas daría lecturas inconsistentes
+    entre sí (ETag vs cuerpo, head() vs changes_since()).
+    """
+
+    _pinned_primary = False
+    _replica = None  # None = aún sin elegir; False = ninguna sana, usar primario
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._pinned_primary:
+            if self._flushing or _is_write(clause):
+                self._pinned_primary = True
+            elif _is_read_only_request():
+                if self._replica is None:
+                    self._replica = pick_replica(self._db.engines) or False
+                if self._replica is not False:
+                    return self._replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def close(self):
+        # db.session.remove() al final de la petición
+        super().close()
+        self._replica = None
@@ -1,13 +1,19 @@
 # app/extensions.py
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from flask_limiter.extension import STRATEGIES
+from limits.storage import storage_from_string
 from flask_jwt_extended import JWTManager
 from marshmallow import ValidationError
+from .db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 cors = CORS()
 jwt = JWTManager()
@@ -15,6 +21,22 @@ jwt = JWTManager()
 # storage_uri se configura luego con app.config
 limiter = Limiter(key_func=get_remote_address, default_limits=[])
 
+# SQLite (dev): pysqlite no emite BEGIN por su cuenta y un SAVEPOINT suelto
+# hace commit al liberarse. Receta de SQLAlchemy para que begin_nested()
+# se comporte como en Postgres. IMMEDIATE: el lock de escritura se toma al
+# inicio (esperando el busy timeout); con BEGIN a secas, leer y luego escribir
+# mientras otro hilo (auditoría) escribe es un deadlock que SQLite corta con
+# "database is locked".
+@event.listens_for(Engine, "connect")
+def _sqlite_manual_transactions(dbapi_conn, connection_record):
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        dbapi_conn.isolation_level = None
+
+@event.listens_for(Engine, "begin")
+def _sqlite_begin(conn):
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
 def init_extensions(app):
     db.init_app(app)
     migrate.init_app(app, db)
@@ -31,8 +53,16 @@ def init_extensions(app):
                 "origins": app.config["CORS_ORIGINS"],
                 "supports_credentials": app.config.get("CORS_SUPPORTS_CREDENTIALS", True),
                 "methods": ["GET", "POST", "PATCH", "PUT", "DELETE", "OPTIONS"],
-                "allow_headers": ["Authorization", "Content-Type"],
-                "expose_headers": ["Authorization", "Content-Type"],
+                "allow_headers": [
+                    "Authorization", "Content-Type", "X-Request-ID",
+                    "Range", "If-Range", "If-None-Match", "If-Modified-Since",
+                    "Idempotency-Key", "If-Match", "Last-Event-ID",
+                ],
+                "expose_headers": [
+                    "Authorization", "Content-Type", "X-Request-ID",
+                    "ETag", "Last-Modified", "Content-Range", "Accept-Ranges",
+                    "Idempotent-Replayed",
+                ],
                 # Si necesitas custom headers en el futuro, agrégalos aquí.
             }
         },
@@ -52,3 +82,20 @@ def init_extensions(app):
     @app.errorhandler(ValidationError)
     def handle_marshmallow_error(err):
         return {"message": "Validation error", "errors": err.messages}, 400
+
+def reset_after_fork(app):
+    """
+    Se llama en cada worker de gunicorn justo después del fork (preload_app).
+    - Descarta el pool heredado sin cerrar las conexiones del master.
+    - Recrea el storage del limiter (sus locks/timer no sobreviven al fork).
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    if limiter._storage is not None:
+        limiter._storage = storage_from_string(
+            limiter._storage_uri or app.config.get("RATELIMIT_STORAGE_URI") or "memory://",
+            **limiter._storage_options,
+        )
+        limiter._limiter = STRATEGIES[limiter._strategy](limiter._storage)
@@ -1,37 +1,134 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import re
 import sys
-import uuid
+import time
+from logging.handlers import QueueHandler, QueueListener
 from flask import g, request
 
+# X-Request-ID entrante: solo aceptamos algo razonable para no ensuciar los logs
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro. Los campos extra van en record.fields."""
+
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class _AsyncPipeline:
+    """
+    QueueHandler (lo que usan los loggers) + QueueListener (hilo que escribe
+    a stdout). El hilo no sobrevive a un fork, así que se relanza por PID.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.handler = _DroppingQueueHandler(queue.Queue(maxsize=maxsize))
+        self._listener = None
+        self._pid = None
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        # Cola nueva por proceso: la heredada del master puede traer locks tomados
+        self.handler.queue = queue.Queue(maxsize=self.maxsize)
+        out = logging.StreamHandler(sys.stdout)
+        out.setFormatter(JsonFormatter())
+        self._listener = QueueListener(self.handler.queue, out, respect_handler_level=False)
+        self._listener.start()
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()  # vacía lo pendiente antes de salir
+            self._listener = None
+            self._pid = None
+
+class _DroppingQueueHandler(QueueHandler):
+    """Si la cola se llena (stdout atascado) descartamos en vez de bloquear."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+def _new_request_id() -> str:
+    return os.urandom(8).hex()
+
 def setup_logging(app):
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
-    handler.setFormatter(formatter)
-    app.logger.setLevel(logging.INFO)
-    app.logger.addHandler(handler)
+    level = getattr(logging, str(app.config.get("LOG_LEVEL", "INFO")).upper(), logging.INFO)
+    sample_rate = float(app.config.get("LOG_SAMPLE_SUCCESS_RATE", 1.0))
+    slow_ms = float(app.config.get("LOG_SLOW_REQUEST_MS", 1000))
+
+    pipeline = _AsyncPipeline(int(app.config.get("LOG_QUEUE_SIZE", 10000)))
+    pipeline.ensure_started()
+    atexit.register(pipeline.stop)
+    app.extensions["log_pipeline"] = pipeline
+
+    app.logger.setLevel(level)
+    app.logger.handlers[:] = [pipeline.handler]
+    app.logger.propagate = False
+    req_log = logging.getLogger("app.request")
+    req_log.setLevel(logging.INFO)
+    req_log.handlers[:] = [pipeline.handler]
+    req_log.propagate = False
 
     @app.before_request
     def inject_request_id():
-        g.request_id = str(uuid.uuid4())
-        app.logger.info(
-            "REQ %s %s %s %s",
-            g.request_id,
-            request.method,
-            request.path,
-            request.remote_addr,
-        )
+        pipeline.ensure_started()
+        g.request_started = time.perf_counter()
+        incoming = request.headers.get("X-Request-ID", "")
+        g.request_id = incoming if _REQUEST_ID_RE.match(incoming) else _new_request_id()
 
     @app.after_request
     def log_response(resp):
-        app.logger.info(
-            "RES %s %s %s",
-            g.get("request_id", "-"),
-            resp.status_code,
-            resp.content_type,
+        rid = g.get("request_id", "-")
+        resp.headers["X-Request-ID"] = rid
+
+        started = g.get("request_started")
+        duration_ms = (time.perf_counter() - started) * 1000 if started else None
+        status = resp.status_code
+        # Errores y peticiones lentas siempre; las exitosas según muestreo
+        keep = (
+            status >= 400
+            or (duration_ms is not None and duration_ms >= slow_ms)
+            or sample_rate >= 1.0
+            or random.random() < sample_rate
         )
+        if keep:
+            req_log.info(
+                "request",
+                extra={"fields": {
+                    "request_id": rid,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": status,
+                    "duration_ms": round(duration_ms, 2) if duration_ms is not None else None,
+                    # solo el encabezado: calculate_content_length() consumiría
+                    # en memoria un cuerpo en streaming (SSE) antes de enviarlo
+                    "bytes": resp.content_length,
+                    "remote_addr": request.remote_addr,
+                }},
+            )
+
         # Seguridad básica
         resp.headers.setdefault("X-Content-Type-Options", "nosniff")
         resp.headers.setdefault("X-Frame-Options", "DENY")
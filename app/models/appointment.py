@@ -1,8 +1,9 @@
 from datetime import datetime as dt
 from enum import Enum
-from sqlalchemy import String, DateTime, Integer, ForeignKey, Enum as PgEnum
+from sqlalchemy import String, DateTime, Integer, ForeignKey, Index, Enum as PgEnum, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..extensions import db
+from .soft_delete import LIVE, SoftDeleteMixin
 
 class AppointmentStatus(str, Enum):
     PENDING   = "pending"
@@ -17,8 +18,12 @@ class AppointmentType(str, Enum):
     PROCEDIMIENTO  = "procedimiento"
     OTRO           = "otro"
 
-class Appointment(db.Model):
+class Appointment(SoftDeleteMixin, db.Model):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Calendario por rango, solo citas vivas
+        Index("ix_appointments_live_range", "start_at", "end_at", postgresql_where=text(LIVE), sqlite_where=text(LIVE)),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -52,6 +57,10 @@ class Appointment(db.Model):
     created_at: Mapped[dt] = mapped_column(DateTime(timezone=True), server_default=db.func.now(), nullable=False)
     updated_at: Mapped[dt] = mapped_column(DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now(), nullable=False)
 
+    # Concurrencia optimista: el ORM agrega "AND version_id = :leída" a cada UPDATE
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version_id}
+
     patient = relationship(
         "Patient",
         backref=db.backref(
@@ -0,0 +1,35 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, String, DateTime, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from ..extensions import db
+
+class AuditLog(db.Model):
+    """
+    Quién leyó o modificó datos clínicos. Se escribe en lotes desde un hilo
+    de fondo (ver services/audit_service.py); nunca dentro de la petición.
+    Sin FKs: el registro debe sobrevivir a borrados de usuarios/pacientes.
+    """
+    __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_patient_occurred", "patient_id", "occurred_at"),
+        Index("ix_audit_logs_user_occurred", "user_id", "occurred_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    user_role: Mapped[str | None] = mapped_column(String(20), nullable=True)
+
+    # read | create | update | delete
+    action: Mapped[str] = mapped_column(String(10), nullable=False)
+    # blueprint: patients | appointments | consultations | prescriptions | files | media
+    entity: Mapped[str] = mapped_column(String(40), nullable=False)
+    entity_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    patient_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    method: Mapped[str] = mapped_column(String(10), nullable=False)
+    path: Mapped[str] = mapped_column(String(500), nullable=False)
+    status: Mapped[int] = mapped_column(Integer, nullable=False)
+    request_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    ip: Mapped[str | None] = mapped_column(String(45), nullable=True)
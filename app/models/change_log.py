@@ -0,0 +1,44 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, String, DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from ..extensions import db
+
+class ChangeLog(db.Model):
+    """
+    Un renglón por alta/cambio/baja, en la misma transacción que el cambio
+    (ver services/change_service.py). `seq` sale de ChangeSeq y crece en orden
+    de commit: leer "seq > cursor" nunca se salta un cambio.
+    Sin FKs: las bajas deben seguir aquí aunque la fila ya no exista.
+    """
+    __tablename__ = "change_log"
+
+    seq: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=False
+    )
+    # índice: retención (`flask changes-prune`)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    # tabla de la entidad: patients | appointments | consultations | prescriptions | file_assets
+    entity: Mapped[str] = mapped_column(String(40), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # insert | update | delete
+    op: Mapped[str] = mapped_column(String(10), nullable=False)
+    patient_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Citas: filtros del stream del calendario. En un cambio cubren el valor
+    # anterior y el nuevo (una cita que sale del rango también se notifica).
+    professional_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    prev_professional_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    range_start: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    range_end: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+class ChangeSeq(db.Model):
+    """
+    Contador único de change_log. Se incrementa con UPDATE ... RETURNING dentro
+    de la transacción del cambio: el lock de la fila dura hasta el commit, así
+    que los números se asignan en orden de commit (sin huecos "por llegar").
+    """
+    __tablename__ = "change_seq"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
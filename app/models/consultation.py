@@ -1,10 +1,15 @@
 from datetime import datetime as dt
-from sqlalchemy import String, DateTime, Integer, ForeignKey
+from sqlalchemy import String, DateTime, Integer, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..extensions import db
+from .soft_delete import LIVE, SoftDeleteMixin
 
-class Consultation(db.Model):
+class Consultation(SoftDeleteMixin, db.Model):
     __tablename__ = "consultations"
+    __table_args__ = (
+        # Historial por paciente (ORDER BY datetime DESC), solo vivas
+        Index("ix_consultations_live_patient_dt", "patient_id", "datetime", postgresql_where=text(LIVE), sqlite_where=text(LIVE)),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     patient_id: Mapped[int] = mapped_column(
@@ -33,6 +38,10 @@ class Consultation(db.Model):
         DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now(), nullable=False
     )
 
+    # Concurrencia optimista: el ORM agrega "AND version_id = :leída" a cada UPDATE
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version_id}
+
     patient = relationship(
         "Patient",
         backref=db.backref(
@@ -0,0 +1,19 @@
+from datetime import date
+from sqlalchemy import String, Date, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from ..extensions import db
+
+class DailyStat(db.Model):
+    """
+    Contadores del dashboard por día local (CDMX) y profesional.
+    Se mantienen incrementalmente en cada flush (ver services/stats_service.py)
+    y se pueden reconstruir con `flask stats-rebuild`.
+    """
+    __tablename__ = "daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # 0 = sin profesional (las PK no admiten NULL)
+    professional_id: Mapped[int] = mapped_column(Integer, primary_key=True, default=0)
+    # patients_new | appointments | appt_status:<status> | prescriptions
+    metric: Mapped[str] = mapped_column(String(40), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Enum as PgEnum
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Enum as PgEnum, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..extensions import db
+from .soft_delete import SoftDeleteMixin
 
 class FileKind(str, Enum):
     DOCUMENT = "document"    # PDFs, identificaciones, consentimientos escaneados
@@ -12,12 +13,16 @@ class PhotoPhase(str, Enum):
     BEFORE = "before"
     AFTER = "after"
 
-class FileAsset(db.Model):
+class FileAsset(SoftDeleteMixin, db.Model):
     __tablename__ = "file_assets"
+    # Sin índice parcial: los archivos solo se borran lógicamente junto con su
+    # paciente, así que la galería (ruta ya validada contra un paciente vivo)
+    # nunca encuentra filas borradas en ix_file_assets_gallery.
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # indexado vía ix_file_assets_gallery (patient_id es su primera columna)
     patient_id: Mapped[int] = mapped_column(
-        ForeignKey("patients.id", ondelete="CASCADE"), index=True, nullable=False
+        ForeignKey("patients.id", ondelete="CASCADE"), nullable=False
     )
     kind: Mapped[FileKind] = mapped_column(PgEnum(FileKind, name="file_kind"), nullable=False, index=True)
 
@@ -31,6 +36,10 @@ class FileAsset(db.Model):
     note: Mapped[str | None] = mapped_column(String(1000), nullable=True)
     size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Solo para archivos subidos: blob direccionado por contenido bajo MEDIA_ROOT
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    storage_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=db.func.now(), nullable=False)
 
     patient = relationship(
@@ -41,3 +50,25 @@ class FileAsset(db.Model):
             passive_deletes=True,   # <= consistente
         ),
     )
+
+
+# Galería (list_files): ORDER BY kind, photo_phase, photo_order (NULLS FIRST), id DESC
+# por paciente => range scan en orden de índice, sin sort.
+# En Postgres ASC pone NULLs al final, así que se declara explícito; SQLite
+# (solo dev) ya los pone primero y no acepta NULLS FIRST en índices.
+Index(
+    "ix_file_assets_gallery",
+    FileAsset.patient_id,
+    FileAsset.kind,
+    FileAsset.photo_phase.asc().nulls_first(),
+    FileAsset.photo_order.asc().nulls_first(),
+    FileAsset.id.desc(),
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_file_assets_gallery",
+    FileAsset.patient_id,
+    FileAsset.kind,
+    FileAsset.photo_phase,
+    FileAsset.photo_order,
+    FileAsset.id.desc(),
+).ddl_if(callable_=lambda ddl, target, bind, **kw: bind.dialect.name != "postgresql")
@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, Text, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from ..extensions import db
+
+class IdempotencyKey(db.Model):
+    """
+    Respuesta guardada por (usuario, Idempotency-Key) para reintentos de POST.
+    status_code NULL = la petición original sigue en curso.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # sha256 de método + ruta + cuerpo: la misma llave con otro payload es un error
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # JSON [[nombre, valor], ...]: Location, ETag, etc. de la respuesta original
+    response_headers: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,14 @@
+from datetime import date, datetime
+from sqlalchemy import String, Date, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from ..extensions import db
+
+class JobRun(db.Model):
+    """Última ejecución exitosa de cada tarea programada (para trabajar solo el delta)."""
+    __tablename__ = "job_runs"
+
+    name: Mapped[str] = mapped_column(String(60), primary_key=True)
+    last_run_on: Mapped[date] = mapped_column(Date, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now(), nullable=False
+    )
@@ -1,16 +1,24 @@
 from datetime import date, datetime
 from enum import Enum
-from sqlalchemy import String, Date, Boolean, Integer, DateTime, Float
+from sqlalchemy import String, Date, Boolean, Integer, DateTime, Float, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 from ..extensions import db
+from ..utils.time import age_on, now_cdmx
+from .soft_delete import DELETED, LIVE, SoftDeleteMixin
 
 class Sex(str, Enum):
     FEMALE = "F"
     MALE = "M"
     OTHER = "O"
 
-class Patient(db.Model):
+class Patient(SoftDeleteMixin, db.Model):
     __tablename__ = "patients"
+    __table_args__ = (
+        # Listado (ORDER BY id DESC) y huella count/max(updated_at) solo sobre filas vivas
+        Index("ix_patients_live_id", "id", "updated_at", postgresql_where=text(LIVE), sqlite_where=text(LIVE)),
+        # Cola del purge: solo las borradas, ordenadas por antigüedad
+        Index("ix_patients_deleted_at", "deleted_at", postgresql_where=text(DELETED), sqlite_where=text(DELETED)),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -52,6 +60,10 @@ class Patient(db.Model):
         DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now(), nullable=False
     )
 
+    # Concurrencia optimista: el ORM agrega "AND version_id = :leída" a cada UPDATE
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version_id}
+
     # Helpers -----------------------------------------------------------------
     @property
     def display_id(self) -> str:
@@ -59,13 +71,9 @@ class Patient(db.Model):
         return f"P-{self.id:04d}" if self.id else "P-????"
 
     def recalc_age_and_bmi(self):
-        # edad
+        # edad (día en CDMX, igual que la tarea nocturna, la importación y el PUT)
         if self.date_of_birth:
-            today = date.today()
-            years = today.year - self.date_of_birth.year - (
-                (today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day)
-            )
-            self.age_years = max(0, years)
+            self.age_years = age_on(self.date_of_birth, now_cdmx().date())
         else:
             self.age_years = None
 
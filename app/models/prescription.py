@@ -1,10 +1,17 @@
 from datetime import datetime as dt
-from sqlalchemy import String, DateTime, Integer, Float, ForeignKey
+from sqlalchemy import String, DateTime, Integer, Float, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..extensions import db
+from .soft_delete import LIVE, SoftDeleteMixin
 
-class Prescription(db.Model):
+class Prescription(SoftDeleteMixin, db.Model):
     __tablename__ = "prescriptions"
+    __table_args__ = (
+        # Serie de signos vitales y listados por paciente, ya ordenados por fecha
+        # (solo vivas). La purga y el FK de patients usan ix_prescriptions_patient_id.
+        Index("ix_prescriptions_live_patient_issued", "patient_id", "issued_at",
+              postgresql_where=text(LIVE), sqlite_where=text(LIVE)),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -44,6 +51,10 @@ class Prescription(db.Model):
         DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now(), nullable=False
     )
 
+    # Concurrencia optimista: el ORM agrega "AND version_id = :leída" a cada UPDATE
+    version_id: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version_id}
+
     patient = relationship(
         "Patient",
         backref=db.backref(
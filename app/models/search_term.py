@@ -0,0 +1,26 @@
+from sqlalchemy import Index, Integer, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+from ..extensions import db
+
+class SearchTerm(db.Model):
+    """
+    Índice invertido de la búsqueda global: término normalizado (sin acentos,
+    minúsculas) -> (entidad, id). Se mantiene en cada flush (ver
+    services/search_service.py) y se reconstruye con `flask search-reindex`.
+    """
+    __tablename__ = "search_terms"
+
+    # collation "C" en Postgres: el prefijo se busca como rango (term >= 'ana' AND term < 'ana~')
+    term: Mapped[str] = mapped_column(
+        String(64).with_variant(String(64, collation="C"), "postgresql"), primary_key=True
+    )
+    # patients | consultations | prescriptions | users
+    entity: Mapped[str] = mapped_column(String(20), primary_key=True)
+    entity_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # peso del campo donde aparece (nombre > email/teléfono > notas)
+    weight: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=1)
+
+    __table_args__ = (
+        # reindexar/borrar las entradas de una fila
+        Index("ix_search_terms_entity", "entity", "entity_id"),
+    )
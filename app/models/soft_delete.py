@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import DateTime, event
+from sqlalchemy.orm import Mapped, mapped_column, with_loader_criteria
+from ..db_routing import RoutingSession
+
+class SoftDeleteMixin:
+    """
+    Borrado lógico: deleted_at != NULL => la fila ya no existe para la API.
+    El borrado físico lo hace el purge en segundo plano (services.purge_service).
+    """
+
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+# SQL de los índices parciales (filas vivas / pendientes de purga)
+LIVE = "deleted_at IS NULL"
+DELETED = "deleted_at IS NOT NULL"
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _exclude_deleted(state):
+    """
+    Todo SELECT del ORM (get, Query, select(Modelo.col), subconsultas) filtra
+    filas borradas. Para verlas: .execution_options(include_deleted=True).
+    """
+    if (
+        state.is_select
+        and not state.is_column_load
+        and not state.is_relationship_load
+        and not state.execution_options.get("include_deleted", False)
+    ):
+        state.statement = state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
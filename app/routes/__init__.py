@@ -7,6 +7,12 @@ from .files import bp as files_bp
 from .consultations import bp as consultations_bp
 from .prescriptions import bp as prescriptions_bp
 from .appointments import bp as appointments_bp  # <-- NEW
+from .media import bp as media_bp
+from .stats import bp as stats_bp
+from .validation import bp as validation_bp
+from .admin import bp as admin_bp
+from .changes import bp as changes_bp
+from .search import bp as search_bp
 
 def register_routes(app):
     prefix = app.config.get("API_PREFIX", "/api/v1")
@@ -20,5 +26,11 @@ def register_routes(app):
     api.register_blueprint(consultations_bp)
     api.register_blueprint(prescriptions_bp)
     api.register_blueprint(appointments_bp)  # <-- NEW
+    api.register_blueprint(media_bp)
+    api.register_blueprint(stats_bp)
+    api.register_blueprint(validation_bp)
+    api.register_blueprint(admin_bp)
+    api.register_blueprint(changes_bp)
+    api.register_blueprint(search_bp)
 
     app.register_blueprint(api)
@@ -0,0 +1,75 @@
+from flask import Blueprint, request
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from ..security import roles_required
+from ..utils.responses import ok, error
+from ..utils.time import parse_date_or_datetime_to_utc
+from ..extensions import db
+from ..models.audit_log import AuditLog
+from ..services.audit_service import writer as audit_writer
+
+bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+_AUDIT_FIELDS = (
+    "id", "occurred_at", "user_id", "user_role", "action", "entity", "entity_id",
+    "patient_id", "method", "path", "status", "request_id", "ip",
+)
+
+def _audit_row(a: AuditLog) -> dict:
+    row = {f: getattr(a, f) for f in _AUDIT_FIELDS}
+    row["occurred_at"] = a.occurred_at.isoformat()
+    return row
+
+# Bitácora: ?patient_id= &user_id= &from= &to= &action= &entity= &cursor= &limit=
+# Más reciente primero; paginación por cursor (occurred_at, id), sin OFFSET.
+@bp.get("/audit")
+@roles_required("admin")
+def list_audit():
+    patient_id = request.args.get("patient_id", type=int)
+    user_id = request.args.get("user_id", type=int)
+    limit = max(1, min(request.args.get("limit", 100, type=int), 1000))
+
+    q = select(AuditLog)
+    # Cada filtro principal cae en un índice: (patient_id, occurred_at) / (user_id, occurred_at)
+    if patient_id is not None:
+        q = q.where(AuditLog.patient_id == patient_id)
+    if user_id is not None:
+        q = q.where(AuditLog.user_id == user_id)
+    try:
+        if request.args.get("from"):
+            q = q.where(AuditLog.occurred_at >= parse_date_or_datetime_to_utc(request.args["from"], as_start=True))
+        if request.args.get("to"):
+            q = q.where(AuditLog.occurred_at <= parse_date_or_datetime_to_utc(request.args["to"], as_end=True))
+    except (ValueError, OverflowError):
+        return error("Fechas inválidas", 400)
+    if request.args.get("action"):
+        q = q.where(AuditLog.action == request.args["action"])
+    if request.args.get("entity"):
+        q = q.where(AuditLog.entity == request.args["entity"])
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            raw_ts, raw_id = cursor.rsplit("|", 1)
+            ts, last_id = datetime.fromisoformat(raw_ts), int(raw_id)
+        except ValueError:
+            return error("cursor inválido", 400)
+        q = q.where(or_(
+            AuditLog.occurred_at < ts,
+            and_(AuditLog.occurred_at == ts, AuditLog.id < last_id),
+        ))
+
+    rows = db.session.execute(
+        q.order_by(AuditLog.occurred_at.desc(), AuditLog.id.desc()).limit(limit)
+    ).scalars().all()
+    items = [_audit_row(a) for a in rows]
+    last = rows[-1] if len(rows) == limit else None
+    return ok({
+        "items": items,
+        "next_cursor": f"{last.occurred_at.isoformat()}|{last.id}" if last else None,
+    })
+
+# Estado del escritor en este worker (pendientes, escritos, descartados)
+@bp.get("/audit/stats")
+@roles_required("admin")
+def audit_stats():
+    return ok(audit_writer.stats())
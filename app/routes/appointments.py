@@ -1,5 +1,8 @@
+import json
+import queue
+import time
 from datetime import timedelta
-from flask import Blueprint, request
+from flask import Blueprint, Response, current_app, request
 from sqlalchemy import or_
 from ..security import roles_required
 from ..utils.responses import ok, created, error
@@ -10,6 +13,14 @@ from ..schemas.appointment import (
     AppointmentCreateSchema, AppointmentUpdateSchema, AppointmentPublicSchema
 )
 from ..utils.time import parse_date_or_datetime_to_utc, to_utc
+from ..services.cache_service import cached_dump, entity_version, version_of
+from ..services.audit_service import note_patient
+from ..services.change_service import changes_since, head
+from ..services.coalesce_service import coalesced
+from ..services.idempotency_service import idempotent
+from ..services.stream_service import RESET, hub, to_event
+from ..services.versioning_service import VersionConflict, update_loaded, update_versioned
+from ..utils.http_cache import conditional, if_match_version, list_fingerprint, make_etag, not_modified
 
 bp = Blueprint("appointments", __name__, url_prefix="/appointments")
 
@@ -65,6 +76,7 @@ def _create_quick_patient(data: dict) -> Patient:
 # Crear cita (admin/doctor/manager) — nurses: solo lectura
 @bp.post("")
 @roles_required("admin", "doctor", "manager")
+@idempotent
 def create_appointment():
     payload = request.get_json(force=True) or {}
     data = appt_create.load(payload)
@@ -106,11 +118,14 @@ def create_appointment():
     )
     db.session.add(appt)
     db.session.commit()
+    note_patient(appt.patient_id)
     return created(appt_public.dump(appt))
 
 # Listar por rango y filtros (para mes/semana/día basta cambiar el rango)
+# Todas las pantallas abren el mismo día a la vez: single-flight (coalesce_service)
 @bp.get("")
 @roles_required("admin", "doctor", "manager", "nurse")
+@coalesced
 def list_appointments():
     # Rango: start= & end= (obligatorio para vistas del calendario)
     raw_start = request.args.get("start")
@@ -139,28 +154,141 @@ def list_appointments():
         like = f"%{name.lower()}%"
         q = q.join(Patient).filter(or_(Patient.first_name.ilike(like), Patient.last_name.ilike(like)))
 
+    # Calendario: 304 si nada cambió en el rango/filtros
+    total, last = list_fingerprint(q)
+    etag = make_etag(request.full_path, total, last)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     items = q.all()
-    return ok({"items": appt_list.dump(items)})
+    return conditional(ok({"items": appt_list.dump(items)}), etag)
+
+# ---------------------------------------------------------------------------
+# Stream SSE del calendario: altas/cambios/bajas de citas en vivo.
+#   GET /appointments/stream?doctor_id=&start=&end=   (todos opcionales)
+# Cada evento: id = seq de change_log; el cliente reconecta con Last-Event-ID y
+# recibe lo que se perdió. "event: reset" = recargar el rango con GET /appointments.
+# El payload es mínimo (op, id, rango, profesional): el detalle va por GET /<id>.
+# ---------------------------------------------------------------------------
+def _sse(event: str, data: dict, seq: int | None = None) -> str:
+    head_line = f"id: {seq}\n" if seq is not None else ""
+    return f"{head_line}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def _appt_event(ev: dict) -> str:
+    return _sse("appointment", {
+        "op": ev["op"],
+        "id": ev["id"],
+        "patient_id": ev["patient_id"],
+        "professional_id": ev["professional_id"],
+        # en un cambio cubre la posición anterior y la nueva (lo que hay que repintar)
+        "range_start": ev["range_start"].isoformat() if ev["range_start"] else None,
+        "range_end": ev["range_end"].isoformat() if ev["range_end"] else None,
+    }, ev["seq"])
+
+@bp.get("/stream")
+@roles_required("admin", "doctor", "manager", "nurse")
+def stream_appointments():
+    raw_start = request.args.get("start")
+    raw_end = request.args.get("end")
+    dt_start = parse_date_or_datetime_to_utc(raw_start, as_start=True) if raw_start else None
+    dt_end = parse_date_or_datetime_to_utc(raw_end, as_end=True) if raw_end else None
+    doctor_id = request.args.get("doctor_id", type=int)
+    raw_last = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(raw_last) if raw_last else None
+    except ValueError:
+        return error("Last-Event-ID inválido", 400)
+
+    cfg = current_app.config
+    hub.ensure_started(current_app._get_current_object())
+    sub = hub.subscribe(Appointment.__tablename__, doctor_id, dt_start, dt_end)
+    if sub is None:
+        # cada stream ocupa un hilo del worker: no dejar sin hilos al resto de la API
+        resp, status = error("Demasiados streams abiertos; reintenta más tarde", 503)
+        resp.headers["Retry-After"] = "5"
+        return resp, status
+
+    # Suscrito antes de leer la BD: lo que llegue por la cola con seq <= cursor se descarta.
+    # Se lee del primario, igual que el hilo del hub: una réplica atrasada
+    # dejaría un hueco entre su head() y lo que el hub ya repartió.
+    backlog, reset = [], False
+    try:
+        with db.engine.connect() as conn:
+            if last_id is None:
+                cursor, rows = head(conn), None
+            else:
+                limit = cfg.get("SSE_REPLAY_LIMIT", 1000)
+                rows = changes_since(last_id, limit + 1, conn)
+        if rows is not None:
+            cursor = last_id
+            if len(rows) > limit:
+                reset, cursor = True, rows[-1].seq
+            else:
+                backlog = [ev for ev in map(to_event, rows) if sub.wants(ev)]
+                cursor = rows[-1].seq if rows else last_id
+    except Exception:
+        hub.unsubscribe(sub)
+        raise
+    finally:
+        db.session.remove()  # el generador no usa la sesión: liberar la conexión ya
+
+    keepalive = cfg.get("SSE_KEEPALIVE_SECONDS", 15)
+    deadline = time.monotonic() + cfg.get("SSE_MAX_SECONDS", 300)
+    retry_ms = cfg.get("SSE_RETRY_MS", 3000)
+
+    def generate(cursor=cursor):
+        yield f"retry: {retry_ms}\n\n"
+        if reset:
+            yield _sse("reset", {"cursor": cursor}, cursor)
+        for ev in backlog:
+            yield _appt_event(ev)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return  # el navegador reconecta con Last-Event-ID
+            try:
+                ev = sub.queue.get(timeout=min(keepalive, remaining))
+            except queue.Empty:
+                yield ": ping\n\n"  # también detecta clientes desconectados
+                continue
+            if ev is RESET:
+                yield _sse("reset", {"cursor": hub.last_seq}, hub.last_seq)
+                return
+            if ev["seq"] <= cursor:
+                continue
+            cursor = ev["seq"]
+            yield _appt_event(ev)
+
+    # Sin stream_with_context: la petición "termina" al devolver la respuesta
+    # (sesión de BD y conteo de peticiones en vuelo liberados)
+    resp = Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    resp.call_on_close(lambda: hub.unsubscribe(sub))  # también si el generador nunca arrancó
+    return resp
 
 # Detalle
 @bp.get("/<int:appt_id>")
 @roles_required("admin", "doctor", "manager", "nurse")
 def get_appointment(appt_id: int):
-    a = db.session.get(Appointment, appt_id)
-    if not a:
+    version = entity_version(Appointment, appt_id)
+    if version is None:
         return error("Cita no encontrada", 404)
-    return ok(appt_public.dump(a))
+    etag = make_etag("appointments", appt_id, version[0], version=version[2])
+    cached = not_modified(etag, version[1])
+    if cached:
+        return cached
+    data = cached_dump(Appointment, appt_id, appt_public, version[0])
+    note_patient(data["patient_id"])
+    return conditional(ok(data), etag, version[1])
 
-# Editar (mover/resize/estado/notas)
-@bp.patch("/<int:appt_id>")
-@roles_required("admin", "doctor", "manager")
-def update_appointment(appt_id: int):
-    a = db.session.get(Appointment, appt_id)
-    if not a:
-        return error("Cita no encontrada", 404)
-
-    data = appt_update.load(request.get_json(force=True) or {})
+# Campos que requieren la fila actual: end_at se deriva y daily_stats cuenta por
+# día/profesional/estado (after_flush). El resto va en un solo UPDATE ... RETURNING.
+_NEEDS_ROW = {"start_at", "duration_min", "status", "professional_id"}
 
+def _apply_update(a: Appointment, data: dict) -> None:
     if "start_at" in data:
         start_at = to_utc(data["start_at"])
         a.start_at = start_at
@@ -181,9 +309,29 @@ def update_appointment(appt_id: int):
             else:
                 setattr(a, k, data[k])
 
-    db.session.add(a)
-    db.session.commit()
-    return ok(appt_public.dump(a))
+# Editar (mover/resize/estado/notas). If-Match: ETag del detalle -> 412 si cambió
+@bp.patch("/<int:appt_id>")
+@roles_required("admin", "doctor", "manager")
+def update_appointment(appt_id: int):
+    data = appt_update.load(request.get_json(force=True) or {})
+    expected = if_match_version()
+    try:
+        if _NEEDS_ROW.isdisjoint(data):
+            if "appt_type" in data:
+                data["appt_type"] = AppointmentType(data["appt_type"])
+            a = update_versioned(Appointment, appt_id, data, expected)
+        else:
+            a = update_loaded(Appointment, appt_id, lambda a: _apply_update(a, data), expected)
+    except VersionConflict as e:
+        return error("La cita cambió mientras la editabas; recarga e intenta de nuevo", 412,
+                     current_version=e.current_version)
+    if a is None:
+        return error("Cita no encontrada", 404)
+    note_patient(a.patient_id)
+
+    version = version_of(Appointment, a.updated_at, a.version_id)
+    etag = make_etag("appointments", appt_id, version[0], version=version[2])
+    return conditional(ok(appt_public.dump(a)), etag, version[1])
 
 # Borrar
 @bp.delete("/<int:appt_id>")
@@ -192,6 +340,7 @@ def delete_appointment(appt_id: int):
     a = db.session.get(Appointment, appt_id)
     if not a:
         return error("Cita no encontrada", 404)
+    note_patient(a.patient_id)
     db.session.delete(a)
     db.session.commit()
     return ok({"deleted": True, "id": appt_id})
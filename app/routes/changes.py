@@ -0,0 +1,68 @@
+from flask import Blueprint, request
+from ..security import roles_required
+from ..utils.responses import ok, error
+from ..services import change_service
+from ..schemas.appointment import AppointmentPublicSchema
+from ..schemas.consultation import ConsultationPublicSchema
+from ..schemas.file_asset import FilePublicSchema
+from ..schemas.patient import PatientPublicSchema
+from ..schemas.prescription import PrescriptionPublicSchema
+
+bp = Blueprint("changes", __name__, url_prefix="/changes")
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+_SCHEMAS = {
+    "patients": PatientPublicSchema(),
+    "appointments": AppointmentPublicSchema(),
+    "consultations": ConsultationPublicSchema(),
+    "prescriptions": PrescriptionPublicSchema(),
+    "file_assets": FilePublicSchema(),
+}
+
+# ---------------------------------------------------------------------------
+# Sync incremental (app de tablet):
+#   1) GET /changes            -> {"next_cursor": N}  (guardar antes de la descarga completa)
+#   2) GET /changes?since=N    -> altas/cambios ("upsert" con la fila actual) y
+#      bajas ("delete", tombstone) desde N; repetir con next_cursor mientras has_more.
+# 410 = el cursor es más viejo que la retención: volver a descargar todo.
+# Opcional: entities=patients,appointments
+# ---------------------------------------------------------------------------
+@bp.get("")
+@roles_required("admin", "doctor", "manager", "nurse")
+def list_changes():
+    raw_entities = request.args.get("entities")
+    entities = None
+    if raw_entities:
+        entities = [e.strip() for e in raw_entities.split(",") if e.strip()]
+        unknown = [e for e in entities if e not in change_service.ENTITIES]
+        if unknown:
+            return error(f"entities inválidas: {', '.join(unknown)}", 400,
+                         allowed=sorted(change_service.ENTITIES))
+
+    raw_since = request.args.get("since")
+    if raw_since is None:
+        return ok({"items": [], "next_cursor": change_service.head(), "has_more": False})
+    try:
+        since = int(raw_since)
+    except ValueError:
+        return error("since inválido", 400)
+    if since < 0:
+        return error("since inválido", 400)
+    if change_service.cursor_expired(since):
+        return error("El cursor expiró; descarga todo de nuevo y usa el next_cursor de GET /changes", 410)
+
+    limit = max(1, min(request.args.get("limit", DEFAULT_LIMIT, type=int), MAX_LIMIT))
+    items, next_cursor, has_more = change_service.delta(since, limit, entities)
+    out = []
+    for it in items:
+        obj = it["obj"]
+        row = {"seq": it["seq"], "entity": it["entity"], "id": it["id"]}
+        if obj is None:
+            row["op"] = "delete"
+        else:
+            row["op"] = "upsert"
+            row["data"] = _SCHEMAS[it["entity"]].dump(obj)
+        out.append(row)
+    return ok({"items": out, "next_cursor": next_cursor, "has_more": has_more})
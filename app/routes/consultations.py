@@ -9,6 +9,10 @@ from ..schemas.consultation import (
     ConsultationCreateSchema, ConsultationUpdateSchema, ConsultationPublicSchema
 )
 from ..utils.time import parse_date_or_datetime_to_utc  
+from ..utils.http_cache import conditional, if_match_version, list_fingerprint, make_etag, not_modified
+from ..services.cache_service import entity_version, version_of
+from ..services.versioning_service import VersionConflict, update_versioned
+from ..services.audit_service import note_patient
 
 bp = Blueprint("consultations", __name__, url_prefix="/consultations")
 
@@ -32,6 +36,7 @@ def create_consultation():
     c = Consultation(**data)
     db.session.add(c)
     db.session.commit()
+    note_patient(c.patient_id)
     return created(cons_public.dump(c))
 
 # Listado general con filtros por nombre de paciente y rango de fechas
@@ -66,34 +71,49 @@ def list_consultations():
             )
         )
 
-    total = q.count()
+    total, last = list_fingerprint(q)
+    etag = make_etag(request.full_path, total, last)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     items = q.limit(page_size).offset((page - 1) * page_size).all()
-    return ok(
+    return conditional(ok(
         {"items": cons_list.dump(items), "total": total, "page": page, "page_size": page_size}
-    )
+    ), etag)
 
 # Detalle
 @bp.get("/<int:cons_id>")
 @roles_required("admin", "doctor", "manager", "nurse")
 def get_consultation(cons_id: int):
-    c = db.session.get(Consultation, cons_id)
-    if not c:
+    version = entity_version(Consultation, cons_id)
+    if version is None:
         return error("Consulta no encontrada", 404)
-    return ok(cons_public.dump(c))
+    etag = make_etag("consultations", cons_id, version[0], version=version[2])
+    cached = not_modified(etag, version[1])
+    if cached:
+        return cached
+    c = db.session.get(Consultation, cons_id)
+    note_patient(c.patient_id)
+    return conditional(ok(cons_public.dump(c)), etag, version[1])
 
-# Editar
+# Editar (If-Match: ETag del detalle -> 412 si cambió)
 @bp.patch("/<int:cons_id>")
 @roles_required("admin", "doctor", "manager")
 def update_consultation(cons_id: int):
-    c = db.session.get(Consultation, cons_id)
-    if not c:
-        return error("Consulta no encontrada", 404)
     data = cons_update.load(request.get_json(force=True) or {})
-    for k, v in data.items():
-        setattr(c, k, v)
-    db.session.add(c)
-    db.session.commit()
-    return ok(cons_public.dump(c))
+    try:
+        c = update_versioned(Consultation, cons_id, data, if_match_version())
+    except VersionConflict as e:
+        return error("La consulta cambió mientras la editabas; recarga e intenta de nuevo", 412,
+                     current_version=e.current_version)
+    if c is None:
+        return error("Consulta no encontrada", 404)
+    note_patient(c.patient_id)
+
+    version = version_of(Consultation, c.updated_at, c.version_id)
+    etag = make_etag("consultations", cons_id, version[0], version=version[2])
+    return conditional(ok(cons_public.dump(c)), etag, version[1])
 
 # Borrar
 @bp.delete("/<int:cons_id>")
@@ -102,6 +122,7 @@ def delete_consultation(cons_id: int):
     c = db.session.get(Consultation, cons_id)
     if not c:
         return error("Consulta no encontrada", 404)
+    note_patient(c.patient_id)
     db.session.delete(c)
     db.session.commit()
     return ok({"deleted": True, "id": cons_id})
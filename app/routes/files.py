@@ -1,19 +1,93 @@
-from flask import Blueprint, request
+from flask import Blueprint, Response, current_app, request, send_file
+from sqlalchemy import insert
+from werkzeug.formparser import FormDataParser
 from ..security import roles_required
 from ..utils.responses import ok, created, error
-from ..schemas.file_asset import FileCreateSchema, FilePublicSchema
+from ..schemas.file_asset import FileCreateSchema, FilePublicSchema, FileUploadSchema
 from ..extensions import db
 from ..models.file_asset import FileAsset, FileKind, PhotoPhase
 from ..models.patient import Patient
-from ..services.image_service import validate_and_prepare
+from ..services import change_service
+from ..services.image_service import (
+    comparison_key, render_comparison, schedule_derivatives, validate_and_prepare
+)
+from ..services.storage_service import (
+    blob_digest, blob_lock, commit_upload, media_url, release_blob, upload_stream_factory
+)
 
 bp = Blueprint("files", __name__, url_prefix="")
 
 file_create = FileCreateSchema()
+file_bulk = FileCreateSchema(many=True)
+file_upload = FileUploadSchema()
 file_public = FilePublicSchema()
 file_list = FilePublicSchema(many=True)
 
-# Crear documento/foto por URL
+# Subida multipart: el archivo va por chunks directo a MEDIA_ROOT (nunca entero en memoria)
+def _add_uploaded_file(patient_id: int):
+    writers = []
+    parser = FormDataParser(
+        stream_factory=upload_stream_factory(writers),
+        max_form_memory_size=request.max_form_memory_size,
+        max_form_parts=request.max_form_parts,
+    )
+    try:
+        _, form, files = parser.parse(
+            request.stream, request.mimetype, request.content_length, request.mimetype_params
+        )
+        upload = files.get("file")
+        if upload is None:
+            return error("Falta el archivo (campo 'file')", 400)
+        data = file_upload.load(form.to_dict())
+        kind = FileKind(data["kind"])
+
+        # Del reuso/escritura del blob hasta el commit del FileAsset: un DELETE
+        # concurrente de la última otra referencia no puede borrarlo en medio
+        with blob_lock(upload.stream.sha256):
+            try:
+                blob = commit_upload(upload.stream)
+            except ValueError as e:
+                return error(str(e), 415)
+            if kind == FileKind.PHOTO and not blob.mime_type.startswith("image/"):
+                db.session.rollback()  # leer el estado actual, no el de antes del lock
+                release_blob(blob.rel_path, still_referenced=_blob_in_use(blob.rel_path))
+                return error("Una foto debe ser imagen (webp/jpg/png)", 415)
+
+            asset = FileAsset(
+                patient_id=patient_id,
+                kind=kind,
+                url=media_url(blob.rel_path),
+                mime_type=blob.mime_type,
+                title=data.get("title") or upload.filename,
+                note=data.get("note"),
+                size_bytes=blob.size,
+                content_sha256=blob.sha256,
+                storage_path=blob.rel_path,
+                photo_phase=PhotoPhase(data["photo_phase"]) if data.get("photo_phase") else None,
+                photo_order=data.get("photo_order"),
+            )
+            db.session.add(asset)
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                if not blob.deduplicated:
+                    release_blob(blob.rel_path, still_referenced=_blob_in_use(blob.rel_path))
+                raise
+    finally:
+        # temporales sobrantes (otros campos de archivo, errores de validación)
+        for w in writers:
+            w.discard()
+
+    schedule_derivatives(asset)
+    return created(file_public.dump(asset), deduplicated=blob.deduplicated)
+
+def _blob_in_use(rel_path: str) -> bool:
+    # también cuentan los archivos borrados lógicamente (aún no purgados)
+    q = db.session.query(FileAsset.id).filter(FileAsset.storage_path == rel_path)
+    return db.session.query(q.exists()).execution_options(include_deleted=True).scalar()
+
+# Crear documento/foto: multipart (subida real) o JSON con URL externa
 @bp.post("/patients/<int:patient_id>/files")
 @roles_required("admin", "doctor", "manager")
 def add_file(patient_id: int):
@@ -21,6 +95,9 @@ def add_file(patient_id: int):
     if not p:
         return error("Paciente no encontrado", 404)
 
+    if request.mimetype == "multipart/form-data":
+        return _add_uploaded_file(patient_id)
+
     payload = request.get_json(force=True) or {}
     data = file_create.load(payload)
 
@@ -43,6 +120,51 @@ def add_file(patient_id: int):
     db.session.commit()
     return created(file_public.dump(asset))
 
+# Alta masiva por URL (digitalización de expedientes): valida todo y hace
+# un solo INSERT multi-fila. Si un elemento es inválido no se inserta nada.
+@bp.post("/patients/<int:patient_id>/files/bulk")
+@roles_required("admin", "doctor", "manager")
+def add_files_bulk(patient_id: int):
+    p = db.session.get(Patient, patient_id)
+    if not p:
+        return error("Paciente no encontrado", 404)
+
+    payload = request.get_json(force=True) or {}
+    items = payload.get("items")
+    if not isinstance(items, list) or not items:
+        return error("Se requiere 'items' (lista no vacía)", 400)
+    max_items = current_app.config.get("FILES_BULK_MAX_ITEMS", 500)
+    if len(items) > max_items:
+        return error(f"Máximo {max_items} archivos por petición", 400)
+
+    data = file_bulk.load(items)  # errores por índice: {"3": {"url": [...]}}
+
+    rows = []
+    for d in data:
+        kind = FileKind(d["kind"])
+        url_norm, mime = validate_and_prepare(kind, d["url"])
+        rows.append({
+            "patient_id": patient_id,
+            "kind": kind,
+            "url": url_norm,
+            "mime_type": mime,
+            "title": d.get("title"),
+            "note": d.get("note"),
+            "size_bytes": d.get("size_bytes"),
+            "photo_phase": PhotoPhase(d["photo_phase"]) if d.get("photo_phase") else None,
+            "photo_order": d.get("photo_order"),
+        })
+
+    ids = db.session.execute(
+        insert(FileAsset.__table__).values(rows).returning(FileAsset.__table__.c.id)
+    ).scalars().all()
+    # INSERT del Core: no pasa por after_flush
+    change_service.record(FileAsset, change_service.INSERT, [{"id": i, "patient_id": patient_id} for i in ids])
+    db.session.commit()
+
+    assets = db.session.query(FileAsset).filter(FileAsset.id.in_(ids)).order_by(FileAsset.id).all()
+    return created({"items": file_list.dump(assets), "count": len(assets)})
+
 # Listar archivos de un paciente
 @bp.get("/patients/<int:patient_id>/files")
 @roles_required("admin", "doctor", "manager", "nurse")
@@ -58,6 +180,43 @@ def list_files(patient_id: int):
     )
     return ok({"items": file_list.dump(assets)})
 
+# Comparativo antes/después (lado a lado) de un paciente para un photo_order
+@bp.get("/patients/<int:patient_id>/photos/compare")
+@roles_required("admin", "doctor", "manager", "nurse")
+def compare_photos(patient_id: int):
+    order = request.args.get("order", type=int)
+    if order is None:
+        return error("Parámetro 'order' (photo_order) es obligatorio", 400)
+
+    def _latest(phase: PhotoPhase):
+        return (
+            db.session.query(FileAsset)
+            .filter(
+                FileAsset.patient_id == patient_id,
+                FileAsset.kind == FileKind.PHOTO,
+                FileAsset.photo_phase == phase,
+                FileAsset.photo_order == order,
+                FileAsset.storage_path.isnot(None),
+            )
+            .order_by(FileAsset.id.desc())
+            .first()
+        )
+
+    before, after = _latest(PhotoPhase.BEFORE), _latest(PhotoPhase.AFTER)
+    if not before or not after:
+        return error("Se necesitan foto 'antes' y 'después' subidas para ese orden", 404)
+
+    # El ETag son los hashes de ambas fotos: 304 sin tocar disco
+    etag = comparison_key(before, after)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = send_file(render_comparison(before, after), mimetype="image/webp", max_age=None)
+    resp.set_etag(etag)
+    # La URL no cambia aunque cambien las fotos: siempre revalidar
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
 # Eliminar archivo
 @bp.delete("/files/<int:file_id>")
 @roles_required("admin", "doctor", "manager")
@@ -65,6 +224,12 @@ def delete_file(file_id: int):
     asset = db.session.get(FileAsset, file_id)
     if not asset:
         return error("Archivo no encontrado", 404)
+    rel_path = asset.storage_path
     db.session.delete(asset)
     db.session.commit()
+    # El blob puede estar compartido (dedupe por contenido); el lock cubre una
+    # subida que lo esté reutilizando y aún no haga commit
+    if rel_path:
+        with blob_lock(blob_digest(rel_path)):
+            release_blob(rel_path, still_referenced=_blob_in_use(rel_path))
     return ok({"deleted": True, "id": file_id})
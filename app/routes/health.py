@@ -1,7 +1,7 @@
-from flask import Blueprint, request
-from ..utils.responses import ok
-from ..extensions import db
-from sqlalchemy import text
+from flask import Blueprint, current_app, request
+from ..utils.responses import ok, error
+from ..extensions import limiter
+from ..services.health_service import checker, readiness
 
 bp = Blueprint("health", __name__, url_prefix="/health")
 
@@ -9,13 +9,29 @@ bp = Blueprint("health", __name__, url_prefix="/health")
 def health():
     """
     /api/v1/health
-    Opcional: ?db=1 para probar conexión a base de datos.
+    Opcional: ?db=1 para ver el estado de la base de datos (último chequeo cacheado).
     """
     db_ok = None
     if request.args.get("db") == "1":
-        try:
-            db.session.execute(text("SELECT 1"))
-            db_ok = True
-        except Exception:
-            db_ok = False
+        checker.ensure_started(current_app._get_current_object())
+        db_ok = checker.snapshot.get("db_ok")
     return ok({"service": "up", "db": db_ok})
+
+@bp.get("/live")
+@limiter.exempt
+def live():
+    """Liveness: el proceso responde. No toca la BD."""
+    return ok({"service": "up"})
+
+@bp.get("/ready")
+@limiter.exempt
+def ready():
+    """
+    Readiness: lee el resultado cacheado del chequeo de fondo (latencia BD,
+    saturación del pool, migraciones) y la carga del worker.
+    503 => el balanceador debe dejar de mandar tráfico a este worker.
+    """
+    is_ready, details = readiness(current_app.config)
+    if not is_ready:
+        return error("not ready", 503, data=details)
+    return ok(details)
@@ -0,0 +1,137 @@
+import os
+from datetime import datetime, timezone
+from flask import Blueprint, Response, current_app, request, send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+from sqlalchemy import select
+from ..extensions import db
+from ..models.file_asset import FileAsset
+from ..models.patient import Patient
+from ..security import roles_required
+from ..utils.responses import error
+from ..services.audit_service import note_patient
+from ..services.storage_service import blob_digest, media_root, sniff_mime
+
+bp = Blueprint("media", __name__, url_prefix="/media")
+
+# Blobs direccionados por contenido: nunca cambian bajo la misma URL.
+# "private" porque son datos clínicos (PHI): nada de caches compartidos.
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+def _etag_for(rel_path: str) -> str:
+    # <sha>.<ext> o <sha>.<derivado>.webp -> "<sha>" / "<sha>-<derivado>"
+    parts = os.path.basename(rel_path).split(".")
+    return parts[0] if len(parts) <= 2 else f"{parts[0]}-{parts[1]}"
+
+def _owning_patient(rel_path: str) -> int | None:
+    """
+    Paciente (vivo) de algún FileAsset vivo que usa este blob o sus derivados.
+    Sin dueño no se sirve: la URL sale del hash y no basta con conocerla.
+    """
+    stmt = (
+        select(FileAsset.patient_id)
+        .join(Patient, Patient.id == FileAsset.patient_id)
+        .where(FileAsset.content_sha256 == blob_digest(rel_path))
+        .order_by(FileAsset.id)
+        .limit(1)
+    )
+    return db.session.execute(stmt).scalar()
+
+def _mimetype_for(path: str) -> str:
+    with open(path, "rb") as fh:
+        sniffed = sniff_mime(fh.read(16))
+    return sniffed[0] if sniffed else "application/octet-stream"
+
+def _is_zero_copy_server() -> bool:
+    # El FileWrapper de gunicorn usa os.sendfile() respetando Content-Length,
+    # así que un archivo ya posicionado en el offset del Range sale sin copiarse.
+    wrapper = request.environ.get("wsgi.file_wrapper")
+    return getattr(wrapper, "__module__", "").startswith("gunicorn")
+
+def _common_headers(resp: Response, etag: str, mtime: datetime):
+    resp.set_etag(etag)
+    resp.last_modified = mtime
+    resp.headers["Cache-Control"] = CACHE_CONTROL
+    resp.headers["Accept-Ranges"] = "bytes"
+    return resp
+
+def _not_modified(etag: str, mtime: datetime) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    ims = request.if_modified_since
+    return ims is not None and mtime.replace(microsecond=0) <= ims
+
+def _range_response(path: str, size: int, mimetype: str, etag: str, mtime: datetime):
+    """
+    206 con un solo rango, servido con sendfile vía el file_wrapper de gunicorn.
+    416 solo si ese rango queda fuera del archivo.
+    """
+    if request.if_range and request.if_range.etag and request.if_range.etag != etag:
+        return None  # el cliente tiene otra versión: respuesta completa
+    rng = request.range.range_for_length(size)
+    if rng is None:
+        raise RequestedRangeNotSatisfiable(length=size)
+    start, stop = rng
+    fh = open(path, "rb")
+    fh.seek(start)
+    resp = Response(
+        wrap_file(request.environ, fh), status=206, mimetype=mimetype, direct_passthrough=True
+    )
+    resp.content_length = stop - start
+    resp.headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    return _common_headers(resp, etag, mtime)
+
+@bp.get("/<path:rel_path>")
+@roles_required("admin", "doctor", "manager", "nurse")
+def serve_media(rel_path: str):
+    root = media_root()
+    path = safe_join(root, rel_path)
+    if not path or not rel_path.startswith("blobs/") or not os.path.isfile(path):
+        return error("Archivo no encontrado", 404)
+    # mismo acceso que la galería del paciente (GET /patients/<id>/files)
+    patient_id = _owning_patient(rel_path)
+    if patient_id is None:
+        return error("Archivo no encontrado", 404)
+    note_patient(patient_id)
+
+    st = os.stat(path)
+    mtime = datetime.fromtimestamp(st.st_mtime, tz=timezone.utc)
+    etag = _etag_for(rel_path)
+
+    # 304 antes de abrir el archivo
+    if _not_modified(etag, mtime):
+        return _common_headers(Response(status=304), etag, mtime)
+
+    mimetype = _mimetype_for(path)
+
+    # Producción con nginx: él sirve los bytes (sendfile + Range) desde una
+    # location "internal" que apunta a MEDIA_ROOT.
+    accel_prefix = current_app.config.get("MEDIA_ACCEL_REDIRECT_PREFIX")
+    if accel_prefix:
+        resp = Response(status=200, mimetype=mimetype)
+        resp.headers["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{rel_path}"
+        return _common_headers(resp, etag, mtime)
+
+    if request.range and len(request.range.ranges) > 1:
+        # multipart/byteranges no se sirve: se ignora el Range (RFC 9110
+        # lo permite) y va el archivo completo, también por send_file
+        request.environ.pop("HTTP_RANGE", None)
+    elif request.range and _is_zero_copy_server():
+        resp = _range_response(path, st.st_size, mimetype, etag, mtime)
+        if resp is not None:
+            return resp
+
+    # Sin Range: send_file usa wsgi.file_wrapper (sendfile en gunicorn).
+    # Con Range fuera de gunicorn (dev), werkzeug recorta el archivo.
+    resp = send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=etag,
+        last_modified=mtime,
+        max_age=None,
+    )
+    resp.headers["Cache-Control"] = CACHE_CONTROL
+    resp.headers["Accept-Ranges"] = "bytes"
+    return resp
@@ -1,12 +1,22 @@
-from flask import Blueprint, request
+import csv
+import zipfile
+from flask import Blueprint, current_app, request
+from sqlalchemy import select
 from ..security import roles_required
 from ..utils.responses import ok, created, error
+from ..utils.time import parse_date_or_datetime_to_utc
 from ..schemas.patient import (
     PatientCreateSchema,
     PatientPublicSchema,
     PatientUpdateSchema,
 )
-from ..services import patient_service
+from ..services import import_service, patient_service, vitals_service
+from ..services.cache_service import cached_dump, entity_version, version_of
+from ..services.audit_service import note_patient
+from ..services.autocomplete_service import patient_index
+from ..services.idempotency_service import idempotent
+from ..services.versioning_service import VersionConflict
+from ..utils.http_cache import conditional, if_match_version, list_fingerprint, make_etag, not_modified
 from ..extensions import db
 from ..models.patient import Patient
 
@@ -23,16 +33,45 @@ patient_list = PatientPublicSchema(many=True)
 # --------------------------------------------------------------------
 @bp.post("")
 @roles_required("admin", "doctor", "manager")
+@idempotent
 def create_patient():
     payload = request.get_json(force=True) or {}
     data = patient_create.load(payload)
     try:
         p = patient_service.create_patient(data)
+        note_patient(p.id)
         return created(patient_public.dump(p))
     except ValueError as e:
         return error(str(e), 400)
 
 
+# --------------------------------------------------------------------
+# Importación masiva (multipart: file=<.csv|.xlsx>, ?dry_run=1)
+# Archivos mayores a MAX_UPLOAD_MB: `flask patients-import <ruta>`
+# --------------------------------------------------------------------
+@bp.post("/import")
+@roles_required("admin", "manager")
+def import_patients():
+    f = request.files.get("file")
+    if not f or not f.filename:
+        return error("Falta el archivo (campo 'file')", 400)
+    fmt = f.filename.rsplit(".", 1)[-1].lower()
+    if fmt not in import_service.READERS:
+        return error("Formato no soportado (usa .csv o .xlsx)", 415)
+
+    cfg = current_app.config
+    try:
+        report = import_service.import_patients(
+            import_service.READERS[fmt](f.stream),
+            workers=cfg.get("PATIENT_IMPORT_WORKERS", 2),
+            chunk_size=cfg.get("PATIENT_IMPORT_CHUNK", 2000),
+            max_errors=cfg.get("PATIENT_IMPORT_MAX_ERRORS", 1000),
+            dry_run=request.args.get("dry_run") in ("1", "true"),
+        )
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+        return error(f"Archivo ilegible: {e}", 400)
+    return ok(report)
+
 # --------------------------------------------------------------------
 # Listar pacientes (q|name, from, to, paginación)
 # --------------------------------------------------------------------
@@ -52,21 +91,52 @@ def list_patients():
     dt_from = parse_date_or_datetime_to_utc(raw_from, as_start=True) if raw_from else None
     dt_to = parse_date_or_datetime_to_utc(raw_to, as_end=True) if raw_to else None
 
+    # ETag del conjunto filtrado: 304 sin cargar pacientes
+    total, last = list_fingerprint(patient_service.patients_query(terms, dt_from, dt_to))
+    etag = make_etag(request.full_path, total, last)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     items, total = patient_service.list_patients(
         page=page,
         page_size=page_size,
         terms=terms,
         created_from=dt_from,
         created_to=dt_to,
+        total=total,
     )
-    return ok(
+    return conditional(ok(
         {
             "items": patient_list.dump(items),
             "total": total,
             "page": page,
             "page_size": page_size,
         }
-    )
+    ), etag)
+
+
+# --------------------------------------------------------------------
+# Autocompletado (selectores de paciente): ?q=ana lo &limit=8
+# Se responde desde el índice en memoria del worker, sin tocar la BD.
+# --------------------------------------------------------------------
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+@bp.get("/autocomplete")
+@roles_required("admin", "doctor", "manager", "nurse")
+def autocomplete_patients():
+    limit = max(1, min(request.args.get("limit", AUTOCOMPLETE_LIMIT, type=int), AUTOCOMPLETE_MAX_LIMIT))
+    patient_index.ensure_started(current_app._get_current_object())
+    if not patient_index.ready():
+        resp, status = error("El índice de pacientes se está construyendo; reintenta", 503)
+        resp.headers["Retry-After"] = "1"
+        return resp, status
+    items = [
+        {"id": pid, "first_name": first, "last_name": last}
+        for pid, first, last in patient_index.lookup(request.args.get("q") or "", limit)
+    ]
+    return ok({"items": items})
 
 
 # --------------------------------------------------------------------
@@ -75,10 +145,14 @@ def list_patients():
 @bp.get("/<int:patient_id>")
 @roles_required("admin", "doctor", "manager", "nurse")
 def get_patient(patient_id: int):
-    p = patient_service.get_patient(patient_id)
-    if not p:
+    version = entity_version(Patient, patient_id)
+    if version is None:
         return error("Paciente no encontrado", 404)
-    return ok(patient_public.dump(p))
+    etag = make_etag("patients", patient_id, version[0], version=version[2])
+    cached = not_modified(etag, version[1])
+    if cached:
+        return cached
+    return conditional(ok(cached_dump(Patient, patient_id, patient_public, version[0])), etag, version[1])
 
 
 # --------------------------------------------------------------------
@@ -88,21 +162,27 @@ def get_patient(patient_id: int):
 @bp.put("/<int:patient_id>")
 @roles_required("admin", "doctor", "manager")
 def update_patient_route(patient_id: int):
-    p = db.session.get(Patient, patient_id)
-    if not p:
-        return error("Paciente no encontrado", 404)
-
     payload = request.get_json(force=True) or {}
     data = patient_update.load(payload)  # valida y normaliza
-    p = patient_service.update_patient(p, data)  # este servicio hace commit
-    return ok(patient_public.dump(p))
+    try:
+        # este servicio hace commit; If-Match (ETag del detalle) -> 412 si cambió
+        p = patient_service.update_patient(patient_id, data, if_match_version())
+    except VersionConflict as e:
+        return error("El paciente cambió mientras lo editabas; recarga e intenta de nuevo", 412,
+                     current_version=e.current_version)
+    if p is None:
+        return error("Paciente no encontrado", 404)
+
+    version = version_of(Patient, p.updated_at, p.version_id)
+    etag = make_etag("patients", patient_id, version[0], version=version[2])
+    return conditional(ok(patient_public.dump(p)), etag, version[1])
 
 
 # --------------------------------------------------------------------
 # Eliminar paciente (DELETE)
-#   - Si prefieres soft-delete, marca p.active=False y haz commit.
-#   - Si no tienes cascade configurado en las relaciones, descomenta
-#     el bloque para borrar dependencias antes del paciente.
+#   - Borrado lógico del paciente y sus dependencias (deleted_at).
+#   - El borrado físico (filas + blobs) lo hace `flask patients-purge`
+#     en lotes, pasado PATIENT_PURGE_AFTER_DAYS.
 # --------------------------------------------------------------------
 @bp.delete("/<int:patient_id>")
 @roles_required("admin", "doctor", "manager")
@@ -111,22 +191,9 @@ def delete_patient_route(patient_id: int):
     if not p:
         return error("Paciente no encontrado", 404)
 
-    # ---- Si NO tienes cascade, borra dependencias manualmente --------
-    # from ..models.consultation import Consultation
-    # from ..models.file import FileAsset
-    # db.session.query(Consultation).filter_by(patient_id=patient_id).delete(synchronize_session=False)
-    # db.session.query(FileAsset).filter_by(patient_id=patient_id).delete(synchronize_session=False)
-
-    # ---- Borrado duro ------------
-    db.session.delete(p)
-    db.session.commit()
+    patient_service.soft_delete_patient(p)
     return ok({"id": patient_id})
 
-    # ---- Soft delete (alternativa) ----------
-    # p.active = False
-    # db.session.commit()
-    # return ok({"id": patient_id, "active": p.active})
-
 
 # --------------------------------------------------------------------
 # Historial de paciente (datos de cabecera + consultas, marcando última)
@@ -134,14 +201,24 @@ def delete_patient_route(patient_id: int):
 @bp.get("/<int:patient_id>/history")
 @roles_required("admin", "doctor", "manager", "nurse")
 def patient_history(patient_id: int):
-    p = patient_service.get_patient(patient_id)
-    if not p:
+    from ..models.consultation import Consultation
+
+    # ETag: versión del paciente + fingerprint de sus consultas
+    version = entity_version(Patient, patient_id)
+    if version is None:
         return error("Paciente no encontrado", 404)
+    cons_count, cons_last = list_fingerprint(
+        select(Consultation).where(Consultation.patient_id == patient_id)
+    )
+    etag = make_etag("history", patient_id, version[0], cons_count, cons_last)
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
+    p = patient_service.get_patient(patient_id)
     past = p.past_history or "Sin antecedentes patológicos"
     alerg = p.allergies or "Sin alergias"
 
-    from ..models.consultation import Consultation
     cons = (
         db.session.query(Consultation)
         .filter(Consultation.patient_id == patient_id)
@@ -161,4 +238,37 @@ def patient_history(patient_id: int):
         "allergies": alerg,
         "consultations": cons_dump,
     }
-    return ok(payload)
+    return conditional(ok(payload), etag)
+
+
+# --------------------------------------------------------------------
+# Serie de signos vitales (columnar, con reducción opcional)
+#   ?metrics=bp_sys,bp_dia&from=2024-01-01&to=2025-01-01&points=300&method=lttb|minmax
+# --------------------------------------------------------------------
+@bp.get("/<int:patient_id>/vitals")
+@roles_required("admin", "doctor", "manager", "nurse")
+def patient_vitals(patient_id: int):
+    if not db.session.query(Patient.id).filter(Patient.id == patient_id).scalar():
+        return error("Paciente no encontrado", 404)
+
+    metrics = tuple(m.strip() for m in request.args.get("metrics", "").split(",") if m.strip())
+    metrics = metrics or vitals_service.VITAL_FIELDS
+    unknown = [m for m in metrics if m not in vitals_service.VITAL_FIELDS]
+    if unknown:
+        return error(f"Métricas inválidas: {', '.join(unknown)}", 400)
+
+    method = request.args.get("method", "lttb")
+    if method not in vitals_service.METHODS:
+        return error("method debe ser lttb o minmax", 400)
+
+    max_points = current_app.config.get("VITALS_MAX_POINTS", 1000)
+    points = request.args.get("points", type=int) or max_points
+    points = max(3, min(points, max_points))
+
+    try:
+        start = parse_date_or_datetime_to_utc(request.args["from"], as_start=True) if request.args.get("from") else None
+        end = parse_date_or_datetime_to_utc(request.args["to"], as_end=True) if request.args.get("to") else None
+    except (ValueError, OverflowError):
+        return error("Fechas inválidas", 400)
+
+    return ok(vitals_service.vitals_series(patient_id, metrics, start, end, points, method))
@@ -9,6 +9,11 @@ from ..schemas.prescription import (
     PrescriptionCreateSchema, PrescriptionUpdateSchema, PrescriptionPublicSchema
 )
 from ..utils.time import now_cdmx, to_utc
+from ..utils.http_cache import conditional, if_match_version, list_fingerprint, make_etag, not_modified
+from ..services.cache_service import entity_version, version_of
+from ..services.versioning_service import VersionConflict, update_loaded, update_versioned
+from ..services.audit_service import note_patient
+from ..services.idempotency_service import idempotent
 
 bp = Blueprint("prescriptions", __name__, url_prefix="/prescriptions")
 
@@ -71,6 +76,7 @@ def _create_quick_patient(data: dict) -> Patient:
 # Crear receta
 @bp.post("")
 @roles_required("admin", "doctor", "manager")
+@idempotent
 def create_prescription():
     payload = request.get_json(force=True) or {}
     data = presc_create.load(payload)
@@ -128,6 +134,7 @@ def create_prescription():
     )
     db.session.add(presc)
     db.session.commit()
+    note_patient(presc.patient_id)
     return created(presc_public.dump(presc))
 
 # Listado
@@ -142,32 +149,60 @@ def list_prescriptions():
     if patient_id:
         q = q.filter(Prescription.patient_id == patient_id)
 
-    total = q.count()
+    total, last = list_fingerprint(q)
+    etag = make_etag(request.full_path, total, last)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     items = q.limit(page_size).offset((page - 1) * page_size).all()
-    return ok({"items": presc_list.dump(items), "total": total, "page": page, "page_size": page_size})
+    return conditional(
+        ok({"items": presc_list.dump(items), "total": total, "page": page, "page_size": page_size}),
+        etag,
+    )
 
 # Detalle
 @bp.get("/<int:presc_id>")
 @roles_required("admin", "doctor", "manager", "nurse")
 def get_prescription(presc_id: int):
-    p = db.session.get(Prescription, presc_id)
-    if not p:
+    version = entity_version(Prescription, presc_id)
+    if version is None:
         return error("Receta no encontrada", 404)
-    return ok(presc_public.dump(p))
+    etag = make_etag("prescriptions", presc_id, version[0], version=version[2])
+    cached = not_modified(etag, version[1])
+    if cached:
+        return cached
+    p = db.session.get(Prescription, presc_id)
+    note_patient(p.patient_id)
+    return conditional(ok(presc_public.dump(p)), etag, version[1])
 
-# Editar
+# Editar (If-Match: ETag del detalle -> 412 si cambió)
 @bp.patch("/<int:presc_id>")
 @roles_required("admin", "doctor", "manager")
 def update_prescription(presc_id: int):
-    p = db.session.get(Prescription, presc_id)
-    if not p:
-        return error("Receta no encontrada", 404)
     data = presc_update.load(request.get_json(force=True) or {})
-    for k, v in data.items():
-        setattr(p, k, v)
-    db.session.add(p)
-    db.session.commit()
-    return ok(presc_public.dump(p))
+    expected = if_match_version()
+
+    def apply(p):
+        for k, v in data.items():
+            setattr(p, k, v)
+
+    try:
+        if "issued_at" in data:
+            # daily_stats cuenta recetas por día: que pase por after_flush
+            p = update_loaded(Prescription, presc_id, apply, expected)
+        else:
+            p = update_versioned(Prescription, presc_id, data, expected)
+    except VersionConflict as e:
+        return error("La receta cambió mientras la editabas; recarga e intenta de nuevo", 412,
+                     current_version=e.current_version)
+    if p is None:
+        return error("Receta no encontrada", 404)
+    note_patient(p.patient_id)
+
+    version = version_of(Prescription, p.updated_at, p.version_id)
+    etag = make_etag("prescriptions", presc_id, version[0], version=version[2])
+    return conditional(ok(presc_public.dump(p)), etag, version[1])
 
 # Eliminar
 @bp.delete("/<int:presc_id>")
@@ -176,6 +211,7 @@ def delete_prescription(presc_id: int):
     p = db.session.get(Prescription, presc_id)
     if not p:
         return error("Receta no encontrada", 404)
+    note_patient(p.patient_id)
     db.session.delete(p)
     db.session.commit()
     return ok({"deleted": True, "id": presc_id})
@@ -187,6 +223,7 @@ def print_prescription(presc_id: int):
     p: Prescription = db.session.get(Prescription, presc_id)
     if not p:
         return error("Receta no encontrada", 404)
+    note_patient(p.patient_id)
 
     patient = p.patient
     pro = p.professional
@@ -0,0 +1,67 @@
+from flask import Blueprint, request
+from flask_jwt_extended import get_jwt
+from ..security import roles_required
+from ..utils.responses import ok, error
+from ..services import search_service
+
+bp = Blueprint("search", __name__, url_prefix="/search")
+
+DEFAULT_PER_ENTITY = 5
+MAX_PER_ENTITY = 20
+# mismos roles que GET /users
+_USERS_ROLES = {"admin", "doctor", "manager"}
+
+def _iso(dt):
+    return dt.isoformat() if dt else None
+
+def _snippet(text: str | None, size: int = 120) -> str | None:
+    if not text:
+        return None
+    return text if len(text) <= size else text[:size].rstrip() + "…"
+
+# Payload compacto por tipo: lo justo para pintar el resultado y abrir el detalle
+_PAYLOADS = {
+    "patients": lambda p: {
+        "id": p.id, "first_name": p.first_name, "last_name": p.last_name,
+        "phone": p.phone, "email": p.email,
+    },
+    "users": lambda u: {
+        "id": u.id, "first_name": u.first_name, "last_name": u.last_name,
+        "username": u.username, "role": getattr(u.role, "value", u.role), "is_active": u.is_active,
+    },
+    "prescriptions": lambda r: {
+        "id": r.id, "patient_id": r.patient_id, "issued_at": _iso(r.issued_at),
+        "diagnosis": _snippet(r.diagnosis),
+    },
+    "consultations": lambda c: {
+        "id": c.id, "patient_id": c.patient_id, "datetime": _iso(c.datetime),
+        "title": c.title, "notes": _snippet(c.notes),
+    },
+}
+
+# Búsqueda global: ?q=ana lop &types=patients,consultations &limit=5 (por tipo)
+@bp.get("")
+@roles_required("admin", "doctor", "manager", "nurse")
+def global_search():
+    q = (request.args.get("q") or "").strip()
+    if not search_service.query_terms(q):
+        return error(f"'q' requiere al menos {search_service.MIN_PREFIX} caracteres", 400)
+
+    allowed = list(search_service.ENTITIES)
+    if (get_jwt() or {}).get("role") not in _USERS_ROLES:
+        allowed.remove("users")
+    raw_types = request.args.get("types")
+    if raw_types:
+        types = [t.strip() for t in raw_types.split(",") if t.strip()]
+        unknown = [t for t in types if t not in allowed]
+        if unknown:
+            return error(f"types inválidos: {', '.join(unknown)}", 400, allowed=allowed)
+    else:
+        types = allowed
+
+    per_entity = max(1, min(request.args.get("limit", DEFAULT_PER_ENTITY, type=int), MAX_PER_ENTITY))
+    found = search_service.search(q, types, per_entity)
+    return ok({
+        entity: [dict(_PAYLOADS[entity](obj), score=score) for obj, score in found.get(entity, [])]
+        for entity in types
+    })
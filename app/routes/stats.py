@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+from flask import Blueprint, request
+from ..security import roles_required
+from ..utils.responses import ok, error
+from ..utils.time import now_cdmx
+from ..services import stats_service
+from ..services.cache_service import entity_cache
+from ..services.coalesce_service import coalesced, flight
+
+bp = Blueprint("stats", __name__, url_prefix="/stats")
+
+# Dashboard de dirección: lee solo daily_stats (nunca las tablas completas)
+@bp.get("/dashboard")
+@roles_required("admin", "manager")
+@coalesced
+def dashboard():
+    today = now_cdmx().date()
+    try:
+        day_to = date.fromisoformat(request.args["to"]) if request.args.get("to") else today
+        day_from = (
+            date.fromisoformat(request.args["from"]) if request.args.get("from")
+            else (day_to - timedelta(days=365)).replace(day=1)
+        )
+    except ValueError:
+        return error("Fechas inválidas (usa YYYY-MM-DD)", 400)
+    if day_from > day_to:
+        return error("'from' debe ser anterior a 'to'", 400)
+
+    professional_id = request.args.get("professional_id", type=int)
+    return ok(stats_service.dashboard(day_from, day_to, professional_id))
+
+# Contadores de la caché de entidades (del worker que atiende)
+@bp.get("/cache")
+@roles_required("admin")
+def cache_stats():
+    return ok(entity_cache.stats())
+
+# Peticiones GET ejecutadas vs. compartidas (single-flight, del worker que atiende)
+@bp.get("/coalescing")
+@roles_required("admin")
+def coalescing_stats():
+    return ok(flight.stats())
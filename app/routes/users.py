@@ -2,6 +2,8 @@ from flask import Blueprint, request
 from flask_jwt_extended import jwt_required
 from ..security import roles_required
 from ..services import user_service
+from ..services.cache_service import cached_dump, entity_version
+from ..utils.http_cache import conditional, list_fingerprint, make_etag, not_modified
 from ..schemas.user import UserCreateSchema, UserPublicSchema, UserUpdateSchema
 from ..utils.responses import ok, created, error
 from ..models.user import User
@@ -31,16 +33,28 @@ def list_users():
     page = int(request.args.get("page", 1))
     page_size = int(request.args.get("page_size", 20))
     search = request.args.get("search")
-    items, total = user_service.list_users(page, page_size, search)
-    return ok({"items": user_list.dump(items), "total": total, "page": page, "page_size": page_size})
+    total, last = list_fingerprint(user_service.users_query(search))
+    etag = make_etag(request.full_path, total, last)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    items, total = user_service.list_users(page, page_size, search, total=total)
+    return conditional(
+        ok({"items": user_list.dump(items), "total": total, "page": page, "page_size": page_size}),
+        etag,
+    )
 
 @bp.get("/<int:user_id>")
 @roles_required("admin", "doctor", "manager")
 def get_user(user_id: int):
-    u = user_service.get_user(user_id)
-    if not u:
+    version = entity_version(User, user_id)
+    if version is None:
         return error("Usuario no encontrado", 404)
-    return ok(user_public.dump(u))
+    etag = make_etag("users", user_id, version[0])
+    cached = not_modified(etag, version[1])
+    if cached:
+        return cached
+    return conditional(ok(cached_dump(User, user_id, user_public, version[0])), etag, version[1])
 
 @bp.patch("/<int:user_id>")
 @roles_required("admin")
@@ -0,0 +1,37 @@
+from flask import Blueprint, current_app, request
+from ..security import roles_required
+from ..utils.responses import ok, error
+from ..utils.validators import cache_stats, normalize_email, normalize_phone
+
+bp = Blueprint("validation", __name__, url_prefix="/validation")
+
+# Validación en lote para formularios e importaciones:
+#   {"phones": [...], "emails": [...], "region": "MX"}
+@bp.post("/contacts")
+@roles_required("admin", "doctor", "manager", "nurse")
+def validate_contacts():
+    payload = request.get_json(force=True) or {}
+    phones = payload.get("phones") or []
+    emails = payload.get("emails") or []
+    region = str(payload.get("region") or "MX")
+    if not isinstance(phones, list) or not isinstance(emails, list):
+        return error("phones y emails deben ser listas", 400)
+    limit = current_app.config.get("VALIDATION_BATCH_MAX", 1000)
+    if len(phones) + len(emails) > limit:
+        return error(f"Máximo {limit} valores por petición", 413)
+
+    out_phones = []
+    for value in phones:
+        e164 = normalize_phone(str(value), region) if value else None
+        out_phones.append({"input": value, "valid": e164 is not None, "e164": e164})
+    out_emails = []
+    for value in emails:
+        canonical = normalize_email(str(value)) if value else None
+        out_emails.append({"input": value, "valid": canonical is not None, "normalized": canonical})
+    return ok({"phones": out_phones, "emails": out_emails})
+
+# Métricas de la caché de validación (por worker)
+@bp.get("/stats")
+@roles_required("admin")
+def validation_stats():
+    return ok(cache_stats())
@@ -32,6 +32,16 @@ class FileCreateSchema(Schema):
         if not mime:
             raise ValidationError("Extensión no soportada. Usa PDF o imagen (.webp/.jpg/.png)")
 
+class FileUploadSchema(Schema):
+    """Campos de formulario que acompañan a una subida multipart (campo 'file')."""
+    kind = fields.Str(required=True, validate=validate.OneOf([k.value for k in FileKind]))
+    title = fields.Str(allow_none=True, validate=validate.Length(max=255))
+    note = fields.Str(allow_none=True, validate=validate.Length(max=1000))
+
+    # Solo para fotos
+    photo_phase = fields.Str(allow_none=True, validate=validate.OneOf([p.value for p in PhotoPhase]))
+    photo_order = fields.Int(allow_none=True)
+
 class FilePublicSchema(Schema):
     id = fields.Int(dump_only=True)
     patient_id = fields.Int()
@@ -43,4 +53,11 @@ class FilePublicSchema(Schema):
     title = fields.Str(allow_none=True)
     note = fields.Str(allow_none=True)
     size_bytes = fields.Int(allow_none=True)
+    content_sha256 = fields.Str(allow_none=True)
+    # thumb/medium/full en WebP (solo fotos subidas, cuando ya se generaron)
+    derivatives = fields.Method("get_derivatives", dump_only=True)
     created_at = fields.DateTime()
+
+    def get_derivatives(self, obj):
+        from ..services.image_service import derivative_urls
+        return derivative_urls(obj)
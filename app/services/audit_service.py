@@ -0,0 +1,175 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from flask import g, request
+from flask_jwt_extended import get_jwt
+from sqlalchemy import insert
+from ..extensions import db
+from ..models.audit_log import AuditLog
+
+log = logging.getLogger("app.audit")
+
+# Blueprints con datos de pacientes
+AUDITED_BLUEPRINTS = {"patients", "appointments", "consultations", "prescriptions", "files", "media", "changes", "search"}
+_ACTIONS = {"GET": "read", "HEAD": "read", "POST": "create", "PUT": "update", "PATCH": "update", "DELETE": "delete"}
+
+
+class AuditWriter:
+    """
+    Cola en memoria + hilo que inserta en lotes (INSERT multi-fila).
+    - Cola acotada: si la BD no da abasto, esperamos poco y luego se descarta
+      (contado en `dropped` y en el log de errores) en vez de frenar peticiones.
+    - El hilo no sobrevive a un fork: se relanza por PID.
+    - Al salir el worker (atexit) se vacía lo pendiente.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue: queue.Queue | None = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.failed_batches = 0
+
+    def configure(self, app):
+        self.batch_size = app.config.get("AUDIT_BATCH_SIZE", 500)
+        self.flush_interval = app.config.get("AUDIT_FLUSH_INTERVAL", 1.0)
+        self.buffer_size = app.config.get("AUDIT_BUFFER_SIZE", 20000)
+        self.enqueue_timeout = app.config.get("AUDIT_ENQUEUE_TIMEOUT", 0.05)
+
+    def ensure_started(self, app):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.buffer_size)
+            self._stop = threading.Event()
+            with app.app_context():
+                engine = db.engine
+            self._thread = threading.Thread(target=self._run, args=(engine,), name="audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def submit(self, row: dict):
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.dropped += 1
+            log.error("audit: buffer lleno, evento descartado (%s %s)", row["method"], row["path"])
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _drain(self, limit: int) -> list[dict]:
+        rows = []
+        while len(rows) < limit:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, engine, rows: list[dict]) -> bool:
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(AuditLog.__table__), rows)
+            self.written += len(rows)
+            return True
+        except Exception:
+            self.failed_batches += 1
+            log.exception("audit: no se pudo escribir un lote de %d eventos", len(rows))
+            return False
+
+    def _run(self, engine):
+        retry: list[dict] = []
+        while not self._stop.is_set():
+            deadline = time.monotonic() + self.flush_interval
+            while self._queue.qsize() < self.batch_size and time.monotonic() < deadline:
+                if self._stop.wait(0.05):
+                    break
+            rows = retry + self._drain(self.batch_size - len(retry))
+            if rows:
+                # si la BD falla, reintenta en la siguiente vuelta (sin crecer sin límite)
+                retry = [] if self._write(engine, rows) else rows[: self.buffer_size]
+        # apagado: lo que quede
+        rows = retry + self._drain(self.buffer_size)
+        for i in range(0, len(rows), self.batch_size):
+            self._write(engine, rows[i:i + self.batch_size])
+
+    def stop(self):
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+        self._pid = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_batches": self.failed_batches,
+        }
+
+
+writer = AuditWriter()
+
+
+def note_patient(patient_id: int | None):
+    """Para rutas cuyo URL no trae patient_id (citas, consultas, recetas)."""
+    g.audit_patient_id = patient_id
+
+
+def _current_user() -> tuple[int | None, str | None]:
+    try:
+        claims = get_jwt() or {}
+    except RuntimeError:
+        return None, None  # la petición no pasó por verify_jwt_in_request
+    uid = claims.get("uid")
+    return (int(uid) if uid is not None else None), claims.get("role")
+
+
+def init_audit(app):
+    """Un evento por petición autenticada a blueprints con datos de pacientes."""
+    writer.configure(app)
+
+    @app.after_request
+    def _audit_request(resp):
+        entity = (request.blueprint or "").rsplit(".", 1)[-1]
+        if entity not in AUDITED_BLUEPRINTS or request.method not in _ACTIONS:
+            return resp
+        user_id, role = _current_user()
+        if user_id is None:
+            return resp
+
+        args = request.view_args or {}
+        patient_id = args.get("patient_id") or g.get("audit_patient_id")
+        entity_id = next((v for k, v in args.items() if k != "patient_id" and isinstance(v, int)), None)
+        if entity == "patients":
+            entity_id = args.get("patient_id")
+
+        writer.ensure_started(app)
+        writer.submit({
+            "occurred_at": datetime.now(timezone.utc),
+            "user_id": user_id,
+            "user_role": role,
+            "action": _ACTIONS[request.method],
+            "entity": entity,
+            "entity_id": entity_id,
+            "patient_id": patient_id,
+            "method": request.method,
+            "path": request.full_path.rstrip("?")[:500],
+            "status": resp.status_code,
+            "request_id": g.get("request_id"),
+            "ip": request.remote_addr,
+        })
+        return resp
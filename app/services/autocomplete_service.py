@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from sqlalchemy import select
+from ..extensions import db
+from ..models.patient import Patient
+from ..utils.text import words
+from .change_service import changes_since, head
+
+log = logging.getLogger("app.autocomplete")
+
+# ---------------------------------------------------------------------------
+# Autocompletado de pacientes (selectores de citas/recetas): un arreglo
+# ordenado de llaves normalizadas por worker, consultado con bisect.
+# Una llave por palabra inicial ("ana maria lopez", "maria lopez ana", ...):
+# el bisect va por la palabra buscada más larga y el resto se filtra contra las
+# palabras del nombre ("ana lop" encuentra a "Ana María López"). Se mantiene siguiendo change_log
+# (altas/cambios/bajas de cualquier worker) con un hilo por proceso.
+# ---------------------------------------------------------------------------
+_cols = (Patient.id, Patient.first_name, Patient.last_name)
+_SYNC_BATCH = 1000
+
+def _words(first_name: str | None, last_name: str | None) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(words(first_name) + words(last_name)))
+
+def _keys(parts: tuple[str, ...]) -> list[str]:
+    return [" ".join(parts[i:] + parts[:i]) for i in range(len(parts))]
+
+class PatientIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._keys: list[str] = []
+        self._ids = array("l")
+        self._names: dict[int, tuple[str, str]] = {}
+        self._words: dict[int, tuple[str, ...]] = {}
+        self.last_seq = 0
+        self.applied = 0
+
+    def configure(self, app):
+        self.sync_interval = app.config.get("AUTOCOMPLETE_SYNC_INTERVAL", 1.0)
+        self.wait = app.config.get("AUTOCOMPLETE_WAIT_SECONDS", 5.0)
+        self.max_scan = app.config.get("AUTOCOMPLETE_MAX_SCAN", 2000)
+
+    # -- mantenimiento (solo el hilo del índice escribe) ---------------------
+    # Nunca se modifica el arreglo en sitio: por sync se arma uno nuevo con
+    # rebanadas (copias en C, una pasada) y se cambia la referencia bajo el lock.
+    def _apply(self, ids: set[int], live: dict) -> None:
+        """Reemplaza las llaves de `ids`; los que no están en `live` se dan de baja."""
+        keys, pids = self._keys, self._ids
+        drop = []
+        for pid in ids:
+            for key in _keys(self._words.get(pid, ())):
+                i = bisect_left(keys, key)
+                while i < len(keys) and keys[i] == key and pids[i] != pid:
+                    i += 1
+                if i < len(keys) and keys[i] == key:
+                    drop.append(i)
+        kept_keys, kept_ids, prev = [], array("l"), 0
+        for i in sorted(drop):
+            kept_keys += keys[prev:i]
+            kept_ids += pids[prev:i]
+            prev = i + 1
+        kept_keys += keys[prev:]
+        kept_ids += pids[prev:]
+
+        words_by_id = {pid: _words(r.first_name, r.last_name) for pid, r in live.items()}
+        new_keys, new_ids, prev = [], array("l"), 0
+        for key, pid in sorted((k, pid) for pid, p in words_by_id.items() for k in _keys(p)):
+            i = bisect_left(kept_keys, key, prev)
+            new_keys += kept_keys[prev:i]
+            new_ids += kept_ids[prev:i]
+            new_keys.append(key)
+            new_ids.append(pid)
+            prev = i
+        new_keys += kept_keys[prev:]
+        new_ids += kept_ids[prev:]
+
+        names, parts = dict(self._names), dict(self._words)
+        for pid in ids:
+            names.pop(pid, None)
+            parts.pop(pid, None)
+        names.update((pid, (r.first_name, r.last_name)) for pid, r in live.items())
+        parts.update(words_by_id)
+        with self._lock:
+            self._keys, self._ids = new_keys, new_ids
+            self._names, self._words = names, parts
+
+    def _load(self, conn) -> None:
+        self.last_seq = head(conn)  # antes de leer: lo posterior llega por change_log
+        rows = conn.execute(select(*_cols).where(Patient.deleted_at.is_(None))).all()
+        parts = {r.id: _words(r.first_name, r.last_name) for r in rows}
+        entries = sorted((key, pid) for pid, p in parts.items() for key in _keys(p))
+        with self._lock:
+            self._keys = [k for k, _ in entries]
+            self._ids = array("l", (i for _, i in entries))
+            self._names = {r.id: (r.first_name, r.last_name) for r in rows}
+            self._words = parts
+        self._ready.set()
+
+    def _sync(self, conn) -> None:
+        # head antes de leer (como change_service.delta): si no hay cambios de
+        # pacientes, el cursor igual avanza y no se re-escanean citas/recetas
+        last = head(conn)
+        changes = changes_since(self.last_seq, _SYNC_BATCH, conn, entities=[Patient.__tablename__])
+        if not changes:
+            self.last_seq = max(self.last_seq, last)
+            return
+        ids = {c.entity_id for c in changes}
+        live = {
+            r.id: r for r in conn.execute(
+                select(*_cols).where(Patient.id.in_(ids), Patient.deleted_at.is_(None))
+            )
+        }
+        self._apply(ids, live)
+        # lote incompleto = no quedan cambios de pacientes hasta `last`
+        self.last_seq = changes[-1].seq if len(changes) == _SYNC_BATCH else max(changes[-1].seq, last)
+        self.applied += len(ids)
+
+    def _run(self, engine):
+        while not self._ready.is_set() and not self._stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    self._load(conn)
+            except Exception:
+                log.exception("autocomplete: no se pudo construir el índice")
+                self._stop.wait(self.sync_interval)
+        while not self._stop.wait(self.sync_interval):
+            try:
+                with engine.connect() as conn:
+                    self._sync(conn)
+            except Exception:
+                log.exception("autocomplete: no se pudo leer change_log")
+
+    def ensure_started(self, app):
+        """Construye el índice en segundo plano (una vez por worker) y lo mantiene."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._ready = threading.Event()
+            self._stop = threading.Event()
+            with app.app_context():
+                engine = db.engine
+            threading.Thread(target=self._run, args=(engine,), name="patient-autocomplete", daemon=True).start()
+
+    # -- consulta -----------------------------------------------------------
+    def ready(self, timeout: float | None = None) -> bool:
+        return self._ready.wait(self.wait if timeout is None else timeout)
+
+    def lookup(self, q: str, limit: int) -> list[tuple[int, str, str]]:
+        """
+        [(id, first_name, last_name)] donde cada palabra de q es prefijo de
+        alguna palabra del nombre, en cualquier orden. El bisect va por la
+        palabra más larga (la más selectiva) y se revisan a lo más max_scan llaves.
+        """
+        terms = list(dict.fromkeys(words(q)))
+        if not terms:
+            return []
+        pivot = max(terms, key=len)
+        rest = [t for t in terms if t != pivot]
+        with self._lock:
+            keys, ids, names, parts = self._keys, self._ids, self._names, self._words
+        out, seen = [], set()
+        i = bisect_left(keys, pivot)
+        stop = min(len(keys), i + self.max_scan)
+        while i < stop and len(out) < limit and keys[i].startswith(pivot):
+            pid = ids[i]
+            if pid not in seen:
+                seen.add(pid)
+                if all(any(w.startswith(t) for w in parts[pid]) for t in rest):
+                    out.append((pid, *names[pid]))
+            i += 1
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "ready": self._ready.is_set(),
+            "patients": len(self._names),
+            "keys": len(self._keys),
+            "last_seq": self.last_seq,
+            "applied": self.applied,
+        }
+
+patient_index = PatientIndex()
+
+def init_autocomplete(app):
+    patient_index.configure(app)
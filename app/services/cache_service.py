@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event, select
+from ..extensions import db
+from ..models.appointment import Appointment
+from ..models.patient import Patient
+from ..models.user import User
+from ..utils.time import UTC_TZ, now_cdmx
+
+# ---------------------------------------------------------------------------
+# Caché read-through de entidades serializadas (dump de marshmallow).
+# Clave: (tipo, id); cada entrada guarda la versión con la que se generó
+# (version_id + updated_at, + día local si el dump trae la edad calculada).
+# Una lectura compara la versión actual (SELECT updated_at por PK) contra la
+# guardada: así otros workers nunca sirven datos viejos aunque no reciban los
+# eventos de invalidación de este proceso.
+# ---------------------------------------------------------------------------
+
+class LRUTier:
+    """En memoria, por proceso."""
+
+    name = "lru"
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._data)
+
+class DiskTier:
+    """
+    Compartido entre workers del mismo host: un JSON por entidad.
+    Apuntar ENTITY_CACHE_DIR a /dev/shm lo deja en memoria compartida.
+    Contiene PHI: directorio 0700 y nada de rutas en volúmenes compartidos.
+    """
+
+    name = "shared"
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, mode=0o700, exist_ok=True)
+
+    def _path(self, key) -> str:
+        kind, entity_id = key
+        return os.path.join(self.root, kind, f"{entity_id}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+            return raw["v"], raw["d"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key, entry):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"v": entry[0], "d": entry[1]}, fh, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+class EntityCache:
+    def __init__(self):
+        self.tiers: list = []
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = 0
+        self.invalidations = 0
+
+    def configure(self, tiers: list):
+        self.tiers = tiers
+        self.hits = {t.name: 0 for t in tiers}
+
+    def get_or_load(self, key, version: str, loader):
+        """Devuelve el dump cacheado para `version` o llama a loader() y lo guarda."""
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None and entry[0] == version:
+                with self._lock:
+                    self.hits[tier.name] += 1
+                for upper in self.tiers[:i]:
+                    upper.set(key, entry)  # promueve al tier más rápido
+                return entry[1]
+
+        with self._lock:
+            self.misses += 1
+        data = loader()
+        if data is not None:
+            for tier in self.tiers:
+                tier.set(key, (version, data))
+        return data
+
+    def invalidate(self, key):
+        with self._lock:
+            self.invalidations += 1
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def stats(self) -> dict:
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        out = {
+            "tiers": [t.name for t in self.tiers],
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+        }
+        for t in self.tiers:
+            if isinstance(t, LRUTier):
+                out["lru_size"], out["lru_maxsize"], out["evictions"] = t.size(), t.maxsize, t.evictions
+        return out
+
+entity_cache = EntityCache()
+
+CACHED_MODELS = (Patient, User, Appointment)
+# Dumps que dependen de la fecha actual (User.age se calcula al vuelo)
+_DAY_SENSITIVE = (User,)
+
+def version_of(model, updated_at: datetime, version_id: int | None = None) -> tuple[str, datetime, int | None]:
+    """(versión, last_modified, version_id) a partir de columnas ya leídas."""
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=UTC_TZ)  # SQLite: naive en UTC
+    # version_id distingue dos ediciones dentro del mismo segundo de updated_at
+    version = updated_at.isoformat() if version_id is None else f"{version_id}|{updated_at.isoformat()}"
+    if model not in _DAY_SENSITIVE:
+        return version, updated_at, version_id
+    today = now_cdmx().replace(hour=0, minute=0, second=0, microsecond=0)
+    return f"{version}|{today.date().isoformat()}", max(updated_at, today), version_id
+
+def entity_version(model, entity_id: int) -> tuple[str, datetime, int | None] | None:
+    """
+    (versión, last_modified, version_id) de una entidad leyendo solo
+    updated_at (+ version_id si el modelo lo tiene) por PK. None si no existe.
+    Sirve como clave de caché y como ETag/Last-Modified.
+    """
+    versioned = hasattr(model, "version_id")
+    cols = (model.updated_at, model.version_id) if versioned else (model.updated_at,)
+    row = db.session.execute(select(*cols).where(model.id == entity_id)).first()
+    if row is None:
+        return None
+    return version_of(model, *row)
+
+def cached_dump(model, entity_id: int, schema, version: str | None = None) -> dict | None:
+    """
+    Dump de `model` con id `entity_id` pasando por la caché.
+    None si no existe (sin cargar el ORM: solo se lee updated_at).
+    `version` evita releer updated_at si la ruta ya la tiene (ver entity_version).
+    """
+    if version is None:
+        current = entity_version(model, entity_id)
+        if current is None:
+            return None
+        version = current[0]
+    def load():
+        obj = db.session.get(model, entity_id)
+        return schema.dump(obj) if obj is not None else None
+
+    if not entity_cache.tiers:
+        return load()
+    return entity_cache.get_or_load((model.__tablename__, entity_id), version, load)
+
+def _invalidate(mapper, connection, target):
+    entity_cache.invalidate((mapper.local_table.name, target.id))
+
+def init_entity_cache(app):
+    """Tiers según config (ENTITY_CACHE_SIZE, ENTITY_CACHE_DIR) + invalidación por eventos."""
+    tiers = []
+    size = app.config.get("ENTITY_CACHE_SIZE", 2048)
+    if size > 0:
+        tiers.append(LRUTier(size))
+    cache_dir = app.config.get("ENTITY_CACHE_DIR")
+    if cache_dir:
+        tiers.append(DiskTier(cache_dir))
+    entity_cache.configure(tiers)
+
+    for model in CACHED_MODELS:
+        for name in ("after_update", "after_delete"):
+            if not event.contains(model, name, _invalidate):
+                event.listen(model, name, _invalidate)
@@ -0,0 +1,221 @@
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..db_routing import RoutingSession
+from ..extensions import db
+from ..models.appointment import Appointment
+from ..models.change_log import ChangeLog, ChangeSeq
+from ..models.consultation import Consultation
+from ..models.file_asset import FileAsset
+from ..models.patient import Patient
+from ..models.prescription import Prescription
+from ..utils.time import UTC_TZ
+
+# ---------------------------------------------------------------------------
+# change_log: una fila por alta/cambio/baja, escrita en el mismo flush que el
+# cambio. Lo leen el stream SSE del calendario y el feed /changes (sync de
+# la app de tablet), ambos avanzando con "seq > cursor".
+# ---------------------------------------------------------------------------
+INSERT, UPDATE, DELETE = "insert", "update", "delete"
+
+TRACKED = (Patient, Appointment, Consultation, Prescription, FileAsset)
+ENTITIES = {m.__tablename__: m for m in TRACKED}
+
+_log = ChangeLog.__table__
+_seq = ChangeSeq.__table__
+_SEQ_ID = 1
+
+def _utc(dt: datetime | None) -> datetime | None:
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=UTC_TZ) if dt.tzinfo is None else dt.astimezone(UTC_TZ)
+
+def _row(model, op: str, get, prev=None) -> dict:
+    """Fila de change_log. `get(attr)` da el valor actual; `prev(attr)` el anterior (cambios)."""
+    row = {
+        "entity": model.__tablename__,
+        "entity_id": get("id"),
+        "op": op,
+        "patient_id": get("id") if model is Patient else get("patient_id"),
+        "professional_id": None,
+        "prev_professional_id": None,
+        "range_start": None,
+        "range_end": None,
+    }
+    if model is Appointment:
+        starts = [_utc(get("start_at"))]
+        ends = [_utc(get("end_at"))]
+        if prev is not None:
+            starts.append(_utc(prev("start_at")))
+            ends.append(_utc(prev("end_at")))
+            if prev("professional_id") != get("professional_id"):
+                row["prev_professional_id"] = prev("professional_id")
+        row["professional_id"] = get("professional_id")
+        row["range_start"] = min((s for s in starts if s), default=None)
+        row["range_end"] = max((e for e in ends if e), default=None)
+    return row
+
+def _next_seqs(conn, n: int) -> range:
+    """
+    Reserva n números. El UPDATE bloquea la fila del contador hasta el commit:
+    dos transacciones nunca publican números fuera de orden.
+    """
+    stmt = update(_seq).where(_seq.c.id == _SEQ_ID).values(value=_seq.c.value + n).returning(_seq.c.value)
+    last = conn.execute(stmt).scalar()
+    if last is None:
+        # BD creada con create_all (dev): sembrar el contador
+        ins = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+        conn.execute(ins(_seq).values(id=_SEQ_ID, value=0).on_conflict_do_nothing(index_elements=["id"]))
+        last = conn.execute(stmt).scalar()
+    return range(last - n + 1, last + 1)
+
+def _append(conn, rows: list[dict]) -> None:
+    if not rows:
+        return
+    now = datetime.now(timezone.utc)
+    for seq, row in zip(_next_seqs(conn, len(rows)), rows):
+        row["seq"] = seq
+        row["occurred_at"] = now
+    conn.execute(insert(_log), rows)
+
+# ---------------------------------------------------------------------------
+# Captura en cada flush del ORM
+# ---------------------------------------------------------------------------
+def _current(obj):
+    return lambda attr: getattr(obj, attr)
+
+def _previous(obj):
+    state = inspect(obj)
+
+    def get(attr):
+        hist = state.attrs[attr].history
+        if hist.deleted:
+            return hist.deleted[0]
+        return hist.unchanged[0] if hist.unchanged else getattr(obj, attr)
+    return get
+
+def _collect(session) -> list[dict]:
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, TRACKED):
+            rows.append(_row(type(obj), INSERT, _current(obj)))
+    for obj in session.deleted:
+        if isinstance(obj, TRACKED):
+            rows.append(_row(type(obj), DELETE, _previous(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, TRACKED) and session.is_modified(obj, include_collections=False):
+            # borrado lógico (deleted_at) = baja para los consumidores
+            op = DELETE if getattr(obj, "deleted_at", None) is not None else UPDATE
+            rows.append(_row(type(obj), op, _current(obj), _previous(obj)))
+    return rows
+
+def _after_flush(session, flush_context):
+    rows = _collect(session)
+    if rows:
+        _append(session.connection(), rows)
+
+def record(model, op: str, rows) -> None:
+    """
+    Para escrituras masivas que no pasan por after_flush (UPDATE/INSERT del
+    Core o del ORM en bloque). `rows`: dicts/Row mappings u objetos del modelo.
+    """
+    out = []
+    for r in rows:
+        get = r.get if hasattr(r, "get") else _current(r)
+        out.append(_row(model, op, get))
+    _append(db.session.connection(), out)
+
+def init_changes(app):
+    """Escribe change_log en cada flush de db.session."""
+    if not event.contains(RoutingSession, "after_flush", _after_flush):
+        event.listen(RoutingSession, "after_flush", _after_flush)
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+def head(conn=None) -> int:
+    """
+    Último seq publicado (0 si no hay). Se lee del contador, no de max(seq):
+    tras podar todo change_log el máximo sería 0 y el cursor nacería expirado.
+    """
+    stmt = select(_seq.c.value).where(_seq.c.id == _SEQ_ID)
+    return (conn or db.session).execute(stmt).scalar() or 0
+
+def changes_since(cursor: int, limit: int, conn=None, entities=None) -> list:
+    """Filas con seq > cursor en orden (rango por PK)."""
+    stmt = select(_log).where(_log.c.seq > cursor).order_by(_log.c.seq).limit(limit)
+    if entities:
+        stmt = stmt.where(_log.c.entity.in_(entities))
+    return (conn or db.session).execute(stmt).all()
+
+def cursor_expired(cursor: int) -> bool:
+    """
+    True si ya se podaron cambios posteriores al cursor: el cliente debe
+    descargar todo de nuevo. Solo lee extremos por PK. Un cursor mayor que el
+    último seq no expira: la réplica que atiende puede ir atrasada respecto a
+    la que lo emitió; delta() lo devuelve tal cual hasta que lo alcance.
+    """
+    oldest = db.session.scalar(select(func.min(_log.c.seq)))
+    last = db.session.scalar(select(_seq.c.value).where(_seq.c.id == _SEQ_ID)) or 0
+    if cursor >= last:
+        return False
+    return cursor < (oldest - 1 if oldest is not None else last)
+
+def delta(cursor: int, limit: int, entities=None):
+    """
+    Página del feed: cambios con seq > cursor, uno por entidad (el último) con
+    su estado actual cargado en un SELECT por tabla. obj None = baja (borrada o
+    dada de baja lógica). Devuelve (items, next_cursor, has_more).
+    """
+    # head antes de leer: todo seq <= head ya está confirmado (orden de commit),
+    # así un feed filtrado por entidad avanza aunque no traiga filas
+    last = head()
+    rows = changes_since(cursor, limit, entities=entities)
+    if not rows:
+        return [], max(cursor, last), False
+
+    last_seq: dict[tuple[str, int], int] = {}
+    for r in rows:
+        last_seq[(r.entity, r.entity_id)] = r.seq
+
+    ids: dict[str, list[int]] = {}
+    for entity, entity_id in last_seq:
+        ids.setdefault(entity, []).append(entity_id)
+    current: dict[tuple[str, int], object] = {}
+    for entity, entity_ids in ids.items():
+        model = ENTITIES.get(entity)
+        if model is None:
+            continue
+        for obj in db.session.execute(select(model).where(model.id.in_(entity_ids))).scalars():
+            current[(entity, obj.id)] = obj
+
+    items = sorted(
+        ({"seq": seq, "entity": key[0], "id": key[1], "obj": current.get(key)} for key, seq in last_seq.items()),
+        key=lambda i: i["seq"],
+    )
+    has_more = len(rows) == limit
+    return items, rows[-1].seq if has_more else max(rows[-1].seq, last), has_more
+
+# ---------------------------------------------------------------------------
+# Retención (`flask changes-prune`)
+# ---------------------------------------------------------------------------
+def prune(older_than_days: int, batch_size: int = 5000, pause: float = 0.0) -> int:
+    """Borra por lotes (rango de seq) los cambios más viejos que N días."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    upto = db.session.scalar(select(func.max(_log.c.seq)).where(_log.c.occurred_at < cutoff))
+    db.session.rollback()
+    if upto is None:
+        return 0
+    deleted = 0
+    while True:
+        lo = db.session.scalar(select(func.min(_log.c.seq)))
+        if lo is None or lo > upto:
+            break
+        hi = min(upto, lo + batch_size - 1)
+        deleted += db.session.execute(delete(_log).where(_log.c.seq <= hi)).rowcount or 0
+        db.session.commit()
+        if hi < upto and pause:
+            time.sleep(pause)
+    return deleted
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, current_app, make_response, request
+from flask_jwt_extended import get_jwt
+
+# ---------------------------------------------------------------------------
+# Single-flight para GET muy concurrentes (ej. calendario del día a las 8:00).
+# Peticiones idénticas en vuelo dentro del mismo worker esperan a una sola
+# ejecución (consulta + serialización) y comparten su respuesta; además se
+# guarda unos instantes (micro-TTL) para las que llegan justo después.
+# Clave: endpoint + args normalizados + rol + validadores condicionales.
+# Solo para endpoints cuya respuesta depende del rol, no del usuario.
+# ---------------------------------------------------------------------------
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+class _Call:
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[tuple, _Call] = {}
+        self._recent: OrderedDict = OrderedDict()  # key -> (expira, snapshot)
+        self.executed = 0
+        self.coalesced = 0
+        self.recent_hits = 0
+        self.fallbacks = 0
+
+    def configure(self, app):
+        self.ttl = app.config.get("COALESCE_TTL_SECONDS", 0.5)
+        self.max_entries = app.config.get("COALESCE_MAX_ENTRIES", 256)
+        self.wait = app.config.get("COALESCE_WAIT_SECONDS", 30.0)
+
+    def do(self, key: tuple, fn):
+        """Snapshot (body, status, headers) de fn(), compartido entre llamadas iguales."""
+        with self._lock:
+            hit = self._recent.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                self.recent_hits += 1
+                return hit[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait(self.wait)
+            if call.result is not None:
+                return call.result
+            # la original falló o tardó demasiado: ejecutar por cuenta propia
+            with self._lock:
+                self.fallbacks += 1
+            return fn()
+
+        try:
+            call.result = fn()
+            return call.result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                if call.result is not None and call.result[1] < 500 and self.ttl > 0:
+                    self._recent[key] = (time.monotonic() + self.ttl, call.result)
+                    self._recent.move_to_end(key)
+                    while len(self._recent) > self.max_entries:
+                        self._recent.popitem(last=False)
+            call.event.set()
+
+    def clear_recent(self):
+        with self._lock:
+            self._recent.clear()
+
+    def stats(self) -> dict:
+        served = self.executed + self.coalesced + self.recent_hits
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "recent_hits": self.recent_hits,
+            "fallbacks": self.fallbacks,
+            "in_flight": len(self._calls),
+            "saved_rate": round((self.coalesced + self.recent_hits) / served, 4) if served else None,
+        }
+
+flight = SingleFlight()
+
+def _key() -> tuple:
+    args = tuple(sorted((k, v.strip()) for k, v in request.args.items(multi=True)))
+    role = (get_jwt() or {}).get("role")
+    return (
+        request.endpoint, args, role,
+        request.headers.get("If-None-Match"), request.headers.get("If-Modified-Since"),
+    )
+
+def _snapshot(rv) -> tuple:
+    resp = make_response(rv)
+    return resp.get_data(), resp.status_code, list(resp.headers.items())
+
+def coalesced(fn):
+    """GET con single-flight + micro-TTL. Va debajo de @roles_required."""
+    @wraps(fn)
+    def decorated(*args, **kwargs):
+        if not current_app.config.get("COALESCE_ENABLED", True):
+            return fn(*args, **kwargs)
+        body, status, headers = flight.do(_key(), lambda: _snapshot(fn(*args, **kwargs)))
+        return Response(body, status=status, headers=headers)
+
+    return decorated
+
+def init_coalescing(app):
+    """Una escritura exitosa en este worker descarta las respuestas recientes."""
+    flight.configure(app)
+
+    @app.after_request
+    def _drop_recent_on_write(resp):
+        if request.method in _WRITE_METHODS and resp.status_code < 400:
+            flight.clear_recent()
+        return resp
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+
+from alembic.script import ScriptDirectory
+from flask import g, request
+from sqlalchemy import text
+
+from ..extensions import db
+
+_EXEMPT_PATH_SUFFIXES = ("/health/live", "/health/ready")
+
+
+class HealthChecker:
+    """
+    Hilo de fondo (uno por worker) que mide la BD cada HEALTH_CHECK_INTERVAL
+    segundos y deja el resultado en memoria. Los probes solo leen ese cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._inflight: dict[object, float] = {}  # token -> inicio (monotonic)
+        self.snapshot: dict = {"checked_at": None}
+
+    # --- carga del worker -------------------------------------------------
+    def request_started(self) -> object:
+        token = object()
+        with self._lock:
+            self._inflight[token] = time.monotonic()
+        return token
+
+    def request_finished(self, token):
+        with self._lock:
+            self._inflight.pop(token, None)
+
+    def stuck_requests(self, older_than: float) -> int:
+        """Peticiones en vuelo que llevan más de `older_than` segundos."""
+        limit = time.monotonic() - older_than
+        with self._lock:
+            return sum(1 for started in self._inflight.values() if started < limit)
+
+    # --- hilo de fondo ----------------------------------------------------
+    def ensure_started(self, app):
+        # Tras un fork (preload_app) el hilo del master no existe: se relanza
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            with app.app_context():
+                engine = db.engine
+            heads = _script_heads(app)
+            t = threading.Thread(
+                target=self._run, args=(app, engine, heads), name="health-checker", daemon=True
+            )
+            t.start()
+
+    def _run(self, app, engine, heads):
+        interval = app.config.get("HEALTH_CHECK_INTERVAL", 5.0)
+        while True:
+            self.snapshot = _check(engine, heads)
+            time.sleep(interval)
+
+
+def _script_heads(app) -> set[str]:
+    path = os.path.join(os.path.dirname(app.root_path), "migrations")
+    try:
+        return set(ScriptDirectory(path).get_heads())
+    except Exception:
+        return set()
+
+
+def _check(engine, heads: set[str]) -> dict:
+    result = {
+        "checked_at": time.time(),
+        "db_ok": False,
+        "db_latency_ms": None,
+        "pool_saturation": None,
+        "migration_heads": sorted(heads),
+        "migration_current": None,
+        "migrations_ok": False,
+    }
+    t0 = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            result["db_latency_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+            result["db_ok"] = True
+            try:
+                rows = conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()
+                result["migration_current"] = sorted(rows)
+                result["migrations_ok"] = set(rows) == heads
+            except Exception:
+                pass  # sin tabla alembic_version: BD sin migrar
+    except Exception:
+        pass
+
+    pool = engine.pool
+    try:
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        result["pool_saturation"] = round(pool.checkedout() / capacity, 2) if capacity else None
+    except AttributeError:
+        pass  # pools sin tamaño (NullPool/StaticPool)
+    return result
+
+
+checker = HealthChecker()
+
+
+def readiness(config) -> tuple[bool, dict]:
+    """Evalúa el snapshot cacheado + la carga actual del worker."""
+    snap = dict(checker.snapshot)
+    reasons = []
+
+    age = time.time() - snap["checked_at"] if snap.get("checked_at") else None
+    if age is None or age > config.get("HEALTH_MAX_STALENESS", 30.0):
+        reasons.append("stale_check")
+    if not snap.get("db_ok"):
+        reasons.append("db_down")
+    elif snap["db_latency_ms"] > config.get("HEALTH_DB_LATENCY_MAX_MS", 500.0):
+        reasons.append("db_slow")
+    if config.get("HEALTH_REQUIRE_MIGRATIONS", True) and not snap.get("migrations_ok"):
+        reasons.append("migrations_pending")
+
+    # Señal de sobrecarga: HEALTH_OVERLOAD_BUSY_THREADS hilos del worker (por
+    # defecto todos) llevan rato atorados, o el pool de conexiones está casi
+    # lleno. Una sola exportación lenta no debe sacar al worker de rotación.
+    threads = config.get("HEALTH_WORKER_THREADS", 2)
+    busy = checker.stuck_requests(config.get("HEALTH_OVERLOAD_AFTER_SECONDS", 10.0))
+    if busy >= (config.get("HEALTH_OVERLOAD_BUSY_THREADS") or threads):
+        reasons.append("overloaded")
+    pool_sat = snap.get("pool_saturation")
+    if pool_sat is not None and pool_sat >= config.get("HEALTH_POOL_SATURATION_MAX", 0.9):
+        reasons.append("pool_saturated")
+
+    snap.update(busy_threads=busy, worker_threads=threads, reasons=reasons)
+    return not reasons, snap
+
+
+def init_health(app):
+    """Cuenta peticiones en vuelo por worker (para la señal de sobrecarga)."""
+
+    @app.before_request
+    def _health_track_start():
+        checker.ensure_started(app)
+        if request.path.endswith(_EXEMPT_PATH_SUFFIXES):
+            return
+        g._health_token = checker.request_started()
+
+    @app.teardown_request
+    def _health_track_end(exc=None):
+        token = g.pop("_health_token", None)
+        if token is not None:
+            checker.request_finished(token)
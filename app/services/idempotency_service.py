@@ -0,0 +1,167 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Response, current_app, make_response, request
+from flask_jwt_extended import get_jwt
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..extensions import db
+from ..models.idempotency_key import IdempotencyKey
+from ..utils.responses import error
+
+# ---------------------------------------------------------------------------
+# Idempotency-Key para POST de creación (reintentos del front con Wi-Fi inestable).
+# - La primera petición "reclama" (usuario, llave) con un INSERT ... ON CONFLICT
+#   DO NOTHING: solo una gana aunque lleguen a workers distintos.
+# - Duplicados concurrentes esperan a que termine la original (Event dentro del
+#   mismo proceso, sondeo a la BD entre procesos) y reciben su respuesta.
+# - Reintentos posteriores reciben la respuesta guardada sin volver a validar
+#   ni escribir. Las respuestas 5xx/excepciones no se guardan (se puede reintentar).
+# ---------------------------------------------------------------------------
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+# Propios de cada envío (los vuelven a poner werkzeug / los after_request)
+_PER_RESPONSE_HEADERS = {"content-length", "date", "set-cookie", "x-request-id", REPLAY_HEADER.lower()}
+MAX_KEY_LENGTH = 255
+_POLL_SECONDS = 0.1
+
+_table = IdempotencyKey.__table__
+_lock = threading.Lock()
+_inflight: dict[tuple[int, str], threading.Event] = {}
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _fingerprint() -> str:
+    h = hashlib.sha256()
+    h.update(f"{request.method} {request.path}\n".encode("utf-8"))
+    h.update(request.get_data(cache=True))
+    return h.hexdigest()
+
+# Todo va por db.session (misma conexión que la ruta) y con commit inmediato:
+# otra conexión esperando un lock de escritura de la sesión se bloquearía (SQLite).
+def _claim(user_id: int, key: str, request_hash: str) -> bool:
+    now = _now()
+    ttl = current_app.config.get("IDEMPOTENCY_TTL_SECONDS", 86400)
+    # una llave vencida se puede reutilizar
+    db.session.execute(delete(_table).where(
+        _table.c.user_id == user_id, _table.c.key == key, _table.c.expires_at < now
+    ))
+    insert = pg_insert if db.session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    result = db.session.execute(
+        insert(_table)
+        .values(user_id=user_id, key=key, request_hash=request_hash,
+                created_at=now, expires_at=now + timedelta(seconds=ttl))
+        .on_conflict_do_nothing(index_elements=["user_id", "key"])
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+def _load(user_id: int, key: str):
+    row = db.session.execute(
+        select(_table.c.request_hash, _table.c.status_code, _table.c.response_body, _table.c.response_headers)
+        .where(_table.c.user_id == user_id, _table.c.key == key)
+    ).first()
+    db.session.rollback()  # no retener la transacción de lectura mientras esperamos
+    return row
+
+def _store(user_id: int, key: str, resp: Response) -> None:
+    db.session.execute(
+        update(_table)
+        .where(_table.c.user_id == user_id, _table.c.key == key)
+        .values(
+            status_code=resp.status_code,
+            response_body=resp.get_data(as_text=True),
+            response_headers=json.dumps([
+                [name, value] for name, value in resp.headers.items()
+                if name.lower() not in _PER_RESPONSE_HEADERS
+            ]),
+        )
+    )
+    db.session.commit()
+
+def _release(user_id: int, key: str) -> None:
+    db.session.rollback()  # la ruta pudo dejar la sesión a medias
+    db.session.execute(delete(_table).where(_table.c.user_id == user_id, _table.c.key == key))
+    db.session.commit()
+
+def _replay(row) -> Response:
+    resp = Response(row.response_body, status=row.status_code, mimetype="application/json")
+    if row.response_headers:
+        # mismos encabezados que la original (Content-Type incluido)
+        resp.headers.clear()
+        for name, value in json.loads(row.response_headers):
+            resp.headers.add(name, value)
+    resp.headers[REPLAY_HEADER] = "true"
+    return resp
+
+def _run(fn, args, kwargs, user_id: int, key: str, event: threading.Event):
+    try:
+        resp = make_response(fn(*args, **kwargs))
+        if resp.status_code >= 500:
+            _release(user_id, key)
+        else:
+            _store(user_id, key, resp)
+        return resp
+    except Exception:
+        _release(user_id, key)
+        raise
+    finally:
+        # ya guardada (o liberada): despertar a los duplicados
+        with _lock:
+            _inflight.pop((user_id, key), None)
+        event.set()
+
+def idempotent(fn):
+    """
+    Aplica Idempotency-Key (opcional) a una ruta. Va debajo de @roles_required:
+    la llave es por usuario autenticado.
+    """
+    @wraps(fn)
+    def decorated(*args, **kwargs):
+        key = (request.headers.get(HEADER) or "").strip()
+        if not key:
+            return fn(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return error(f"{HEADER} admite máximo {MAX_KEY_LENGTH} caracteres", 400)
+        user_id = int((get_jwt() or {}).get("uid") or 0)
+        request_hash = _fingerprint()
+        deadline = time.monotonic() + current_app.config.get("IDEMPOTENCY_WAIT_SECONDS", 10.0)
+
+        while True:
+            with _lock:
+                event = _inflight.get((user_id, key))
+            if event is None and _claim(user_id, key, request_hash):
+                event = threading.Event()
+                with _lock:
+                    _inflight[(user_id, key)] = event
+                return _run(fn, args, kwargs, user_id, key, event)
+
+            if event is not None:
+                # duplicado en este mismo proceso: esperar a la original
+                event.wait(max(0.0, deadline - time.monotonic()))
+            row = _load(user_id, key)
+            if row is None:
+                continue  # la original falló y liberó la llave: tomarla
+            if row.request_hash != request_hash:
+                return error(f"{HEADER} ya se usó con otra petición", 422)
+            if row.status_code is not None:
+                return _replay(row)
+            if time.monotonic() >= deadline:
+                resp, status = error("La petición original sigue en proceso; reintenta", 409)
+                resp.headers["Retry-After"] = "1"
+                return resp, status
+            if event is None:
+                time.sleep(_POLL_SECONDS)  # la original corre en otro worker
+
+    return decorated
+
+def purge_expired() -> int:
+    """Borra llaves vencidas (cron)."""
+    deleted = db.session.execute(delete(_table).where(_table.c.expires_at < _now())).rowcount
+    db.session.commit()
+    return deleted
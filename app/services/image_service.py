@@ -1,9 +1,19 @@
-from ..models.file_asset import FileKind
-from .storage_service import normalize_url
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from ..models.file_asset import FileAsset, FileKind
+from ..utils.images import (
+    DERIVATIVES, compose_side_by_side, derivative_path, generate_derivatives
+)
+from .storage_service import media_root, media_url, normalize_url
 
 def validate_and_prepare(kind: FileKind, url: str) -> tuple[str, str | None]:
     """
-    Por ahora solo URLs: normaliza y sugiere mime_type por extensión.
+    Para URLs externas: normaliza y sugiere mime_type por extensión.
+    (Las subidas reales detectan el tipo por magic bytes en storage_service.)
     Retorna (url_normalizada, mime_type_sugerido).
     """
     u = normalize_url(url)
@@ -23,3 +33,75 @@ def validate_and_prepare(kind: FileKind, url: str) -> tuple[str, str | None]:
 
     # Recomendación: para fotos clínicas preferimos .webp por peso/calidad
     return u, mime
+
+
+# ---------------------------------------------------------------------------
+# Derivados WebP (thumb/medium/full) de fotos subidas, en un pool de procesos
+# para no ocupar hilos HTTP con el decode/resize.
+# ---------------------------------------------------------------------------
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn: el worker de gunicorn ya tiene hilos; fork no es seguro
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_pid = os.getpid()
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+def schedule_derivatives(asset: FileAsset) -> None:
+    """Encola la generación de derivados para una foto recién guardada."""
+    if asset.kind != FileKind.PHOTO or not asset.storage_path:
+        return
+    src = os.path.join(media_root(), asset.storage_path)
+    workers = current_app.config.get("IMAGE_DERIVATIVE_WORKERS", 2)
+    if workers <= 0:
+        generate_derivatives(src)  # modo síncrono (dev/tests)
+        return
+
+    logger = current_app.logger
+    future = _get_pool(workers).submit(generate_derivatives, src)
+
+    def _log_failure(f):
+        if f.exception() is not None:
+            logger.error("Derivados de %s fallaron: %s", src, f.exception())
+
+    future.add_done_callback(_log_failure)
+
+def derivative_urls(asset: FileAsset) -> dict[str, str]:
+    """URLs de los derivados ya generados (vacío mientras el pool trabaja)."""
+    if asset.kind != FileKind.PHOTO or not asset.storage_path:
+        return {}
+    root = media_root()
+    urls = {}
+    for name in DERIVATIVES:
+        rel = derivative_path(asset.storage_path, name)
+        if os.path.exists(os.path.join(root, rel)):
+            urls[name] = media_url(rel)
+    return urls
+
+# ---------------------------------------------------------------------------
+# Comparativos antes/después: se generan una vez y quedan en disco con clave
+# = hashes de ambas fotos. Si cualquiera cambia, la clave cambia.
+# ---------------------------------------------------------------------------
+def comparison_key(before: FileAsset, after: FileAsset) -> str:
+    return f"{before.content_sha256}_{after.content_sha256}"
+
+def _best_source(asset: FileAsset) -> str:
+    # El derivado "full" (≤2048px, WebP) decodifica mucho más rápido que el original
+    root = media_root()
+    full = os.path.join(root, derivative_path(asset.storage_path, "full"))
+    return full if os.path.exists(full) else os.path.join(root, asset.storage_path)
+
+def render_comparison(before: FileAsset, after: FileAsset) -> str:
+    """Ruta del comparativo en disco; lo genera solo si no existe."""
+    dest = os.path.join(media_root(), "composites", f"{comparison_key(before, after)}.webp")
+    if not os.path.exists(dest):
+        compose_side_by_side(_best_source(before), _best_source(after), dest)
+    return dest
@@ -0,0 +1,217 @@
+import csv
+import io
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+from marshmallow import EXCLUDE, ValidationError, fields, validate, validates
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from ..extensions import db
+from ..models.patient import Patient, Sex
+from ..schemas.patient import PatientCreateSchema
+from ..utils.time import age_on, now_cdmx
+from ..utils.validators import normalize_email
+from . import change_service, search_service, stats_service
+from .patient_service import DEFAULT_ALLERGIES, DEFAULT_PAST_HISTORY
+
+# ---------------------------------------------------------------------------
+# Lectura en streaming (CSV / XLSX) -> dicts con encabezados normalizados
+# ---------------------------------------------------------------------------
+def _header(name) -> str:
+    return str(name or "").strip().lower().replace(" ", "_")
+
+def iter_csv(fh):
+    """CSV UTF-8 (con o sin BOM); separador `,` `;` o tab según el encabezado."""
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    first = text.readline()
+    delimiter = max(",;\t", key=first.count)
+    header = [_header(h) for h in next(csv.reader([first], delimiter=delimiter))]
+    for values in csv.reader(text, delimiter=delimiter):
+        if any(v.strip() for v in values):
+            yield dict(zip(header, values))
+
+def _cell(v):
+    if isinstance(v, datetime):
+        return v.date().isoformat()
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))  # teléfonos capturados como número
+    if v is None or isinstance(v, bool):
+        return v
+    return str(v)
+
+def iter_xlsx(fh):
+    """Primera hoja; openpyxl en modo read_only no carga el libro completo."""
+    import openpyxl
+    wb = openpyxl.load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [_header(h) for h in next(rows, ())]
+        for values in rows:
+            if any(v not in (None, "") for v in values):
+                yield dict(zip(header, (_cell(v) for v in values)))
+    finally:
+        wb.close()
+
+READERS = {"csv": iter_csv, "xlsx": iter_xlsx}
+
+# ---------------------------------------------------------------------------
+# Validación (corre en los procesos del pool)
+# ---------------------------------------------------------------------------
+_YES = {"1", "true", "t", "yes", "y", "si", "sí", "s", "x"}
+_NO = {"0", "false", "f", "no", "n", ""}
+
+class PatientImportSchema(PatientCreateSchema):
+    """
+    Como el alta normal, pero los datos clínicos y consentimientos son opcionales.
+    Teléfono/email usan los validadores con caché LRU (utils.validators).
+    """
+
+    class Meta:
+        unknown = EXCLUDE
+
+    weight_kg = fields.Float(allow_none=True)
+    height_m = fields.Float(allow_none=True)
+    treatments_of_interest = fields.Str(allow_none=True, validate=validate.Length(max=2000))
+    privacy_notice_accepted = fields.Bool(load_default=False, truthy=_YES, falsy=_NO)
+    informed_consent_accepted = fields.Bool(load_default=False, truthy=_YES, falsy=_NO)
+
+    @validates("weight_kg")
+    def _w(self, value, **kwargs):
+        if value is not None and (value <= 0 or value > 500):
+            raise ValidationError("Peso fuera de rango")
+
+    @validates("height_m")
+    def _h(self, value, **kwargs):
+        if value is not None and (value <= 0 or value > 2.6):
+            raise ValidationError("Estatura fuera de rango")
+
+_schema = None
+
+def _clean(raw: dict) -> dict:
+    out = {}
+    for k, v in raw.items():
+        if isinstance(v, str):
+            v = v.strip()
+        if v not in (None, ""):
+            out[k] = v
+    return out
+
+def validate_chunk(first_line: int, rows: list[dict], today: date) -> tuple[list[dict], list[dict]]:
+    """Valida un bloque. Devuelve (filas listas para INSERT, errores por línea)."""
+    global _schema
+    if _schema is None:
+        _schema = PatientImportSchema()
+
+    valid, errors = [], []
+    for line, raw in enumerate(rows, start=first_line):
+        try:
+            data = _schema.load(_clean(raw))
+        except ValidationError as e:
+            errors.append({"line": line, "errors": e.messages})
+            continue
+        data["sex"] = Sex(data["sex"])
+        data["email"] = normalize_email(data["email"])
+        data["past_history"] = data.get("past_history") or DEFAULT_PAST_HISTORY
+        data["allergies"] = data.get("allergies") or DEFAULT_ALLERGIES
+        # mismos derivados que Patient.recalc_age_and_bmi
+        data["age_years"] = age_on(data["date_of_birth"], today)
+        w, h = data.get("weight_kg"), data.get("height_m")
+        data["bmi"] = round(w / (h ** 2), 1) if w and h else None
+        data["_line"] = line
+        valid.append(data)
+    return valid, errors
+
+# ---------------------------------------------------------------------------
+# Orquestación: lectura -> pool -> INSERT por lotes en savepoints
+# ---------------------------------------------------------------------------
+def _chunks(rows, size: int):
+    line = 2  # la línea 1 es el encabezado
+    it = iter(rows)
+    while True:
+        block = list(islice(it, size))
+        if not block:
+            return
+        yield line, block
+        line += len(block)
+
+def _insert_chunk(valid: list[dict], report: dict) -> None:
+    lines = [r.pop("_line") for r in valid]
+    try:
+        with db.session.begin_nested():
+            ids = db.session.execute(
+                insert(Patient).returning(Patient.id, sort_by_parameter_order=True), valid
+            ).scalars().all()
+        inserted = valid
+    except DBAPIError:
+        # el lote falló en la BD: fila por fila para reportar cuál
+        inserted, ids = [], []
+        for line, row in zip(lines, valid):
+            try:
+                with db.session.begin_nested():
+                    ids.extend(db.session.execute(insert(Patient).returning(Patient.id), [row]).scalars().all())
+                inserted.append(row)
+            except DBAPIError as e:
+                _add_error(report, {"line": line, "errors": {"_db": [str(e.orig)]}})
+    stats_service.record_inserted(Patient, inserted)
+    report["_new_ids"].extend(ids)  # change_log al final (ver import_patients)
+    search_service.index_rows(Patient, [dict(row, id=i) for row, i in zip(inserted, ids)])
+    report["inserted"] += len(inserted)
+
+def _add_error(report: dict, err: dict) -> None:
+    report["failed"] += 1
+    if len(report["errors"]) < report["_max_errors"]:
+        report["errors"].append(err)
+
+def import_patients(rows, *, workers: int = 2, chunk_size: int = 2000,
+                    max_errors: int = 1000, dry_run: bool = False) -> dict:
+    """
+    Importa pacientes desde un iterable de dicts (ver READERS).
+    Valida en paralelo (procesos) y con pocos bloques en vuelo para no cargar
+    el archivo completo en memoria. Todo va en una transacción; cada bloque
+    en su savepoint. dry_run=True valida e inserta pero hace rollback al final.
+    """
+    today = now_cdmx().date()
+    report = {"total": 0, "inserted": 0, "failed": 0, "errors": [], "_max_errors": max_errors, "_new_ids": []}
+
+    def consume(valid, errors):
+        for err in errors:
+            _add_error(report, err)
+        if valid:
+            _insert_chunk(valid, report)
+
+    try:
+        if workers <= 0:
+            for line, block in _chunks(rows, chunk_size):
+                report["total"] += len(block)
+                consume(*validate_chunk(line, block, today))
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                pending = deque()
+                for line, block in _chunks(rows, chunk_size):
+                    report["total"] += len(block)
+                    pending.append(pool.submit(validate_chunk, line, block, today))
+                    if len(pending) >= workers * 2:
+                        consume(*pending.popleft().result())
+                while pending:
+                    consume(*pending.popleft().result())
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        # change_log justo antes del commit: el contador de seq (una sola fila)
+        # queda bloqueado solo este último paso, no toda la importación
+        change_service.record(Patient, change_service.INSERT, [{"id": i} for i in report["_new_ids"]])
+        db.session.commit()
+
+    report["dry_run"] = dry_run
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    del report["_max_errors"], report["_new_ids"]
+    return report
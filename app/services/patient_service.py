@@ -1,7 +1,17 @@
-from sqlalchemy import select, and_, or_
+import calendar
+from datetime import date, timedelta
+from sqlalchemy import case, select, update, and_, or_
 from sqlalchemy.exc import IntegrityError
 from ..extensions import db
+from ..models.appointment import Appointment
+from ..models.consultation import Consultation
+from ..models.file_asset import FileAsset
+from ..models.job_run import JobRun
 from ..models.patient import Patient
+from ..models.prescription import Prescription
+from ..utils.time import age_on, now_cdmx
+from . import change_service, search_service, stats_service
+from .versioning_service import update_loaded, update_versioned
 
 DEFAULT_PAST_HISTORY = "Sin antecedentes patológicos"
 DEFAULT_ALLERGIES = "Sin alergias"
@@ -24,26 +34,65 @@ def create_patient(data: dict) -> Patient:
         raise ValueError("Error al crear paciente") from e
     return p
 
-def update_patient(p: Patient, data: dict) -> Patient:
-    for k, v in data.items():
-        setattr(p, k, v)
+def update_patient(patient_id: int, data: dict, expected_version: int | None = None) -> Patient | None:
+    """
+    Actualiza con control de versión (ver versioning_service). None si no existe;
+    VersionConflict si `expected_version` ya no es la actual.
+    """
+    # Asignar defaults si los mandan vacíos
+    if "past_history" in data and not (data["past_history"] or "").strip():
+        data["past_history"] = DEFAULT_PAST_HISTORY
+    if "allergies" in data and not (data["allergies"] or "").strip():
+        data["allergies"] = DEFAULT_ALLERGIES
 
-    # Asignar defaults si quedaron vacíos
-    if p.past_history is None or p.past_history.strip() == "":
-        p.past_history = DEFAULT_PAST_HISTORY
-    if p.allergies is None or p.allergies.strip() == "":
-        p.allergies = DEFAULT_ALLERGIES
+    if "weight_kg" in data or "height_m" in data:
+        # el IMC necesita peso y estatura: el otro puede venir de la fila
+        def apply(p: Patient):
+            for k, v in data.items():
+                setattr(p, k, v)
+            p.recalc_age_and_bmi()
+        return update_loaded(Patient, patient_id, apply, expected_version)
 
-    p.recalc_age_and_bmi()
-    db.session.add(p)
-    db.session.commit()
-    return p
+    if "date_of_birth" in data:
+        data["age_years"] = age_on(data["date_of_birth"], now_cdmx().date())
+    return update_versioned(Patient, patient_id, data, expected_version)
 
 def get_patient(patient_id: int) -> Patient | None:
     return db.session.get(Patient, patient_id)
 
-def list_patients(page: int = 1, page_size: int = 20, terms: list[str] | None = None,
-                  created_from=None, created_to=None):
+# Hijos que se borran lógicamente con el paciente (y las columnas que usan las métricas)
+SOFT_DELETE_CHILDREN = (
+    (Appointment, (Appointment.start_at, Appointment.professional_id, Appointment.status)),
+    (Prescription, (Prescription.issued_at, Prescription.professional_id)),
+    (Consultation, ()),
+    (FileAsset, ()),
+)
+
+def soft_delete_patient(p: Patient) -> None:
+    """
+    Marca al paciente y sus dependencias con deleted_at en una sola transacción.
+    Las filas se borran físicamente después (`flask patients-purge`).
+    """
+    now = now_cdmx()
+    for model, stat_cols in SOFT_DELETE_CHILDREN:
+        live = and_(model.patient_id == p.id, model.deleted_at.is_(None))
+        if stat_cols:
+            # UPDATE masivo: no pasa por after_flush, descontamos a mano
+            rows = db.session.execute(select(*stat_cols).where(live)).mappings().all()
+            stats_service.record_deleted(model, rows)
+        stmt = update(model).where(live).values(deleted_at=now).execution_options(synchronize_session=False)
+        if model in change_service.TRACKED:
+            # bajas para change_log (stream del calendario)
+            rows = db.session.execute(stmt.returning(*model.__table__.c)).mappings().all()
+            change_service.record(model, change_service.DELETE, rows)
+            if model in search_service.INDEXED:
+                search_service.unindex(model, [r["id"] for r in rows])
+        else:
+            db.session.execute(stmt)
+    p.deleted_at = now
+    db.session.commit()
+
+def patients_query(terms: list[str] | None = None, created_from=None, created_to=None):
     q = select(Patient).order_by(Patient.id.desc())
 
     # nombre completo: cada término debe aparecer en first_name o last_name
@@ -56,7 +105,77 @@ def list_patients(page: int = 1, page_size: int = 20, terms: list[str] | None =
         q = q.filter(Patient.created_at >= created_from)
     if created_to is not None:
         q = q.filter(Patient.created_at <= created_to)
+    return q
 
-    total = db.session.scalar(select(db.func.count()).select_from(q.subquery()))
+def list_patients(page: int = 1, page_size: int = 20, terms: list[str] | None = None,
+                  created_from=None, created_to=None, total: int | None = None):
+    q = patients_query(terms, created_from, created_to)
+    if total is None:  # la ruta ya lo trae del fingerprint (ETag)
+        total = db.session.scalar(select(db.func.count()).select_from(q.subquery()))
     items = db.session.execute(q.limit(page_size).offset((page - 1) * page_size)).scalars().all()
     return items, total
+
+
+# --------------------------------------------------------------------
+# Recalculo de edades (tarea programada: `flask patients-recompute-ages`)
+# --------------------------------------------------------------------
+AGE_JOB = "patients_recompute_ages"
+MAX_AGE_YEARS = 130
+AGE_CHUNK = 500  # fechas de nacimiento por UPDATE
+
+def _births_with_birthday_on(day: date):
+    """Fechas de nacimiento cuyo cumpleaños cae en `day` (una por año)."""
+    for years in range(MAX_AGE_YEARS + 1):
+        year = day.year - years
+        try:
+            yield day.replace(year=year)
+        except ValueError:
+            pass  # 29/feb en año no bisiesto
+        # en años no bisiestos, los nacidos el 29/feb cumplen el 1/mar
+        if (day.month, day.day) == (3, 1) and not calendar.isleap(day.year) and calendar.isleap(year):
+            yield date(year, 2, 29)
+
+def recompute_ages(today: date | None = None, chunk: int = AGE_CHUNK) -> int:
+    """
+    Actualiza age_years solo de quienes cumplieron años desde la última corrida.
+    Por cada día de la ventana se enumeran las fechas de nacimiento posibles
+    (una por año de edad) y se actualizan con UPDATE ... WHERE date_of_birth IN (...),
+    que usa ix_patients_date_of_birth. Primera corrida: ventana de un año (todos).
+    Devuelve filas actualizadas.
+    """
+    today = today or now_cdmx().date()
+    state = db.session.get(JobRun, AGE_JOB)
+    since = state.last_run_on if state else today - timedelta(days=366)
+    if since >= today:
+        return 0
+    since = max(since, today - timedelta(days=366))
+
+    births: list[date] = []
+    day = since + timedelta(days=1)
+    while day <= today:
+        births.extend(b for b in _births_with_birthday_on(day) if b <= today)
+        day += timedelta(days=1)
+
+    updated = 0
+    for i in range(0, len(births), chunk):
+        batch = births[i:i + chunk]
+        new_age = case({b: age_on(b, today) for b in batch}, value=Patient.date_of_birth)
+        result = db.session.execute(
+            update(Patient)
+            .where(Patient.date_of_birth.in_(batch), Patient.age_years.is_distinct_from(new_age))
+            # nueva versión: los ETag / If-Match de edición previos ya no aplican
+            .values(age_years=new_age, version_id=Patient.version_id + 1)
+            .returning(Patient.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = result.scalars().all()
+        change_service.record(Patient, change_service.UPDATE, [{"id": i} for i in ids])
+        updated += len(ids)
+        db.session.commit()  # transacciones cortas: no bloquear la tabla
+
+    if state is None:
+        db.session.add(JobRun(name=AGE_JOB, last_run_on=today))
+    else:
+        state.last_run_on = today
+    db.session.commit()
+    return updated
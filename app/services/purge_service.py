@@ -0,0 +1,90 @@
+import time
+from datetime import timedelta
+from sqlalchemy import delete, exists, select
+from ..extensions import db
+from ..models.appointment import Appointment
+from ..models.consultation import Consultation
+from ..models.file_asset import FileAsset
+from ..models.patient import Patient
+from ..models.prescription import Prescription
+from ..utils.time import now_cdmx
+from .storage_service import blob_digest, blob_lock, release_blob
+
+# ---------------------------------------------------------------------------
+# Purga física de pacientes borrados lógicamente (`flask patients-purge`).
+# Borra en lotes pequeños con commit y pausa entre lotes para no bloquear
+# tablas ni saturar el WAL/réplicas. Es reanudable: si se corta, la siguiente
+# corrida sigue donde quedó (las filas que faltan siguen con deleted_at).
+# ---------------------------------------------------------------------------
+# Orden: recetas antes que consultas (consultation_id), paciente al final
+PURGE_CHILDREN = (FileAsset, Prescription, Consultation, Appointment)
+_ALL = {"include_deleted": True}
+
+def _blob_in_use(rel_path: str) -> bool:
+    stmt = select(exists().where(FileAsset.storage_path == rel_path))
+    return bool(db.session.execute(stmt, execution_options=_ALL).scalar())
+
+def _purge_table(model, patient_id: int, batch_size: int, pause: float, progress) -> tuple[int, list[str]]:
+    deleted, blobs = 0, []
+    while True:
+        cols = (model.id, model.storage_path) if model is FileAsset else (model.id,)
+        batch = db.session.execute(
+            select(*cols).where(model.patient_id == patient_id).order_by(model.id).limit(batch_size),
+            execution_options=_ALL,
+        ).all()
+        if not batch:
+            return deleted, blobs
+        ids = [row[0] for row in batch]
+        if model is FileAsset:
+            blobs += [row[1] for row in batch if row[1]]
+        db.session.execute(
+            delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        deleted += len(ids)
+        progress(model.__tablename__, patient_id, deleted)
+        if len(ids) < batch_size:
+            return deleted, blobs
+        time.sleep(pause)
+
+def purge_deleted(older_than_days: int = 30, batch_size: int = 500, pause: float = 0.2,
+                  limit: int | None = None, progress=None) -> dict:
+    """
+    Borra físicamente pacientes con deleted_at de hace más de `older_than_days`
+    días y sus dependencias. `progress(tabla, patient_id, borradas)` se llama
+    después de cada lote. Devuelve conteos por tabla.
+    """
+    progress = progress or (lambda *args: None)
+    cutoff = now_cdmx() - timedelta(days=older_than_days)
+    stmt = (
+        select(Patient.id)
+        .where(Patient.deleted_at.is_not(None), Patient.deleted_at <= cutoff)
+        .order_by(Patient.deleted_at)
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    patient_ids = db.session.execute(stmt, execution_options=_ALL).scalars().all()
+
+    counts = {m.__tablename__: 0 for m in (*PURGE_CHILDREN, Patient)}
+    counts["blobs_released"] = 0
+    for patient_id in patient_ids:
+        blobs = []
+        for model in PURGE_CHILDREN:
+            n, paths = _purge_table(model, patient_id, batch_size, pause, progress)
+            counts[model.__tablename__] += n
+            blobs += paths
+        db.session.execute(delete(Patient).where(Patient.id == patient_id))
+        db.session.commit()
+        counts[Patient.__tablename__] += 1
+        progress(Patient.__tablename__, patient_id, 1)
+
+        # blobs compartidos (dedupe por contenido) solo si ya nadie los usa
+        # (bajo blob_lock: una subida que lo reutiliza espera o ya hizo commit)
+        for rel_path in set(blobs):
+            with blob_lock(blob_digest(rel_path)):
+                db.session.rollback()  # lectura nueva dentro del lock
+                in_use = _blob_in_use(rel_path)
+                release_blob(rel_path, still_referenced=in_use)
+            counts["blobs_released"] += not in_use
+        time.sleep(pause)
+    return counts
@@ -0,0 +1,214 @@
+from sqlalchemy import case, delete, event, func, insert, inspect, literal, select, union_all
+from ..db_routing import RoutingSession
+from ..extensions import db
+from ..models.consultation import Consultation
+from ..models.patient import Patient
+from ..models.prescription import Prescription
+from ..models.search_term import SearchTerm
+from ..models.user import User
+from ..utils.text import phone_terms, words
+
+# ---------------------------------------------------------------------------
+# Búsqueda global (un solo cuadro: nombre, teléfono, email, diagnóstico, notas)
+# sobre un índice invertido propio en vez de ILIKE por tabla. Misma lógica en
+# SQLite (dev) y Postgres: el prefijo es un rango sobre la PK (term, ...).
+# ---------------------------------------------------------------------------
+_t = SearchTerm.__table__
+
+# (campo, peso) por modelo
+INDEXED = {
+    Patient: (("first_name", 3), ("last_name", 3), ("email", 2), ("phone", 2)),
+    User: (("first_name", 3), ("last_name", 3), ("username", 3), ("email", 2)),
+    Prescription: (("diagnosis", 2),),
+    Consultation: (("title", 2), ("notes", 1)),
+}
+ENTITIES = {m.__tablename__: m for m in INDEXED}
+
+MIN_PREFIX = 2
+MAX_QUERY_TERMS = 6
+MAX_TERMS_PER_ROW = 500  # notas largas: suficiente para buscar, acotado en tamaño
+_STOPWORDS = frozenset(
+    "de la el los las del al y o en con sin por para un una que se su sus es no "
+    "a e le lo".split()
+)
+_UPPER = "~"  # > cualquier [a-z0-9] en orden binario: 'ana' <= term < 'ana~'
+
+def _terms(model, get) -> dict[str, int]:
+    """término -> peso máximo. `get(attr)` da el valor del campo."""
+    out: dict[str, int] = {}
+    for attr, weight in INDEXED[model]:
+        value = get(attr)
+        if attr == "phone":
+            terms = phone_terms(value) + words(value)
+        else:
+            terms = [w for w in words(value) if len(w) >= MIN_PREFIX and w not in _STOPWORDS]
+        for term in terms:
+            if out.get(term, 0) < weight:
+                out[term] = weight
+            if len(out) >= MAX_TERMS_PER_ROW:
+                return out
+    return out
+
+def _postings(model, entity_id: int, get) -> list[dict]:
+    entity = model.__tablename__
+    return [
+        {"term": term, "entity": entity, "entity_id": entity_id, "weight": weight}
+        for term, weight in _terms(model, get).items()
+    ]
+
+def _unindex(conn, entity: str, ids) -> None:
+    ids = list(ids)
+    if ids:
+        conn.execute(delete(_t).where(_t.c.entity == entity, _t.c.entity_id.in_(ids)))
+
+def _insert(conn, rows: list[dict]) -> None:
+    if rows:
+        conn.execute(insert(_t), rows)
+
+# ---------------------------------------------------------------------------
+# Mantenimiento en cada flush del ORM
+# ---------------------------------------------------------------------------
+def _touched(obj, model) -> bool:
+    state = inspect(obj)
+    attrs = [a for a, _ in INDEXED[model]]
+    if hasattr(model, "deleted_at"):
+        attrs.append("deleted_at")
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+def _after_flush(session, flush_context):
+    drop: dict[str, set[int]] = {}
+    rows: list[dict] = []
+    for obj in session.new:
+        model = type(obj)
+        if model in INDEXED and getattr(obj, "deleted_at", None) is None:
+            rows.extend(_postings(model, obj.id, lambda a: getattr(obj, a)))
+    for obj in session.deleted:
+        model = type(obj)
+        if model in INDEXED:
+            drop.setdefault(model.__tablename__, set()).add(obj.id)
+    for obj in session.dirty:
+        model = type(obj)
+        if model in INDEXED and _touched(obj, model):
+            drop.setdefault(model.__tablename__, set()).add(obj.id)
+            if getattr(obj, "deleted_at", None) is None:
+                rows.extend(_postings(model, obj.id, lambda a: getattr(obj, a)))
+    if not drop and not rows:
+        return
+    conn = session.connection()
+    for entity, ids in drop.items():
+        _unindex(conn, entity, ids)
+    _insert(conn, rows)
+
+def index_rows(model, rows) -> None:
+    """
+    Para escrituras masivas que no pasan por after_flush. `rows`: objetos o
+    dicts con id y los campos indexados. Reemplaza lo que hubiera.
+    """
+    conn = db.session.connection()
+    out = []
+    for r in rows:
+        get = r.get if hasattr(r, "get") else (lambda a, r=r: getattr(r, a))
+        out.extend(_postings(model, get("id"), get))
+    _unindex(conn, model.__tablename__, {r["entity_id"] for r in out})
+    _insert(conn, out)
+
+def unindex(model, ids) -> None:
+    """Bajas masivas (borrado lógico en cascada)."""
+    _unindex(db.session.connection(), model.__tablename__, ids)
+
+def init_search(app):
+    """Mantiene search_terms en cada flush de db.session."""
+    if not event.contains(RoutingSession, "after_flush", _after_flush):
+        event.listen(RoutingSession, "after_flush", _after_flush)
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+def query_terms(q: str) -> list[str]:
+    """Términos de la búsqueda (únicos, en orden); los de 1 carácter no cuentan."""
+    terms = [w for w in words(q) if len(w) >= MIN_PREFIX]
+    return list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+
+def search(q: str, entities: list[str], per_entity: int) -> dict[str, list[tuple]]:
+    """
+    Todas las palabras deben aparecer (como prefijo) en la misma fila.
+    Puntaje: por palabra, el mejor peso del campo donde aparece (x2) + 1 si es
+    palabra completa. Devuelve {entidad: [(obj, score), ...]} ordenado.
+    """
+    terms = query_terms(q)
+    if not terms or not entities:
+        return {}
+
+    per_term = union_all(*[
+        select(
+            _t.c.entity, _t.c.entity_id, literal(i).label("qi"),
+            (_t.c.weight * 2 + case((_t.c.term == term, 1), else_=0)).label("score"),
+        ).where(_t.c.term >= term, _t.c.term < term + _UPPER, _t.c.entity.in_(entities))
+        for i, term in enumerate(terms)
+    ]).subquery()
+    best = (
+        select(per_term.c.entity, per_term.c.entity_id, per_term.c.qi, func.max(per_term.c.score).label("score"))
+        .group_by(per_term.c.entity, per_term.c.entity_id, per_term.c.qi)
+        .subquery()
+    )
+    docs = (
+        select(
+            best.c.entity, best.c.entity_id, func.sum(best.c.score).label("score"),
+            func.row_number().over(
+                partition_by=best.c.entity,
+                order_by=(func.sum(best.c.score).desc(), best.c.entity_id.desc()),
+            ).label("rn"),
+        )
+        .group_by(best.c.entity, best.c.entity_id)
+        .having(func.count() == len(terms))
+        .subquery()
+    )
+    hits = db.session.execute(
+        select(docs.c.entity, docs.c.entity_id, docs.c.score).where(docs.c.rn <= per_entity)
+    ).all()
+
+    by_entity: dict[str, dict[int, int]] = {}
+    for h in hits:
+        by_entity.setdefault(h.entity, {})[h.entity_id] = h.score
+    out: dict[str, list[tuple]] = {}
+    for entity, scores in by_entity.items():
+        model = ENTITIES[entity]
+        # el filtro global de borrado lógico descarta lo que ya no está vivo
+        objs = db.session.execute(select(model).where(model.id.in_(list(scores)))).scalars().all()
+        out[entity] = sorted(((o, scores[o.id]) for o in objs), key=lambda p: (-p[1], -p[0].id))
+    return out
+
+# ---------------------------------------------------------------------------
+# Reconstrucción (`flask search-reindex`)
+# ---------------------------------------------------------------------------
+def reindex(batch_size: int = 1000, progress=None) -> dict:
+    """
+    Regenera el índice por lotes de id (transacciones cortas). Cada lote
+    reemplaza sus postings en la misma transacción: la búsqueda sigue
+    respondiendo durante la reconstrucción. Se borra el rango de ids del lote
+    (no solo los ids leídos) para limpiar también filas que ya no existen.
+    """
+    counts = {}
+    for model in INDEXED:
+        entity = model.__tablename__
+        cols = [model.id] + [getattr(model, a) for a, _ in INDEXED[model]]
+        last_id, total = 0, 0
+        while True:
+            batch = db.session.execute(
+                select(*cols).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).mappings().all()
+            stale = [_t.c.entity == entity, _t.c.entity_id > last_id]
+            if batch:
+                stale.append(_t.c.entity_id <= batch[-1]["id"])
+            db.session.execute(delete(_t).where(*stale))
+            if not batch:
+                db.session.commit()
+                break
+            rows = [p for r in batch for p in _postings(model, r["id"], r.get)]
+            _insert(db.session.connection(), rows)
+            db.session.commit()
+            last_id, total = batch[-1]["id"], total + len(batch)
+            if progress:
+                progress(entity, total)
+        counts[entity] = total
+    return counts
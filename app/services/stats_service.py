@@ -0,0 +1,203 @@
+from collections import Counter
+from datetime import date, datetime
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from ..db_routing import RoutingSession
+from ..extensions import db
+from ..models.appointment import Appointment
+from ..models.daily_stat import DailyStat
+from ..models.patient import Patient
+from ..models.prescription import Prescription
+from ..utils.time import CDMX_TZ, UTC_TZ, now_cdmx
+
+# Métricas
+PATIENTS_NEW = "patients_new"
+APPOINTMENTS = "appointments"
+APPT_STATUS = "appt_status:"       # + status
+PRESCRIPTIONS = "prescriptions"
+
+# ---------------------------------------------------------------------------
+# Claves (día local, profesional, métrica) de cada entidad
+# ---------------------------------------------------------------------------
+def _local_day(dt: datetime | None) -> date:
+    if dt is None:
+        return now_cdmx().date()  # server_default now(): aún no lo conocemos
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC_TZ)  # en BD guardamos UTC
+    return dt.astimezone(CDMX_TZ).date()
+
+def _value(v):
+    return getattr(v, "value", v)
+
+def _keys(model, get) -> list[tuple]:
+    """Claves que suma una fila de `model`. `get(attr)` da el valor (actual o anterior)."""
+    if get("deleted_at") is not None:
+        return []  # borrado lógico: deja de contar
+    if model is Patient:
+        return [(_local_day(get("created_at")), 0, PATIENTS_NEW)]
+    if model is Appointment:
+        day, pro = _local_day(get("start_at")), get("professional_id") or 0
+        return [(day, pro, APPOINTMENTS), (day, pro, APPT_STATUS + str(_value(get("status"))))]
+    if model is Prescription:
+        return [(_local_day(get("issued_at")), get("professional_id") or 0, PRESCRIPTIONS)]
+    return []
+
+_TRACKED = (Patient, Appointment, Prescription)
+_KEY_ATTRS = ("created_at", "start_at", "status", "professional_id", "issued_at", "deleted_at")
+
+def _current(obj):
+    return lambda attr: getattr(obj, attr)
+
+def _previous(obj):
+    state = inspect(obj)
+
+    def get(attr):
+        if attr not in state.attrs:
+            return None
+        hist = state.attrs[attr].history
+        if hist.deleted:
+            return hist.deleted[0]
+        return hist.unchanged[0] if hist.unchanged else getattr(obj, attr)
+    return get
+
+def _collect_deltas(session) -> Counter:
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, _TRACKED):
+            for k in _keys(type(obj), _current(obj)):
+                deltas[k] += 1
+    for obj in session.deleted:
+        if isinstance(obj, _TRACKED):
+            for k in _keys(type(obj), _previous(obj)):
+                deltas[k] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, _TRACKED):
+            continue
+        state = inspect(obj)
+        if not any(a in state.attrs and state.attrs[a].history.has_changes() for a in _KEY_ATTRS):
+            continue
+        for k in _keys(type(obj), _previous(obj)):
+            deltas[k] -= 1
+        for k in _keys(type(obj), _current(obj)):
+            deltas[k] += 1
+    return Counter({k: v for k, v in deltas.items() if v})
+
+def _upsert(conn, deltas: Counter) -> None:
+    rows = [
+        {"day": day, "professional_id": pro, "metric": metric, "value": v}
+        for (day, pro, metric), v in deltas.items()
+    ]
+    insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(DailyStat.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "professional_id", "metric"],
+        set_={"value": DailyStat.__table__.c.value + stmt.excluded.value},
+    )
+    conn.execute(stmt, rows)
+
+def _after_flush(session, flush_context):
+    # Misma transacción que el cambio: si hay rollback, el contador también vuelve
+    deltas = _collect_deltas(session)
+    if deltas:
+        _upsert(session.connection(), deltas)
+
+def record_inserted(model, rows: list[dict]) -> None:
+    """Para inserts masivos (session.execute(insert(...), rows)), que no pasan por after_flush."""
+    deltas = Counter()
+    for row in rows:
+        for k in _keys(model, row.get):
+            deltas[k] += 1
+    if deltas:
+        _upsert(db.session.connection(), deltas)
+
+def record_deleted(model, rows: list[dict]) -> None:
+    """Contraparte de record_inserted para UPDATE/DELETE masivos (ej. borrado lógico en cascada)."""
+    deltas = Counter()
+    for row in rows:
+        for k in _keys(model, row.get):
+            deltas[k] -= 1
+    if deltas:
+        _upsert(db.session.connection(), deltas)
+
+def init_stats(app):
+    """Mantiene daily_stats en cada flush de db.session."""
+    if not event.contains(RoutingSession, "after_flush", _after_flush):
+        event.listen(RoutingSession, "after_flush", _after_flush)
+
+# ---------------------------------------------------------------------------
+# Reconstrucción en lote (histórico, o tras borrados en cascada en la BD,
+# que no pasan por el ORM)
+# ---------------------------------------------------------------------------
+_BATCH = 5000
+
+def rebuild() -> int:
+    """Recalcula daily_stats completo leyendo solo las columnas necesarias."""
+    counts = Counter()
+    sources = (
+        (Patient, (Patient.created_at,)),
+        (Appointment, (Appointment.start_at, Appointment.professional_id, Appointment.status)),
+        (Prescription, (Prescription.issued_at, Prescription.professional_id)),
+    )
+    for model, cols in sources:
+        result = db.session.execute(select(*cols).execution_options(yield_per=_BATCH))
+        for row in result:
+            values = dict(zip((c.key for c in cols), row))
+            for k in _keys(model, values.get):
+                counts[k] += 1
+
+    db.session.execute(DailyStat.__table__.delete())
+    if counts:
+        db.session.execute(
+            DailyStat.__table__.insert(),
+            [{"day": d, "professional_id": p, "metric": m, "value": v} for (d, p, m), v in counts.items()],
+        )
+    db.session.commit()
+    return len(counts)
+
+# ---------------------------------------------------------------------------
+# Lecturas del dashboard (solo daily_stats)
+# ---------------------------------------------------------------------------
+def dashboard(day_from: date, day_to: date, professional_id: int | None = None) -> dict:
+    q = select(DailyStat.day, DailyStat.professional_id, DailyStat.metric, DailyStat.value).where(
+        DailyStat.day >= day_from, DailyStat.day <= day_to
+    )
+    if professional_id is not None:
+        # altas de pacientes no son por profesional: siempre se incluyen
+        q = q.where(or_(DailyStat.professional_id == professional_id, DailyStat.metric == PATIENTS_NEW))
+
+    patients_by_month = Counter()
+    by_status = Counter()
+    per_pro = {}
+    for day, pro, metric, value in db.session.execute(q):
+        if metric == PATIENTS_NEW:
+            patients_by_month[day.strftime("%Y-%m")] += value
+            continue
+        entry = per_pro.setdefault(pro, {"appointments": 0, "no_show": 0, "prescriptions": 0})
+        if metric == APPOINTMENTS:
+            entry["appointments"] += value
+        elif metric == PRESCRIPTIONS:
+            entry["prescriptions"] += value
+        elif metric.startswith(APPT_STATUS):
+            status = metric[len(APPT_STATUS):]
+            by_status[status] += value
+            if status == "no_show":
+                entry["no_show"] += value
+
+    professionals = []
+    for pro, e in sorted(per_pro.items()):
+        professionals.append({
+            "professional_id": pro or None,
+            "appointments": e["appointments"],
+            "no_show": e["no_show"],
+            "no_show_rate": round(e["no_show"] / e["appointments"], 4) if e["appointments"] else None,
+            "prescriptions": e["prescriptions"],
+        })
+
+    return {
+        "from": day_from.isoformat(),
+        "to": day_to.isoformat(),
+        "new_patients_by_month": [{"month": m, "count": c} for m, c in sorted(patients_by_month.items())],
+        "appointments_by_status": dict(sorted(by_status.items())),
+        "professionals": professionals,
+    }
@@ -1,4 +1,13 @@
+import fcntl
+import glob
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
 from urllib.parse import urlparse, urlunparse
+from flask import current_app
+from ..utils.images import DERIVATIVES, derivative_path
 
 def normalize_url(url: str) -> str:
     """
@@ -13,3 +22,152 @@ def normalize_url(url: str) -> str:
     # limpiamos fragmentos (#) pero dejamos query (tokens firmados, etc.)
     parsed = parsed._replace(fragment="")
     return urlunparse(parsed)
+
+# ---------------------------------------------------------------------------
+# Subidas locales: blobs direccionados por contenido bajo MEDIA_ROOT
+#   MEDIA_ROOT/blobs/ab/cd/<sha256>.<ext>
+# El mismo archivo subido dos veces ocupa un solo blob.
+# ---------------------------------------------------------------------------
+# (firma, mime, extensión)
+_MAGIC = (
+    (b"%PDF-", "application/pdf", ".pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+)
+_SNIFF_BYTES = 16
+
+def sniff_mime(head: bytes) -> tuple[str, str] | None:
+    """Detecta (mime, extensión) por los primeros bytes; None si no es soportado."""
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    for magic, mime, ext in _MAGIC:
+        if head.startswith(magic):
+            return mime, ext
+    return None
+
+def media_root() -> str:
+    return os.path.abspath(current_app.config["MEDIA_ROOT"])
+
+def media_url(rel_path: str) -> str:
+    base = current_app.config.get("MEDIA_BASE_URL", "/media").rstrip("/")
+    return f"{base}/{rel_path}"
+
+class HashingWriter:
+    """
+    Archivo temporal (en MEDIA_ROOT/.tmp, mismo filesystem que el destino)
+    que calcula SHA-256 y tamaño conforme el parser multipart escribe los chunks.
+    """
+
+    def __init__(self, tmp_dir: str):
+        os.makedirs(tmp_dir, exist_ok=True)
+        self._fh = tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+        self.path = self._fh.name
+        self._sha = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+
+    def write(self, chunk: bytes) -> int:
+        if len(self.head) < _SNIFF_BYTES:
+            self.head += chunk[: _SNIFF_BYTES - len(self.head)]
+        self._sha.update(chunk)
+        self.size += len(chunk)
+        return self._fh.write(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._sha.hexdigest()
+
+    def __getattr__(self, name):
+        # seek/read/close/flush... los resuelve el archivo real
+        return getattr(self._fh, name)
+
+    def discard(self):
+        self._fh.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def upload_stream_factory(writers: list):
+    """stream_factory para werkzeug.formparser: cada archivo va directo a disco."""
+    tmp_dir = os.path.join(media_root(), ".tmp")
+
+    def factory(total_content_length, content_type, filename, content_length=None):
+        w = HashingWriter(tmp_dir)
+        writers.append(w)
+        return w
+
+    return factory
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size: int
+    mime_type: str
+    rel_path: str
+    deduplicated: bool
+
+def commit_upload(writer: HashingWriter) -> StoredBlob:
+    """
+    Mueve el temporal a su ruta por contenido. Si el blob ya existía
+    (mismo SHA-256) se descarta el temporal. Lanza ValueError si el tipo
+    real del archivo (magic bytes) no está soportado.
+    """
+    sniffed = sniff_mime(writer.head)
+    if not sniffed:
+        writer.discard()
+        raise ValueError("Tipo de archivo no soportado. Usa PDF o imagen (webp/jpg/png)")
+    mime, ext = sniffed
+
+    digest = writer.sha256
+    rel_path = f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+    final = os.path.join(media_root(), rel_path)
+
+    writer.close()
+    if os.path.exists(final):
+        writer.discard()
+        deduplicated = True
+    else:
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(writer.path, final)  # atómico: mismo filesystem
+        deduplicated = False
+    return StoredBlob(digest, writer.size, mime, rel_path, deduplicated)
+
+_LOCK_STRIPES = 2  # hex: 256 archivos de lock bajo MEDIA_ROOT/.locks
+
+def blob_digest(rel_path: str) -> str:
+    return os.path.basename(rel_path).split(".")[0]
+
+@contextmanager
+def blob_lock(digest: str):
+    """
+    Serializa (entre hilos y workers) quien reutiliza un blob y quien lo
+    libera: la subida lo toma hasta hacer commit de su FileAsset; el borrado,
+    para revisar si sigue en uso y borrar el archivo. flock sobre un archivo
+    por prefijo del SHA-256 (número acotado de archivos).
+    """
+    lock_dir = os.path.join(media_root(), ".locks")
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f"{digest[:_LOCK_STRIPES]}.lock"), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+def release_blob(rel_path: str | None, still_referenced: bool) -> None:
+    """
+    Borra el blob (derivados y comparativos incluidos) cuando ya ningún FileAsset lo usa.
+    Llamar con blob_lock() tomado y still_referenced calculado dentro del lock.
+    """
+    if not rel_path or still_referenced:
+        return
+    root = media_root()
+    digest = blob_digest(rel_path)
+    paths = [os.path.join(root, rel_path)]
+    paths += [os.path.join(root, derivative_path(rel_path, name)) for name in DERIVATIVES]
+    # comparativos antes/después donde participa este blob
+    paths += glob.glob(os.path.join(root, "composites", f"*{digest}*.webp"))
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
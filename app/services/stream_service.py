@@ -0,0 +1,157 @@
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from ..extensions import db
+from ..utils.time import UTC_TZ
+from .change_service import changes_since, head
+
+log = logging.getLogger("app.stream")
+
+RESET = object()  # el suscriptor se quedó atrás: debe recargar y reconectar
+
+def _utc(dt: datetime | None) -> datetime | None:
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=UTC_TZ) if dt.tzinfo is None else dt.astimezone(UTC_TZ)
+
+def to_event(row) -> dict:
+    m = row._mapping
+    return {
+        "seq": m["seq"],
+        "entity": m["entity"],
+        "op": m["op"],
+        "id": m["entity_id"],
+        "patient_id": m["patient_id"],
+        "professional_id": m["professional_id"],
+        "prev_professional_id": m["prev_professional_id"],
+        "range_start": _utc(m["range_start"]),
+        "range_end": _utc(m["range_end"]),
+    }
+
+class Subscriber:
+    """Filtro del cliente + cola acotada que llena el hilo del hub."""
+
+    def __init__(self, entity: str, professional_id: int | None, start: datetime | None,
+                 end: datetime | None, maxsize: int):
+        self.entity = entity
+        self.professional_id = professional_id
+        self.start = start
+        self.end = end
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def wants(self, ev: dict) -> bool:
+        if ev["entity"] != self.entity:
+            return False
+        if self.professional_id is not None and self.professional_id not in (
+            ev["professional_id"], ev["prev_professional_id"]
+        ):
+            return False
+        if self.start is not None and ev["range_end"] is not None and ev["range_end"] < self.start:
+            return False
+        if self.end is not None and ev["range_start"] is not None and ev["range_start"] > self.end:
+            return False
+        return True
+
+    def push(self, ev) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(ev)
+        except queue.Full:
+            # cliente lento: que recargue en vez de crecer sin límite
+            self.overflowed = True
+            self.queue = queue.Queue(maxsize=1)
+            self.queue.put_nowait(RESET)
+
+class ChangeHub:
+    """
+    Fan-out por worker: un hilo sigue change_log (seq > último visto) y reparte
+    a los suscriptores SSE de este proceso. Cada worker de gunicorn tiene el
+    suyo; el orden y la entrega entre workers los da la propia tabla.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._subscribers: set[Subscriber] = set()
+        self.last_seq = 0
+        self.delivered = 0
+        self.resets = 0
+
+    def configure(self, app):
+        self.poll_interval = app.config.get("SSE_POLL_INTERVAL", 0.5)
+        self.batch = app.config.get("SSE_POLL_BATCH", 500)
+        self.queue_size = app.config.get("SSE_QUEUE_SIZE", 1000)
+        self.max_clients = app.config.get("SSE_MAX_CLIENTS", 1)
+
+    def ensure_started(self, app):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._subscribers = set()
+            self._stop = threading.Event()
+            with app.app_context():
+                engine = db.engine
+            with engine.connect() as conn:
+                self.last_seq = head(conn)
+            self._thread = threading.Thread(target=self._run, args=(engine,), name="change-hub", daemon=True)
+            self._thread.start()
+
+    def subscribe(self, entity: str, professional_id=None, start=None, end=None) -> Subscriber | None:
+        """None si el worker ya tiene SSE_MAX_CLIENTS streams abiertos."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            sub = Subscriber(entity, professional_id, start, end, self.queue_size)
+            self._subscribers.add(sub)
+            return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+            if sub.overflowed:
+                self.resets += 1
+
+    def _poll(self, engine) -> None:
+        with engine.connect() as conn:
+            rows = changes_since(self.last_seq, self.batch, conn)
+        if not rows:
+            return
+        self.last_seq = rows[-1]._mapping["seq"]
+        with self._lock:
+            subs = list(self._subscribers)
+        for row in rows:
+            ev = to_event(row)
+            for sub in subs:
+                if sub.wants(ev):
+                    sub.push(ev)
+                    self.delivered += 1
+
+    def _run(self, engine):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._poll(engine)
+            except Exception:
+                log.exception("stream: no se pudo leer change_log")
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "max_clients": self.max_clients,
+            "last_seq": self.last_seq,
+            "delivered": self.delivered,
+            "resets": self.resets,
+        }
+
+hub = ChangeHub()
+
+def init_stream(app):
+    hub.configure(app)
@@ -51,12 +51,18 @@ def update_user(user: User, data: dict) -> User:
 def get_user(user_id: int) -> User | None:
     return db.session.get(User, user_id)
 
-def list_users(page: int = 1, page_size: int = 20, search: str | None = None):
+def users_query(search: str | None = None):
     q = select(User).order_by(User.id.desc())
     if search:
         like = f"%{search.lower()}%"
         q = q.filter((User.email.ilike(like)) | (User.username.ilike(like)) |
                      (User.first_name.ilike(like)) | (User.last_name.ilike(like)))
-    total = db.session.scalar(select(db.func.count()).select_from(q.subquery()))
+    return q
+
+def list_users(page: int = 1, page_size: int = 20, search: str | None = None,
+               total: int | None = None):
+    q = users_query(search)
+    if total is None:  # la ruta ya lo trae del fingerprint (ETag)
+        total = db.session.scalar(select(db.func.count()).select_from(q.subquery()))
     items = db.session.execute(q.limit(page_size).offset((page - 1) * page_size)).scalars().all()
     return items, total
@@ -0,0 +1,74 @@
+from sqlalchemy import update
+from sqlalchemy.orm.exc import StaleDataError
+from ..extensions import db
+from .cache_service import entity_cache
+from . import change_service, search_service
+
+# ---------------------------------------------------------------------------
+# Concurrencia optimista (version_id_col + If-Match) para los PATCH.
+# Sin SELECT ... FOR UPDATE: el control va en el WHERE del UPDATE.
+# ---------------------------------------------------------------------------
+
+class VersionConflict(Exception):
+    """La fila cambió desde la versión que el cliente editó (HTTP 412)."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"versión actual: {current_version}")
+        self.current_version = current_version
+
+def _conflict_or_missing(model, entity_id: int):
+    # Solo en el caso raro de 0 filas: ¿no existe (404) o cambió (412)?
+    db.session.rollback()
+    current = db.session.get(model, entity_id)
+    if current is None:
+        return None
+    raise VersionConflict(current.version_id)
+
+def update_versioned(model, entity_id: int, values: dict, expected_version: int | None):
+    """
+    Un solo round-trip:
+      UPDATE ... SET values, version_id = version_id + 1
+      WHERE id = :id AND deleted_at IS NULL [AND version_id = :expected] RETURNING *
+    Solo para cambios que no dependen de la fila actual ni afectan daily_stats
+    (no pasa por after_flush; change_log y search_terms se escriben aquí). Devuelve el objeto actualizado (desligado de la
+    sesión, listo para dump) o None si no existe.
+    """
+    stmt = (
+        update(model)
+        .where(model.id == entity_id, model.deleted_at.is_(None))
+        .values(**values, version_id=model.version_id + 1)
+        .returning(model)
+        .execution_options(synchronize_session=False)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(model.version_id == expected_version)
+    obj = db.session.execute(stmt).scalar_one_or_none()
+    if obj is None:
+        return _conflict_or_missing(model, entity_id)
+    if model in change_service.TRACKED:
+        change_service.record(model, change_service.UPDATE, [obj])
+    if model in search_service.INDEXED:
+        search_service.index_rows(model, [obj])
+    db.session.expunge(obj)  # ya trae todas las columnas (RETURNING): sin refresh tras commit
+    db.session.commit()
+    entity_cache.invalidate((model.__tablename__, entity_id))
+    return obj
+
+def update_loaded(model, entity_id: int, apply, expected_version: int | None):
+    """
+    Para cambios que necesitan la fila (derivados como end_at/IMC, métricas):
+    carga, aplica `apply(obj)` y el flush del ORM emite
+      UPDATE ... WHERE id = :id AND version_id = :leída
+    Si otro la cambió entre la lectura y el UPDATE -> StaleDataError -> 412.
+    """
+    obj = db.session.get(model, entity_id)
+    if obj is None:
+        return None
+    if expected_version is not None and obj.version_id != expected_version:
+        raise VersionConflict(obj.version_id)
+    apply(obj)
+    try:
+        db.session.commit()
+    except StaleDataError:
+        return _conflict_or_missing(model, entity_id)
+    return obj
@@ -0,0 +1,70 @@
+from datetime import datetime
+from sqlalchemy import select
+from ..extensions import db
+from ..models.prescription import Prescription
+from ..utils.downsample import bucket_stats, lttb
+from ..utils.time import UTC_TZ
+
+VITAL_FIELDS = ("temp_c", "bp_sys", "bp_dia", "heart_rate", "resp_rate", "bmi", "spo2")
+METHODS = ("lttb", "minmax")
+
+def _epoch_ms(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC_TZ)  # SQLite: naive en UTC (no la zona del servidor)
+    return int(dt.timestamp() * 1000)
+
+def vitals_series(patient_id: int, metrics: tuple[str, ...] = VITAL_FIELDS,
+                  start: datetime | None = None, end: datetime | None = None,
+                  points: int | None = None, method: str = "lttb") -> dict:
+    """
+    Serie de signos vitales de un paciente en formato columnar, por métrica:
+      lttb   -> {"t": [...], "v": [...]}
+      minmax -> {"t": [...], "mean": [...], "min": [...], "max": [...]}
+    t en epoch ms (UTC). Solo se reduce si la métrica tiene más de `points` valores.
+    """
+    cols = [getattr(Prescription, m) for m in metrics]
+    q = select(Prescription.issued_at, *cols).where(Prescription.patient_id == patient_id)
+    if start is not None:
+        q = q.where(Prescription.issued_at >= start)
+    if end is not None:
+        q = q.where(Prescription.issued_at <= end)
+    q = q.order_by(Prescription.issued_at, Prescription.id)
+
+    ts: list[int] = []
+    raw = {m: [] for m in metrics}
+    for row in db.session.execute(q):
+        ts.append(_epoch_ms(row[0]))
+        for m, v in zip(metrics, row[1:]):
+            raw[m].append(v)
+
+    series, downsampled = {}, False
+    for m in metrics:
+        # cada métrica por separado: no todas las recetas registran todos los signos
+        xs = [t for t, v in zip(ts, raw[m]) if v is not None]
+        ys = [v for v in raw[m] if v is not None]
+        if not points or len(xs) <= points:
+            series[m] = {"t": xs, "v": ys} if method == "lttb" else {
+                "t": xs, "mean": ys, "min": list(ys), "max": list(ys)
+            }
+            continue
+
+        downsampled = True
+        if method == "lttb":
+            idx = lttb(xs, ys, points)
+            series[m] = {"t": [xs[i] for i in idx], "v": [ys[i] for i in idx]}
+        else:
+            b = bucket_stats(xs, ys, points)
+            series[m] = {
+                "t": [int(x) for x in b["x"]],
+                "mean": [round(v, 2) for v in b["mean"]],
+                "min": b["min"],
+                "max": b["max"],
+            }
+
+    return {
+        "patient_id": patient_id,
+        "count": len(ts),
+        "method": method,
+        "downsampled": downsampled,
+        "series": series,
+    }
@@ -0,0 +1,68 @@
+import math
+
+# Reducción de series (x ascendente) para gráficas. Puro Python: las series
+# de signos vitales son de cientos/miles de puntos, no millones.
+
+def lttb(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """
+    Largest-Triangle-Three-Buckets: devuelve los índices de `threshold`
+    puntos que conservan la forma visual (picos incluidos).
+    Siempre incluye el primero y el último.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+    picked = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # promedio del siguiente bucket (tercer vértice del triángulo)
+        nxt_start = int(math.floor((i + 1) * every)) + 1
+        nxt_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        span = nxt_end - nxt_start
+        avg_x = sum(xs[nxt_start:nxt_end]) / span
+        avg_y = sum(ys[nxt_start:nxt_end]) / span
+
+        # punto del bucket actual que forma el triángulo de mayor área
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    picked.append(n - 1)
+    return picked
+
+def bucket_stats(xs: list[float], ys: list[float], buckets: int) -> dict[str, list]:
+    """
+    Divide el rango de x en `buckets` intervalos iguales y resume cada uno
+    con x promedio y mean/min/max de y. Los intervalos vacíos se omiten.
+    """
+    out = {"x": [], "mean": [], "min": [], "max": []}
+    n = len(xs)
+    if n == 0:
+        return out
+    if buckets >= n:
+        return {"x": list(xs), "mean": list(ys), "min": list(ys), "max": list(ys)}
+
+    x0 = xs[0]
+    width = (xs[-1] - x0) / buckets or 1
+    i = 0
+    for b in range(buckets):
+        limit = x0 + (b + 1) * width
+        j = i
+        while j < n and (xs[j] < limit or b == buckets - 1):
+            j += 1
+        if j > i:
+            seg_x, seg_y = xs[i:j], ys[i:j]
+            out["x"].append(sum(seg_x) / len(seg_x))
+            out["mean"].append(sum(seg_y) / len(seg_y))
+            out["min"].append(min(seg_y))
+            out["max"].append(max(seg_y))
+        i = j
+    return out
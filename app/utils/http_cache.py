@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime
+from flask import Response, request
+from sqlalchemy import func, select
+from sqlalchemy.orm import Query
+from ..extensions import db
+from .time import UTC_TZ
+
+# Datos clínicos (PHI): solo el navegador puede guardar la respuesta y
+# siempre revalida con ETag / Last-Modified (304 si no cambió).
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts, version: int | None = None) -> str:
+    """
+    Hash corto de `parts`. Con `version` (version_id de la fila) queda como
+    "<version>-<hash>", para que If-Match se pueda resolver sin leer la fila.
+    """
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+    return digest if version is None else f"{version}-{digest}"
+
+def if_match_version() -> int | None:
+    """
+    version_id esperado según If-Match. None si no viene (o es "*").
+    Un ETag que no es nuestro devuelve -1: nunca coincide (412).
+    """
+    if not request.if_match or request.if_match.star_tag:
+        return None
+    for tag in request.if_match.as_set():
+        head, sep, _ = tag.partition("-")
+        if sep and head.isdigit():
+            return int(head)
+    return -1
+
+def _utc(dt: datetime | None) -> datetime | None:
+    if dt is None:
+        return None
+    # SQLite devuelve naive (guardamos UTC)
+    return dt.replace(tzinfo=UTC_TZ) if dt.tzinfo is None else dt.astimezone(UTC_TZ)
+
+def _with_validators(resp: Response, etag: str, last_modified: datetime | None) -> Response:
+    resp.set_etag(etag)
+    if last_modified is not None:
+        resp.last_modified = last_modified
+    resp.headers["Cache-Control"] = CACHE_CONTROL
+    return resp
+
+def not_modified(etag: str, last_modified: datetime | None = None) -> Response | None:
+    """304 si el cliente ya tiene esta versión; si no, None. If-None-Match manda sobre If-Modified-Since."""
+    last_modified = _utc(last_modified)
+    if request.if_none_match:
+        hit = request.if_none_match.contains(etag)
+    else:
+        ims = request.if_modified_since
+        hit = ims is not None and last_modified is not None and last_modified.replace(microsecond=0) <= ims
+    if not hit:
+        return None
+    return _with_validators(Response(status=304), etag, last_modified)
+
+def conditional(result, etag: str, last_modified: datetime | None = None):
+    """Agrega ETag/Last-Modified/Cache-Control a lo que devuelven ok()/created()."""
+    resp, status = result if isinstance(result, tuple) else (result, None)
+    _with_validators(resp, etag, _utc(last_modified))
+    return (resp, status) if status is not None else resp
+
+def list_fingerprint(query) -> tuple[int, datetime | None]:
+    """
+    (count, max(updated_at)) del conjunto filtrado, sin paginar ni cargar filas.
+    Acepta Query (legacy) o select(); la entidad principal debe tener updated_at.
+    Solo para el ETag: un borrado no mueve max(updated_at), así que los listados
+    no mandan Last-Modified (un If-Modified-Since daría 304 con la lista vieja).
+    """
+    stmt = query.statement if isinstance(query, Query) else query
+    sub = stmt.order_by(None).limit(None).offset(None).subquery()
+    count, last = db.session.execute(select(func.count(), func.max(sub.c.updated_at))).one()
+    return count, _utc(last)
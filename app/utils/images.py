@@ -0,0 +1,75 @@
+import os
+import threading
+from PIL import Image, ImageOps
+
+# Derivados de fotos clínicas: nombre -> lado mayor máximo (px)
+DERIVATIVES = {
+    "full": 2048,
+    "medium": 1024,
+    "thumb": 256,
+}
+WEBP_QUALITY = 80
+# Comparativos antes/después: alto de cada panel y separación
+COMPARE_HEIGHT = 720
+COMPARE_GAP = 8
+
+def derivative_path(original: str, name: str) -> str:
+    """blobs/ab/cd/<sha>.jpg -> blobs/ab/cd/<sha>.thumb.webp (junto al original)."""
+    stem, _ = os.path.splitext(original)
+    return f"{stem}.{name}.webp"
+
+def _save_webp(im: Image.Image, dest: str) -> None:
+    # temporal único: dos procesos/hilos pueden generar el mismo archivo a la vez
+    tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    im.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+    os.replace(tmp, dest)
+
+def generate_derivatives(src: str) -> dict[str, str]:
+    """
+    Genera full/medium/thumb en WebP a partir de `src`. Corre en un proceso
+    aparte (ver image_service), así que solo depende de Pillow.
+    - JPEG: draft() decodifica ya reducido (1/2, 1/4, 1/8) al tamaño más grande pedido.
+    - Cada derivado sale del anterior, no del original completo.
+    Devuelve {nombre: ruta}. Los que ya existen no se regeneran.
+    """
+    targets = {name: derivative_path(src, name) for name in DERIVATIVES}
+    pending = {n: p for n, p in targets.items() if not os.path.exists(p)}
+    if not pending:
+        return targets
+
+    largest = max(DERIVATIVES.values())
+    with Image.open(src) as im:
+        if im.format == "JPEG":
+            im.draft("RGB", (largest, largest))
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "A" in im.getbands() else "RGB")
+
+        current = im
+        for name, size in sorted(DERIVATIVES.items(), key=lambda kv: -kv[1]):
+            current = current.copy()
+            # reducing_gap: reduce() entero primero y luego remuestreo fino
+            current.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+            if name in pending:
+                _save_webp(current, targets[name])
+    return targets
+
+def compose_side_by_side(left_src: str, right_src: str, dest: str,
+                         height: int = COMPARE_HEIGHT) -> str:
+    """Antes (izquierda) y después (derecha) al mismo alto, en un solo WebP."""
+    panels = []
+    for src in (left_src, right_src):
+        with Image.open(src) as im:
+            if im.format == "JPEG":
+                im.draft("RGB", (height, height))
+            im = ImageOps.exif_transpose(im).convert("RGB")
+            width = max(1, round(im.width * height / im.height))
+            panels.append(im.resize((width, height), Image.LANCZOS, reducing_gap=3.0))
+
+    canvas = Image.new("RGB", (sum(p.width for p in panels) + COMPARE_GAP, height), "white")
+    canvas.paste(panels[0], (0, 0))
+    canvas.paste(panels[1], (panels[0].width + COMPARE_GAP, 0))
+
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    _save_webp(canvas, dest)
+    return dest
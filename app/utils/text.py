@@ -0,0 +1,25 @@
+import re
+import unicodedata
+
+_WORD = re.compile(r"[a-z0-9]+")
+_NON_DIGIT = re.compile(r"\D")
+
+MAX_TERM_LENGTH = 64
+
+def fold(value: str | None) -> str:
+    """Minúsculas sin acentos: "José Núñez" -> "jose nunez"."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+def words(value: str | None) -> list[str]:
+    """Palabras alfanuméricas ya normalizadas con fold(), en orden."""
+    return [w[:MAX_TERM_LENGTH] for w in _WORD.findall(fold(value))]
+
+def phone_terms(value: str | None) -> list[str]:
+    """Número completo y últimos 10 dígitos (se busca sin lada +52)."""
+    digits = _NON_DIGIT.sub("", value or "")
+    if len(digits) < 2:
+        return []
+    return list(dict.fromkeys([digits, digits[-10:]]))
@@ -12,6 +12,10 @@ UTC_TZ = zoneinfo.ZoneInfo("UTC")
 def now_cdmx() -> datetime:
     return datetime.now(tz=CDMX_TZ)
 
+def age_on(dob: date, today: date) -> int:
+    """Años cumplidos en `today` (29/feb cumple el 1/mar). Usar today = now_cdmx().date()."""
+    return max(0, today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day)))
+
 def to_cdmx(dt: datetime) -> datetime:
     return dt.astimezone(CDMX_TZ) if dt.tzinfo else dt.replace(tzinfo=CDMX_TZ)
 
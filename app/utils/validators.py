@@ -1,16 +1,54 @@
+from functools import lru_cache
 from email_validator import validate_email, EmailNotValidError
 import phonenumbers
 
-def is_valid_email(email: str) -> bool:
+# phonenumbers.parse y email_validator son caros y los mismos valores se repiten
+# mucho (líneas de recepción, familiares): caché LRU acotada por proceso.
+CACHE_SIZE = 8192
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize_email(email: str) -> str | None:
     try:
-        validate_email(email, check_deliverability=False)
-        return True
+        info = validate_email(email, check_deliverability=False)
     except EmailNotValidError:
-        return False
+        return None
+    return info.normalized.lower()
 
-def is_valid_phone(number: str, region: str = "MX") -> bool:
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize_phone(number: str, region: str) -> str | None:
     try:
         p = phonenumbers.parse(number, region)
-        return phonenumbers.is_valid_number(p)
     except Exception:
-        return False
+        return None
+    if not phonenumbers.is_valid_number(p):
+        return None
+    return phonenumbers.format_number(p, phonenumbers.PhoneNumberFormat.E164)
+
+def normalize_email(email: str) -> str | None:
+    """Forma canónica (minúsculas, dominio IDNA normalizado) o None si es inválido."""
+    return _normalize_email(email.strip()) if email else None
+
+def normalize_phone(number: str, region: str = "MX") -> str | None:
+    """E.164 (+525512345678) o None si es inválido."""
+    return _normalize_phone(str(number).strip(), region.upper()) if number else None
+
+def is_valid_email(email: str) -> bool:
+    return normalize_email(email) is not None
+
+def is_valid_phone(number: str, region: str = "MX") -> bool:
+    return normalize_phone(number, region) is not None
+
+def cache_stats() -> dict:
+    """Aciertos/fallos de la caché en este proceso (worker)."""
+    out = {}
+    for name, fn in (("email", _normalize_email), ("phone", _normalize_phone)):
+        info = fn.cache_info()
+        lookups = info.hits + info.misses
+        out[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hit_rate": round(info.hits / lookups, 4) if lookups else None,
+        }
+    return out
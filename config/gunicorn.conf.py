@@ -1,10 +1,35 @@
-import multiprocessing, os
-bind = "0.0.0.0:10000"
+import gc, multiprocessing, os
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:10000")
 workers = int(os.getenv("WEB_CONCURRENCY", str(max(2, multiprocessing.cpu_count()))))
 threads = int(os.getenv("WEB_THREADS", "2"))
 timeout = int(os.getenv("WEB_TIMEOUT", "120"))
 graceful_timeout = 30
 keepalive = 5
-accesslog = "-"
+# El access log lo emite la app (JSON, con muestreo); GUNICORN_ACCESSLOG=- para reactivarlo
+accesslog = os.getenv("GUNICORN_ACCESSLOG") or None
 errorlog = "-"
 loglevel = os.getenv("LOG_LEVEL", "info")
+
+# Preload: el master importa la app una sola vez y los workers la heredan
+# por fork (copy-on-write). Reduce bastante el RSS único por worker.
+# Comparar con: flask --app manage memory-report
+preload_app = os.getenv("WEB_PRELOAD", "0") == "1"
+
+def when_ready(server):
+    # Con la app ya importada en el master, movemos todo a la generación
+    # permanente del GC para que los workers no toquen (y copien) esas páginas.
+    if server.cfg.preload_app:
+        gc.collect()
+        gc.freeze()
+
+def post_fork(server, worker):
+    # Pool de SQLAlchemy y storage del limiter vienen del master: se reinician.
+    if server.cfg.preload_app:
+        from app.extensions import reset_after_fork
+        reset_after_fork(server.app.wsgi())
+
+def post_worker_init(worker):
+    # Índice en memoria del autocompletado de pacientes: se construye al
+    # arrancar el worker (en segundo plano), no en la primera tecla.
+    from app.services.autocomplete_service import patient_index
+    patient_index.ensure_started(worker.wsgi)
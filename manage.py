@@ -1,3 +1,4 @@
+import os
 import click
 from flask.cli import with_appcontext
 from app import create_app
@@ -46,3 +47,208 @@ def create_admin():
     db.session.add(u)
     db.session.commit()
     click.echo(f"Admin creado: {u.id} ({u.username})")
+
+@app.cli.command("replica-sync")
+@with_appcontext
+def replica_sync():
+    """Copia la BD SQLite primaria a las réplicas SQLite (solo para pruebas locales)."""
+    import sqlite3
+
+    primary = db.engines[None]
+    if primary.dialect.name != "sqlite":
+        raise click.ClickException("Solo aplica cuando el primario es SQLite")
+    replicas = {k: e for k, e in db.engines.items() if k and k.startswith("replica_")}
+    if not replicas:
+        raise click.ClickException("Define DATABASE_REPLICA_URLS primero")
+
+    src = sqlite3.connect(primary.url.database)
+    try:
+        for key, engine in replicas.items():
+            if engine.dialect.name != "sqlite":
+                click.echo(f"{key}: no es SQLite, se omite", err=True)
+                continue
+            engine.dispose()
+            dst = sqlite3.connect(engine.url.database)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+            click.echo(f"{key}: sincronizada ({engine.url.database})")
+    finally:
+        src.close()
+
+@app.cli.command("stats-rebuild")
+@with_appcontext
+def stats_rebuild():
+    """Recalcula daily_stats desde pacientes, citas y recetas (usar en horario tranquilo)."""
+    from app.services.stats_service import rebuild
+    buckets = rebuild()
+    click.echo(f"daily_stats reconstruida: {buckets} contadores")
+
+@app.cli.command("patients-recompute-ages")
+@with_appcontext
+def patients_recompute_ages():
+    """Actualiza age_years de quienes cumplieron años desde la última corrida (cron diario)."""
+    from app.services.patient_service import recompute_ages
+    click.echo(f"Edades actualizadas: {recompute_ages()}")
+
+@app.cli.command("patients-import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--dry-run", is_flag=True, help="Valida e inserta pero no hace commit.")
+@with_appcontext
+def patients_import(path, dry_run):
+    """Importa pacientes desde .csv o .xlsx (sin el límite de tamaño de la API)."""
+    import json
+    from app.services import import_service
+    fmt = path.rsplit(".", 1)[-1].lower()
+    if fmt not in import_service.READERS:
+        raise click.BadParameter("usa .csv o .xlsx", param_hint="path")
+    cfg = app.config
+    with open(path, "rb") as fh:
+        report = import_service.import_patients(
+            import_service.READERS[fmt](fh),
+            workers=cfg.get("PATIENT_IMPORT_WORKERS", 2),
+            chunk_size=cfg.get("PATIENT_IMPORT_CHUNK", 2000),
+            max_errors=cfg.get("PATIENT_IMPORT_MAX_ERRORS", 1000),
+            dry_run=dry_run,
+        )
+    click.echo(json.dumps(report, ensure_ascii=False, default=str, indent=2))
+
+@app.cli.command("patients-purge")
+@click.option("--older-than-days", type=int, default=None, help="Default: PATIENT_PURGE_AFTER_DAYS.")
+@click.option("--batch-size", type=int, default=None, help="Filas por DELETE. Default: PURGE_BATCH_SIZE.")
+@click.option("--pause", type=float, default=None, help="Segundos entre lotes. Default: PURGE_PAUSE_SECONDS.")
+@click.option("--limit", type=int, default=None, help="Máximo de pacientes en esta corrida.")
+@with_appcontext
+def patients_purge(older_than_days, batch_size, pause, limit):
+    """Borra físicamente pacientes dados de baja (y sus dependencias) en lotes (cron diario)."""
+    from app.services.purge_service import purge_deleted
+    cfg = app.config
+
+    def progress(table, patient_id, deleted):
+        click.echo(f"  {table}: paciente {patient_id}, {deleted} borradas")
+
+    counts = purge_deleted(
+        older_than_days=older_than_days if older_than_days is not None else cfg.get("PATIENT_PURGE_AFTER_DAYS", 30),
+        batch_size=batch_size or cfg.get("PURGE_BATCH_SIZE", 500),
+        pause=pause if pause is not None else cfg.get("PURGE_PAUSE_SECONDS", 0.2),
+        limit=limit,
+        progress=progress,
+    )
+    click.echo("Purga terminada: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+@app.cli.command("idempotency-cleanup")
+@with_appcontext
+def idempotency_cleanup():
+    """Borra respuestas guardadas por Idempotency-Key ya vencidas (cron)."""
+    from app.services.idempotency_service import purge_expired
+    click.echo(f"Llaves vencidas borradas: {purge_expired()}")
+
+@app.cli.command("changes-prune")
+@click.option("--older-than-days", type=int, default=None, help="Default: CHANGE_LOG_RETENTION_DAYS.")
+@with_appcontext
+def changes_prune(older_than_days):
+    """Borra de change_log los cambios más viejos que la retención (cron diario)."""
+    from app.services.change_service import prune
+    cfg = app.config
+    deleted = prune(
+        older_than_days if older_than_days is not None else cfg.get("CHANGE_LOG_RETENTION_DAYS", 30),
+        batch_size=cfg.get("CHANGE_LOG_PRUNE_BATCH", 5000),
+        pause=cfg.get("PURGE_PAUSE_SECONDS", 0.2),
+    )
+    click.echo(f"Cambios podados: {deleted}")
+
+@app.cli.command("search-reindex")
+@click.option("--batch-size", type=int, default=1000, show_default=True)
+@with_appcontext
+def search_reindex(batch_size):
+    """Reconstruye search_terms (búsqueda global) desde las tablas."""
+    from app.services.search_service import reindex
+
+    def progress(entity, done):
+        click.echo(f"  {entity}: {done}")
+
+    counts = reindex(batch_size=batch_size, progress=progress)
+    click.echo("Índice reconstruido: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+def _proc_children(ppid: int) -> list[int]:
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                # el nombre va entre paréntesis y puede traer espacios
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == ppid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+def _proc_memory_kb(pid: int) -> dict:
+    mem = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                mem[key] = int(rest.split()[0])
+    mem["Uss"] = mem.get("Private_Clean", 0) + mem.get("Private_Dirty", 0)
+    return mem
+
+def _measure_gunicorn(preload: bool, workers: int, port: int) -> list[dict]:
+    import subprocess, time, urllib.request
+
+    env = dict(
+        os.environ,
+        WEB_PRELOAD="1" if preload else "0",
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+    )
+    root = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen(
+        ["gunicorn", "-c", "config/gunicorn.conf.py", "wsgi:app"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if len(_proc_children(proc.pid)) >= workers:
+                try:
+                    # unas cuantas peticiones para que cada worker "caliente"
+                    for _ in range(workers * 4):
+                        urllib.request.urlopen(f"http://127.0.0.1:{port}/api/v1/health", timeout=2).read()
+                    break
+                except OSError:
+                    pass
+            time.sleep(0.5)
+        else:
+            raise click.ClickException("gunicorn no levantó a tiempo")
+        time.sleep(1)
+        return [dict(pid=pid, **_proc_memory_kb(pid)) for pid in _proc_children(proc.pid)]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+@app.cli.command("memory-report")
+@click.option("--workers", default=4, show_default=True, help="Workers de gunicorn a levantar.")
+@click.option("--port", default=18000, show_default=True, help="Puerto local para las pruebas.")
+def memory_report(workers, port):
+    """Compara RSS/PSS/USS por worker con y sin preload_app (solo Linux)."""
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise click.ClickException("Requiere Linux con /proc/<pid>/smaps_rollup")
+
+    summary = {}
+    for preload in (False, True):
+        label = "preload" if preload else "sin preload"
+        rows = _measure_gunicorn(preload, workers, port)
+        click.echo(f"\n== {label} ({len(rows)} workers) ==")
+        click.echo(f"{'pid':>8} {'RSS MiB':>9} {'PSS MiB':>9} {'USS MiB':>9}")
+        for r in rows:
+            click.echo(f"{r['pid']:>8} {r['Rss'] / 1024:>9.1f} {r['Pss'] / 1024:>9.1f} {r['Uss'] / 1024:>9.1f}")
+        uss = [r["Uss"] for r in rows] or [0]
+        summary[label] = sum(uss) / len(uss) / 1024
+
+    click.echo("\n== USS promedio por worker ==")
+    for label, value in summary.items():
+        click.echo(f"{label:>12}: {value:.1f} MiB")
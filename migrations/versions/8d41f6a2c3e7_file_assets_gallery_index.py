@@ -0,0 +1,38 @@
+"""file assets gallery index
+
+Revision ID: 8d41f6a2c3e7
+Revises: 3b7e2c9a1f04
+Create Date: 2026-10-19 11:02:47.518230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f6a2c3e7'
+down_revision = '3b7e2c9a1f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mismo orden que list_files para que la galería salga del índice sin sort.
+    # SQLite no acepta NULLS FIRST en índices (y ya ordena NULLs primero).
+    if op.get_bind().dialect.name == 'postgresql':
+        phase, order = sa.text('photo_phase ASC NULLS FIRST'), sa.text('photo_order ASC NULLS FIRST')
+    else:
+        phase, order = 'photo_phase', 'photo_order'
+    op.create_index(
+        'ix_file_assets_gallery', 'file_assets',
+        ['patient_id', 'kind', phase, order, sa.text('id DESC')], unique=False,
+    )
+    # patient_id queda cubierto por el prefijo del índice compuesto
+    with op.batch_alter_table('file_assets', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_file_assets_patient_id'))
+
+
+def downgrade():
+    with op.batch_alter_table('file_assets', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_file_assets_patient_id'), ['patient_id'], unique=False)
+    op.drop_index('ix_file_assets_gallery', table_name='file_assets')
@@ -0,0 +1,29 @@
+"""prescriptions patient issued index
+
+Revision ID: e4b8d2a61f93
+Revises: c5a9e1d7b204
+Create Date: 2026-10-19 15:58:12.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8d2a61f93'
+down_revision = 'c5a9e1d7b204'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('prescriptions', schema=None) as batch_op:
+        batch_op.create_index('ix_prescriptions_patient_issued', ['patient_id', 'issued_at'], unique=False)
+        # patient_id queda cubierto por el prefijo del índice compuesto
+        batch_op.drop_index(batch_op.f('ix_prescriptions_patient_id'))
+
+
+def downgrade():
+    with op.batch_alter_table('prescriptions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_prescriptions_patient_id'), ['patient_id'], unique=False)
+        batch_op.drop_index('ix_prescriptions_patient_issued')
@@ -0,0 +1,107 @@
+import os
+import tempfile
+
+import pytest
+
+# La config se lee al importar app.config: el entorno de pruebas va primero
+_TMP = tempfile.mkdtemp(prefix="medsystem-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TMP}/test.db",
+    "DATABASE_REPLICA_URLS": "",
+    "MEDIA_ROOT": f"{_TMP}/media",
+    "RATE_LIMIT_DEFAULT": "100000 per minute",
+    "HEALTH_REQUIRE_MIGRATIONS": "0",
+    "IMAGE_DERIVATIVE_WORKERS": "0",
+    "PATIENT_IMPORT_WORKERS": "0",
+    "AUTOCOMPLETE_SYNC_INTERVAL": "0.05",
+    "SSE_POLL_INTERVAL": "0.05",
+    "LOG_LEVEL": "WARNING",
+})
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models.change_log import ChangeSeq  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.services.cache_service import LRUTier, entity_cache  # noqa: E402
+
+PATIENT = {
+    "first_name": "Ana",
+    "last_name": "López",
+    "date_of_birth": "1990-05-01",
+    "sex": "F",
+    "phone": "+52 222 123 4567",
+    "email": "ana@example.com",
+    "weight_kg": 60,
+    "height_m": 1.6,
+    "treatments_of_interest": "Control de peso",
+    "privacy_notice_accepted": True,
+    "informed_consent_accepted": True,
+}
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+@pytest.fixture(autouse=True)
+def _clean_db(app):
+    """
+    Cada prueba arranca con tablas vacías. El contador de change_log se
+    conserva: los hilos que lo siguen (SSE) nunca ven retroceder el seq.
+    """
+    with app.app_context():
+        db.session.remove()
+        for table in reversed(db.metadata.sorted_tables):
+            if table.name != ChangeSeq.__tablename__:
+                db.session.execute(delete(table))
+        db.session.commit()
+        db.session.remove()
+    for tier in entity_cache.tiers:
+        if isinstance(tier, LRUTier):
+            tier._data.clear()
+    yield
+
+def _user(role: UserRole, username: str) -> User:
+    u = User(first_name="Prueba", last_name=role.value, email=f"{username}@example.com",
+             username=username, password_hash="x", role=role, is_active=True)
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+def _headers_for(app, role: UserRole, username: str) -> dict:
+    with app.app_context():
+        u = _user(role, username)
+        token = create_access_token(identity=str(u.id), additional_claims={"role": role.value, "uid": u.id})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_headers(app):
+    return _headers_for(app, UserRole.ADMIN, "admin")
+
+@pytest.fixture
+def nurse_headers(app):
+    return _headers_for(app, UserRole.NURSE, "nurse")
+
+@pytest.fixture
+def make_patient(client, admin_headers):
+    counter = iter(range(1, 10_000))
+
+    def make(**fields) -> int:
+        n = next(counter)
+        payload = dict(PATIENT, email=f"paciente{n}@example.com", **fields)
+        resp = client.post("/api/v1/patients", json=payload, headers=admin_headers)
+        assert resp.status_code == 201, resp.get_json()
+        return resp.get_json()["data"]["id"]
+    return make
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+STREAM = "/api/v1/appointments/stream"
+
+@pytest.fixture
+def short_streams(app, monkeypatch):
+    # Si algo bufferiza el cuerpo, la primera respuesta tardaría esto
+    monkeypatch.setitem(app.config, "SSE_MAX_SECONDS", 5)
+    monkeypatch.setitem(app.config, "SSE_KEEPALIVE_SECONDS", 0.2)
+
+def _appointment(client, headers, patient_id, start_at="2026-10-20T10:00:00"):
+    resp = client.post("/api/v1/appointments", json={
+        "patient_id": patient_id, "title": "Valoración", "start_at": start_at, "duration_min": 30,
+    }, headers=headers)
+    assert resp.status_code == 201, resp.get_json()
+    return resp.get_json()["data"]["id"]
+
+def _next_event(chunks, timeout: float = 3) -> str:
+    """Siguiente evento (ignora comentarios `: ping` y el `retry:` inicial)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        chunk = next(chunks).decode()
+        if chunk.startswith("id: "):
+            return chunk
+    raise AssertionError("no llegó ningún evento")
+
+def test_stream_sends_first_bytes_immediately(client, admin_headers, short_streams):
+    started = time.monotonic()
+    resp = client.get(STREAM, headers=admin_headers, buffered=False)
+    try:
+        assert resp.status_code == 200
+        assert resp.mimetype == "text/event-stream"
+        assert next(resp.response).decode().startswith("retry: ")
+        assert time.monotonic() - started < 2
+    finally:
+        resp.close()
+
+def test_stream_replays_backlog_then_delivers_live_events(client, admin_headers, make_patient, short_streams):
+    pid = make_patient()
+    first = _appointment(client, admin_headers, pid)
+
+    started = time.monotonic()
+    resp = client.get(STREAM, headers=dict(admin_headers, **{"Last-Event-ID": "0"}), buffered=False)
+    try:
+        chunks = iter(resp.response)
+        replayed = _next_event(chunks)
+        assert time.monotonic() - started < 2
+        assert '"op":"insert"' in replayed and f'"id":{first}' in replayed
+
+        second = _appointment(client, admin_headers, pid, "2026-10-21T10:00:00")
+        live = _next_event(chunks)
+        assert f'"id":{second}' in live
+    finally:
+        resp.close()
+
+def test_stream_rejects_clients_over_the_cap(app, client, admin_headers, short_streams, monkeypatch):
+    from app.services.stream_service import hub
+    monkeypatch.setattr(hub, "max_clients", 1)
+
+    resp = client.get(STREAM, headers=admin_headers, buffered=False)
+    try:
+        second = client.get(STREAM, headers=admin_headers)
+        assert second.status_code == 503
+        assert second.headers["Retry-After"]
+    finally:
+        resp.close()
+    again = client.get(STREAM, headers=admin_headers, buffered=False)
+    assert again.status_code == 200
+    again.close()
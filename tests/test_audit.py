@@ -0,0 +1,56 @@
+import queue
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.audit_log import AuditLog
+from app.services.audit_service import AuditWriter
+
+
+def _events(app, since: datetime, expected: int, timeout: float = 5.0):
+    """
+    El escritor va en segundo plano: espera a que lleguen. Solo cuenta eventos
+    desde `since` (los de pruebas anteriores pueden llegar tarde).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with app.app_context():
+            rows = db.session.execute(select(AuditLog).order_by(AuditLog.id)).scalars().all()
+            db.session.expunge_all()
+        rows = [r for r in rows if r.occurred_at.replace(tzinfo=timezone.utc) >= since]
+        if len(rows) >= expected or time.monotonic() > deadline:
+            return rows
+        time.sleep(0.05)
+
+
+def test_patient_reads_and_writes_are_audited(app, client, admin_headers, make_patient):
+    since = datetime.now(timezone.utc)
+    pid = make_patient()
+    client.get(f"/api/v1/patients/{pid}", headers=admin_headers)
+    client.post("/api/v1/appointments", headers=admin_headers, json={
+        "patient_id": pid, "title": "Consulta", "start_at": "2026-10-19T10:00:00", "duration_min": 30,
+    })
+    client.get(f"/api/v1/patients/{pid}")  # sin token: 401, no se audita
+
+    rows = _events(app, since, 3)
+    assert [(r.action, r.entity, r.entity_id, r.patient_id, r.status) for r in rows] == [
+        ("create", "patients", None, pid, 201),
+        ("read", "patients", pid, pid, 200),
+        ("create", "appointments", None, pid, 201),
+    ]
+    assert rows[0].user_role == "admin" and rows[0].request_id
+
+
+def test_full_buffer_drops_instead_of_blocking():
+    w = AuditWriter()
+    w.configure(SimpleNamespace(config={"AUDIT_BUFFER_SIZE": 1, "AUDIT_ENQUEUE_TIMEOUT": 0.01}))
+    w._queue = queue.Queue(maxsize=1)
+    row = {"method": "GET", "path": "/api/v1/patients/1"}
+    w.submit(row)
+    t0 = time.monotonic()
+    w.submit(row)
+    assert time.monotonic() - t0 < 0.5
+    assert w.stats()["pending"] == 1 and w.stats()["dropped"] == 1
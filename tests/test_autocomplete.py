@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from app.extensions import db
+from app.services.autocomplete_service import PatientIndex
+
+URL = "/api/v1/patients/autocomplete"
+
+@pytest.fixture
+def index(app):
+    """Índice propio por prueba (el global del worker sigue otra BD limpia)."""
+    idx = PatientIndex()
+    idx.configure(app)
+    with app.app_context(), db.engine.connect() as conn:
+        idx._load(conn)
+    return idx
+
+def _sync(app, idx):
+    with app.app_context(), db.engine.connect() as conn:
+        idx._sync(conn)
+
+def test_sync_advances_cursor_past_non_patient_changes(app, client, admin_headers, make_patient, index, monkeypatch):
+    pid = make_patient()
+    _sync(app, index)
+    after_patient = index.last_seq
+
+    for day in range(20, 23):
+        client.post("/api/v1/appointments", json={
+            "patient_id": pid, "title": "Control", "start_at": f"2026-10-{day}T10:00:00", "duration_min": 30,
+        }, headers=admin_headers)
+    _sync(app, index)
+    assert index.last_seq > after_patient
+
+    # la siguiente vuelta ya no relee las citas
+    import app.services.autocomplete_service as svc
+    seen = []
+    real = svc.changes_since
+    monkeypatch.setattr(svc, "changes_since", lambda cursor, *a, **kw: seen.append(cursor) or real(cursor, *a, **kw))
+    _sync(app, index)
+    with app.app_context(), db.engine.connect() as conn:
+        assert seen == [svc.head(conn)]
+
+def test_sync_applies_patient_changes(app, client, admin_headers, make_patient, index):
+    pid = make_patient(first_name="Ana María", last_name="López García")
+    _sync(app, index)
+    assert [r[0] for r in index.lookup("ana lopez", 5)] == [pid]
+
+    client.patch(f"/api/v1/patients/{pid}", json={"last_name": "Martínez"}, headers=admin_headers)
+    _sync(app, index)
+    assert index.lookup("lopez", 5) == []
+    assert [r[0] for r in index.lookup("mart", 5)] == [pid]
+
+    client.delete(f"/api/v1/patients/{pid}", headers=admin_headers)
+    _sync(app, index)
+    assert index.lookup("mart", 5) == []
+
+def test_lookup_matches_words_in_any_order(make_patient, index, app):
+    ana = make_patient(first_name="Ana María", last_name="López García")
+    make_patient(first_name="Anabel", last_name="Lopera")
+    _sync(app, index)
+
+    for q in ("ana lopez", "lopez ana", "garcia ma", "ANA  LÓPEZ"):
+        assert [r[0] for r in index.lookup(q, 5)] == [ana], q
+    assert index.lookup("ana lopez x", 5) == []
+
+def test_autocomplete_endpoint(client, nurse_headers, make_patient):
+    pid = make_patient(first_name="Beto", last_name="Anaya")
+    deadline = time.monotonic() + 3  # el hilo del worker aplica change_log cada 50 ms
+    while True:
+        resp = client.get(f"{URL}?q=anay", headers=nurse_headers)
+        assert resp.status_code in (200, 503)
+        found = resp.status_code == 200 and pid in [p["id"] for p in resp.get_json()["data"]["items"]]
+        if found or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert found
+
+def _bulk_load(idx, names):
+    """Carga sintética directa (sin BD) con la misma ruta que usa _sync."""
+    from types import SimpleNamespace
+    live = {pid: SimpleNamespace(first_name=f, last_name=l) for pid, (f, l) in names.items()}
+    idx._apply(set(live), live)
+
+def test_lookup_bisects_on_the_longest_word_and_caps_the_scan(index):
+    names = {i: (f"Ma{i:05d}", "Pérez") for i in range(1, 5001)}
+    names[9001] = ("María", "Zúñiga")
+    _bulk_load(index, names)
+
+    # "zuniga" es la palabra más selectiva: no recorre los 5000 "ma..."
+    assert [r[0] for r in index.lookup("ma zuniga", 5)] == [9001]
+
+    index.max_scan = 100
+    assert len(index.lookup("ma perez", 500)) == 100  # se corta tras 100 llaves
+
+def test_apply_replaces_and_removes_in_one_pass(index):
+    from types import SimpleNamespace
+    _bulk_load(index, {1: ("Ana", "López"), 2: ("Beto", "Anaya"), 3: ("Carla", "Ruiz")})
+    index._apply({1, 2}, {1: SimpleNamespace(first_name="Ana", last_name="Martínez")})
+
+    assert index._keys == sorted(index._keys)
+    assert len(index._keys) == len(index._ids) == 4  # Ana Martínez (2) + Carla Ruiz (2)
+    assert [r[0] for r in index.lookup("mart", 5)] == [1]
+    assert index.lookup("anaya", 5) == [] and index.lookup("lopez", 5) == []
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.change_log import ChangeLog
+from app.services import change_service
+
+URL = "/api/v1/changes"
+
+
+def _feed(client, headers, **params):
+    resp = client.get(URL, query_string=params, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()["data"]
+
+
+def test_upserts_and_tombstones_since_cursor(client, admin_headers, make_patient):
+    cursor = _feed(client, admin_headers)["next_cursor"]
+    a = make_patient()
+    client.patch(f"/api/v1/patients/{a}", json={"first_name": "Ada"}, headers=admin_headers)
+    b = make_patient()
+    client.delete(f"/api/v1/patients/{b}", headers=admin_headers)
+
+    page = _feed(client, admin_headers, since=cursor)
+    # una entrada por entidad, con su estado actual
+    assert [(i["entity"], i["id"], i["op"]) for i in page["items"]] == [
+        ("patients", a, "upsert"), ("patients", b, "delete"),
+    ]
+    assert page["items"][0]["data"]["first_name"] == "Ada"
+    assert "data" not in page["items"][1]
+    assert page["has_more"] is False
+
+    # al día: nada nuevo y el cursor no retrocede
+    again = _feed(client, admin_headers, since=page["next_cursor"])
+    assert again["items"] == [] and again["next_cursor"] == page["next_cursor"]
+
+
+def test_paging_advances_the_cursor(client, admin_headers, make_patient):
+    cursor = _feed(client, admin_headers)["next_cursor"]
+    ids = [make_patient() for _ in range(3)]
+    seen = []
+    while True:
+        page = _feed(client, admin_headers, since=cursor, limit=1)
+        seen += [i["id"] for i in page["items"]]
+        assert page["next_cursor"] > cursor if page["items"] else page["next_cursor"] == cursor
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == ids
+
+
+def test_entity_filter_still_moves_the_cursor(client, admin_headers, make_patient):
+    cursor = _feed(client, admin_headers)["next_cursor"]
+    make_patient()
+    page = _feed(client, admin_headers, since=cursor, entities="appointments")
+    assert page["items"] == []
+    assert page["next_cursor"] > cursor
+
+    resp = client.get(URL, query_string={"since": cursor, "entities": "nope"}, headers=admin_headers)
+    assert resp.status_code == 400
+
+
+def test_pruned_cursor_is_gone_but_a_future_one_is_not(app, client, admin_headers, make_patient):
+    old = _feed(client, admin_headers)["next_cursor"]
+    make_patient()
+    make_patient()
+    with app.app_context():
+        db.session.execute(update(ChangeLog).values(occurred_at=datetime.now(timezone.utc) - timedelta(days=40)))
+        db.session.commit()
+        assert change_service.prune(older_than_days=30, batch_size=1) == 2
+
+    assert client.get(URL, query_string={"since": old}, headers=admin_headers).status_code == 410
+
+    # nueva descarga completa: el cursor de GET /changes ya no expira
+    fresh = _feed(client, admin_headers)["next_cursor"]
+    assert fresh > old
+    assert _feed(client, admin_headers, since=fresh)["items"] == []
+    pid = make_patient()
+    assert [i["id"] for i in _feed(client, admin_headers, since=fresh)["items"]] == [pid]
+
+    # un cursor adelantado (réplica atrasada) no expira: vuelve tal cual
+    ahead = fresh + 1000
+    assert _feed(client, admin_headers, since=ahead)["next_cursor"] == ahead
@@ -0,0 +1,106 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.coalesce_service import SingleFlight, flight
+
+
+@pytest.fixture
+def sf():
+    s = SingleFlight()
+    s.configure(SimpleNamespace(config={"COALESCE_TTL_SECONDS": 0.5, "COALESCE_WAIT_SECONDS": 5}))
+    return s
+
+
+def _run_together(n, target):
+    results = [None] * n
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+def test_identical_calls_in_flight_run_once(sf):
+    release, calls = threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return b"dia", 200, []
+
+    threading.Timer(0.2, release.set).start()
+    results = _run_together(8, lambda: sf.do(("citas", "hoy"), slow))
+    assert len(calls) == 1
+    assert results == [(b"dia", 200, [])] * 8
+    stats = sf.stats()
+    assert stats["executed"] == 1 and stats["coalesced"] + stats["recent_hits"] == 7
+
+    # dentro del micro-TTL: sin ejecutar; fuera de él se vuelve a ejecutar
+    assert sf.do(("citas", "hoy"), slow) == (b"dia", 200, [])
+    assert len(calls) == 1
+    sf.ttl = 0
+    sf.clear_recent()
+    sf.do(("citas", "hoy"), slow)
+    assert len(calls) == 2
+
+
+def test_followers_run_on_their_own_if_the_leader_fails(sf):
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+            raise RuntimeError("bd caída")
+        return b"ok", 200, []
+
+    errors = []
+
+    def lead():
+        try:
+            sf.do(("k",), fn)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    follower = []
+    t = threading.Thread(target=lambda: follower.append(sf.do(("k",), fn)))
+    t.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(5)
+    t.join(5)
+    assert len(errors) == 1 and follower == [(b"ok", 200, [])]
+    assert sf.stats()["fallbacks"] == 1
+
+
+def test_server_errors_are_not_reused(sf):
+    calls = []
+
+    def boom():
+        calls.append(1)
+        return b"", 503, []
+
+    sf.do(("k",), boom)
+    sf.do(("k",), boom)
+    assert len(calls) == 2
+
+
+def test_a_write_drops_recent_responses(client, admin_headers, make_patient):
+    url = "/api/v1/appointments?start=2026-10-19&end=2026-10-19"
+    flight.clear_recent()
+    before = flight.stats()["recent_hits"]
+    assert client.get(url, headers=admin_headers).status_code == 200
+    assert client.get(url, headers=admin_headers).status_code == 200
+    assert flight.stats()["recent_hits"] == before + 1
+
+    make_patient()  # POST exitoso en este worker
+    assert client.get(url, headers=admin_headers).status_code == 200
+    assert flight.stats()["recent_hits"] == before + 1
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+
+from app import db_routing
+from app.db_routing import RoutingSession, pick_replica
+
+@pytest.fixture
+def engines():
+    primary = sa.create_engine("sqlite://")
+    return {None: primary, "replica_0": sa.create_engine("sqlite://"), "replica_1": sa.create_engine("sqlite://")}
+
+@pytest.fixture
+def lags(monkeypatch):
+    """Lag simulado por bind (None = réplica caída)."""
+    values = {"replica_0": 0.0, "replica_1": 0.0}
+    monkeypatch.setattr(db_routing, "replica_lag", lambda key, engine: values[key])
+    return values
+
+def _session(engines) -> RoutingSession:
+    return RoutingSession(SimpleNamespace(engines=engines))
+
+_READ = sa.select(sa.literal(1))
+_WRITE = sa.table("t", sa.column("x")).update().values(x=1)
+
+def test_get_reads_use_one_replica_for_the_whole_request(app, engines, lags):
+    with app.test_request_context("/", method="GET"):
+        session = _session(engines)
+        picked = {session.get_bind(clause=_READ) for _ in range(5)}
+        assert len(picked) == 1
+        assert picked.pop() in (engines["replica_0"], engines["replica_1"])
+
+        session.close()  # db.session.remove(): la siguiente petición vuelve a elegir
+        assert session._replica is None
+
+def test_lagging_replicas_are_skipped(app, engines, lags):
+    lags.update(replica_0=60.0, replica_1=None)
+    with app.test_request_context("/", method="GET"):
+        assert pick_replica(engines) is None
+        assert _session(engines).get_bind(clause=_READ) is engines[None]
+
+    lags.update(replica_0=0.5)
+    with app.test_request_context("/", method="GET"):
+        assert pick_replica(engines) is engines["replica_0"]
+
+def test_writes_pin_the_session_to_the_primary(app, engines, lags):
+    with app.test_request_context("/", method="GET"):
+        session = _session(engines)
+        assert session.get_bind(clause=_READ) is not engines[None]
+        assert session.get_bind(clause=_WRITE) is engines[None]
+        # read-after-write: lo que sigue también va al primario
+        assert session.get_bind(clause=_READ) is engines[None]
+
+def test_non_get_requests_read_from_the_primary(app, engines, lags):
+    with app.test_request_context("/", method="POST"):
+        assert _session(engines).get_bind(clause=_READ) is engines[None]
+    # fuera de una petición (CLI, hilos de fondo) también
+    assert _session(engines).get_bind(clause=_READ) is engines[None]
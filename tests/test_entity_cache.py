@@ -0,0 +1,51 @@
+from datetime import date
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.patient import Patient
+from app.services import patient_service
+from app.services.cache_service import LRUTier, entity_cache
+
+
+def _get(client, headers, pid):
+    resp = client.get(f"/api/v1/patients/{pid}", headers=headers)
+    assert resp.status_code == 200
+    return resp.get_json()["data"]
+
+
+def test_detail_is_served_from_cache_until_it_changes(client, admin_headers, make_patient):
+    pid = make_patient()
+    _get(client, admin_headers, pid)
+    hits = entity_cache.stats()["hits"]["lru"]
+    assert _get(client, admin_headers, pid)["first_name"] == "Ana"
+    assert entity_cache.stats()["hits"]["lru"] == hits + 1
+
+    # PATCH por UPDATE ... RETURNING (sin evento after_update del ORM)
+    client.patch(f"/api/v1/patients/{pid}", json={"first_name": "Eva"}, headers=admin_headers)
+    assert _get(client, admin_headers, pid)["first_name"] == "Eva"
+    # PATCH por flush del ORM (IMC)
+    client.patch(f"/api/v1/patients/{pid}", json={"weight_kg": 64}, headers=admin_headers)
+    assert _get(client, admin_headers, pid)["bmi"] == 25.0
+
+
+def test_bulk_updates_bump_the_version(app, client, admin_headers, make_patient):
+    pid = make_patient(date_of_birth="1990-10-19")
+    with app.app_context():
+        db.session.execute(update(Patient).where(Patient.id == pid).values(age_years=35))
+        db.session.commit()
+    stale = _get(client, admin_headers, pid)["age_years"]  # queda en caché
+    assert stale == 35
+    with app.app_context():
+        patient_service.recompute_ages(today=date(2026, 10, 19))
+    assert _get(client, admin_headers, pid)["age_years"] == 36
+
+
+def test_lru_evicts_the_least_recently_used():
+    lru = LRUTier(2)
+    lru.set("a", ("1", {}))
+    lru.set("b", ("1", {}))
+    lru.get("a")
+    lru.set("c", ("1", {}))
+    assert lru.get("b") is None and lru.get("a") is not None
+    assert lru.evictions == 1
@@ -0,0 +1,106 @@
+import hashlib
+import io
+import os
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.change_log import ChangeLog
+from app.services.storage_service import blob_lock
+
+PDF = b"%PDF-1.4\n" + b"contenido clinico " * 200
+
+def _upload(client, headers, patient_id, data=PDF, kind="document", name="estudio.pdf"):
+    return client.post(f"/api/v1/patients/{patient_id}/files", data={
+        "kind": kind, "file": (io.BytesIO(data), name),
+    }, headers=headers, content_type="multipart/form-data")
+
+def _blob_path(app, asset) -> str:
+    return os.path.join(app.config["MEDIA_ROOT"], asset["url"].split("/media/", 1)[1])
+
+def test_same_content_is_stored_once(app, client, admin_headers, make_patient):
+    a, b = make_patient(), make_patient()
+    first = _upload(client, admin_headers, a)
+    second = _upload(client, admin_headers, b)
+    assert first.status_code == second.status_code == 201
+    assert first.get_json()["deduplicated"] is False
+    assert second.get_json()["deduplicated"] is True
+    assert first.get_json()["data"]["url"] == second.get_json()["data"]["url"]
+
+    # borrar una referencia conserva el blob; borrar la última lo libera
+    path = _blob_path(app, first.get_json()["data"])
+    client.delete(f"/api/v1/files/{first.get_json()['data']['id']}", headers=admin_headers)
+    assert os.path.exists(path)
+    client.delete(f"/api/v1/files/{second.get_json()['data']['id']}", headers=admin_headers)
+    assert not os.path.exists(path)
+
+def test_unsupported_content_is_rejected_by_magic_bytes(client, admin_headers, make_patient):
+    pid = make_patient()
+    resp = _upload(client, admin_headers, pid, data=b"MZ\x90\x00 no es pdf", name="falso.pdf")
+    assert resp.status_code == 415
+
+def test_delete_waits_for_an_upload_holding_the_blob_lock(app, client, admin_headers, make_patient):
+    pid = make_patient()
+    asset = _upload(client, admin_headers, pid).get_json()["data"]
+    path = _blob_path(app, asset)
+
+    done = []
+    with app.app_context(), blob_lock(asset["content_sha256"]):
+        worker = threading.Thread(target=lambda: done.append(
+            app.test_client().delete(f"/api/v1/files/{asset['id']}", headers=admin_headers).status_code
+        ))
+        worker.start()
+        time.sleep(0.3)
+        assert done == [] and os.path.exists(path)
+    worker.join(5)
+    assert done == [200] and not os.path.exists(path)
+
+def test_failed_commit_releases_the_fresh_blob(app, client, admin_headers, make_patient, monkeypatch):
+    pid = make_patient()
+    data = b"%PDF-1.4\nsolo una vez"
+
+    def boom():
+        raise RuntimeError("commit falló")
+    monkeypatch.setattr(db.session, "commit", boom)
+    with pytest.raises(RuntimeError):
+        _upload(client, admin_headers, pid, data=data)
+    monkeypatch.undo()
+
+    blobs = [f for _, _, files in os.walk(os.path.join(app.config["MEDIA_ROOT"], "blobs")) for f in files]
+    assert not any(f.startswith(hashlib.sha256(data).hexdigest()) for f in blobs)
+
+def test_bulk_registration_is_all_or_nothing(app, client, admin_headers, make_patient):
+    pid = make_patient()
+    url = f"/api/v1/patients/{pid}/files/bulk"
+    items = [
+        {"kind": "photo", "url": "https://cdn.example.com/a.jpg", "photo_phase": "after", "photo_order": 2},
+        {"kind": "document", "url": "https://cdn.example.com/receta.pdf"},
+        {"kind": "photo", "url": "https://cdn.example.com/b.jpg", "photo_phase": "before", "photo_order": 1},
+    ]
+    bad = client.post(url, json={"items": items + [{"kind": "photo"}]}, headers=admin_headers)
+    assert bad.status_code == 400 and "3" in bad.get_json()["errors"]
+    assert client.get(f"/api/v1/patients/{pid}/files", headers=admin_headers).get_json()["data"]["items"] == []
+
+    resp = client.post(url, json={"items": items}, headers=admin_headers)
+    assert resp.status_code == 201 and resp.get_json()["data"]["count"] == 3
+    ids = [i["id"] for i in resp.get_json()["data"]["items"]]
+
+    with app.app_context():
+        # INSERT del Core: las altas se registran a mano en change_log
+        logged = db.session.execute(
+            select(ChangeLog.entity_id, ChangeLog.patient_id).where(ChangeLog.entity == "file_assets")
+        ).all()
+        assert sorted(logged) == [(i, pid) for i in ids]
+
+    gallery = client.get(f"/api/v1/patients/{pid}/files", headers=admin_headers).get_json()["data"]["items"]
+    # documentos primero (el orden entre fases depende del tipo enum de la BD)
+    assert gallery[0]["id"] == ids[1] and {f["id"] for f in gallery[1:]} == {ids[0], ids[2]}
+
+def test_bulk_registration_is_capped(app, client, admin_headers, make_patient, monkeypatch):
+    monkeypatch.setitem(app.config, "FILES_BULK_MAX_ITEMS", 1)
+    items = [{"kind": "document", "url": f"https://cdn.example.com/{i}.pdf"} for i in range(2)]
+    resp = client.post(f"/api/v1/patients/{make_patient()}/files/bulk", json={"items": items}, headers=admin_headers)
+    assert resp.status_code == 400
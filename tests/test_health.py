@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from app.services.health_service import checker, readiness
+
+@pytest.fixture
+def healthy_snapshot(monkeypatch):
+    monkeypatch.setattr(checker, "snapshot", {
+        "checked_at": time.time(), "db_ok": True, "db_latency_ms": 1.0,
+        "pool_saturation": 0.0, "migrations_ok": True,
+    })
+
+@pytest.fixture
+def stuck(monkeypatch):
+    """Simula `n` peticiones en vuelo desde hace un minuto."""
+    tokens = []
+
+    def make(n: int):
+        for _ in range(n):
+            token = checker.request_started()
+            checker._inflight[token] = time.monotonic() - 60
+            tokens.append(token)
+    yield make
+    for token in tokens:
+        checker.request_finished(token)
+
+def _config(**overrides):
+    return dict({"HEALTH_WORKER_THREADS": 2, "HEALTH_OVERLOAD_AFTER_SECONDS": 10.0,
+                 "HEALTH_REQUIRE_MIGRATIONS": False}, **overrides)
+
+def test_one_slow_request_does_not_mark_worker_overloaded(healthy_snapshot, stuck):
+    stuck(1)
+    is_ready, details = readiness(_config())
+    assert is_ready, details["reasons"]
+    assert details["busy_threads"] == 1
+
+def test_all_threads_stuck_marks_worker_overloaded(healthy_snapshot, stuck):
+    stuck(2)
+    is_ready, details = readiness(_config())
+    assert not is_ready
+    assert details["reasons"] == ["overloaded"]
+
+def test_overload_threshold_is_configurable(healthy_snapshot, stuck):
+    stuck(1)
+    is_ready, details = readiness(_config(HEALTH_OVERLOAD_BUSY_THREADS=1))
+    assert not is_ready and "overloaded" in details["reasons"]
+
+def test_live_and_ready_endpoints(client, healthy_snapshot):
+    assert client.get("/api/v1/health/live").status_code == 200
+    assert client.get("/api/v1/health/ready").status_code == 200
@@ -0,0 +1,38 @@
+LIST = "/api/v1/patients"
+
+def test_list_sends_etag_but_no_last_modified(client, admin_headers, make_patient):
+    make_patient()
+    resp = client.get(LIST, headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.headers["ETag"]
+    assert "Last-Modified" not in resp.headers
+
+def test_list_revalidates_with_etag(client, admin_headers, make_patient):
+    make_patient()
+    etag = client.get(LIST, headers=admin_headers).headers["ETag"]
+
+    assert client.get(LIST, headers=dict(admin_headers, **{"If-None-Match": etag})).status_code == 304
+    make_patient()
+    assert client.get(LIST, headers=dict(admin_headers, **{"If-None-Match": etag})).status_code == 200
+
+def test_list_is_not_stale_after_a_delete(client, admin_headers, make_patient):
+    keep, gone = make_patient(), make_patient()
+    first = client.get(LIST, headers=admin_headers)
+    client.delete(f"/api/v1/patients/{gone}", headers=admin_headers)
+
+    # un cliente que solo revalida por fecha no debe recibir 304
+    again = client.get(LIST, headers=dict(admin_headers, **{
+        "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT",
+    }))
+    assert again.status_code == 200
+    assert [p["id"] for p in again.get_json()["data"]["items"]] == [keep]
+
+    again = client.get(LIST, headers=dict(admin_headers, **{"If-None-Match": first.headers["ETag"]}))
+    assert again.status_code == 200
+
+def test_detail_keeps_last_modified_and_etag(client, admin_headers, make_patient):
+    pid = make_patient()
+    resp = client.get(f"{LIST}/{pid}", headers=admin_headers)
+    assert resp.headers["ETag"] and resp.headers["Last-Modified"]
+    cached = client.get(f"{LIST}/{pid}", headers=dict(admin_headers, **{"If-None-Match": resp.headers["ETag"]}))
+    assert cached.status_code == 304
@@ -0,0 +1,48 @@
+from conftest import PATIENT
+from flask import Response
+
+from app.services import idempotency_service as idem
+
+def _post(client, headers, payload, key):
+    return client.post("/api/v1/patients", json=payload, headers=dict(headers, **{"Idempotency-Key": key}))
+
+def test_retry_replays_the_original_response(client, admin_headers):
+    payload = dict(PATIENT, email="retry@example.com")
+
+    first = _post(client, admin_headers, payload, "k-1")
+    again = _post(client, admin_headers, payload, "k-1")
+    assert first.status_code == again.status_code == 201
+    assert again.get_json() == first.get_json()
+    assert again.headers[idem.REPLAY_HEADER] == "true"
+    assert again.headers["Content-Type"] == first.headers["Content-Type"]
+
+    listed = client.get("/api/v1/patients", headers=admin_headers).get_json()["data"]
+    assert listed["total"] == 1
+
+def test_same_key_with_another_payload_is_rejected(client, admin_headers):
+    _post(client, admin_headers, dict(PATIENT, email="a1@example.com"), "k-2")
+    resp = _post(client, admin_headers, dict(PATIENT, email="a2@example.com"), "k-2")
+    assert resp.status_code == 422
+
+def test_failed_validation_is_replayed_too(client, admin_headers):
+    first = _post(client, admin_headers, {"first_name": "x"}, "k-3")
+    again = _post(client, admin_headers, {"first_name": "x"}, "k-3")
+    assert first.status_code == again.status_code
+    assert first.status_code < 500
+
+def test_replay_keeps_location_and_etag(app):
+    with app.test_request_context("/api/v1/patients", method="POST"):
+        assert idem._claim(7, "k-headers", "hash")
+        original = Response('{"status":"created"}', status=201, mimetype="application/json")
+        original.headers["Location"] = "/api/v1/patients/42"
+        original.set_etag("1-abc")
+        original.headers["X-Request-ID"] = "no-se-guarda"
+        idem._store(7, "k-headers", original)
+
+        replay = idem._replay(idem._load(7, "k-headers"))
+    assert replay.status_code == 201
+    assert replay.headers["Location"] == "/api/v1/patients/42"
+    assert replay.headers["ETag"] == '"1-abc"'
+    assert replay.headers["Content-Type"] == "application/json"
+    assert "X-Request-ID" not in replay.headers
+    assert replay.get_data(as_text=True) == '{"status":"created"}'
@@ -0,0 +1,57 @@
+import logging
+import threading
+
+from flask import Flask, Response
+
+from app.middleware.logging import setup_logging
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.fields = []
+
+    def emit(self, record):
+        self.fields.append(record.fields)
+
+def _app(release: threading.Event) -> tuple[Flask, _Capture]:
+    app = Flask(__name__)
+    app.config.update(LOG_SAMPLE_SUCCESS_RATE=1.0, LOG_LEVEL="WARNING")
+    setup_logging(app)
+    capture = _Capture()
+    logging.getLogger("app.request").handlers[:] = [capture]
+
+    @app.get("/stream")
+    def stream():
+        def generate():
+            yield "primero\n"
+            release.wait(5)  # el resto solo sale cuando la prueba lo libera
+            yield "ultimo\n"
+        return Response(generate(), mimetype="text/plain")
+
+    @app.get("/plano")
+    def plano():
+        return "hola"
+
+    return app, capture
+
+def test_log_hook_does_not_buffer_streamed_responses():
+    release = threading.Event()
+    app, capture = _app(release)
+
+    resp = app.test_client().get("/stream", buffered=False)
+    try:
+        # Si el hook consumiera el generador, se habría quedado esperando a `release`
+        assert next(resp.response) == b"primero\n"
+        assert resp.headers.get("Content-Length") is None
+        assert capture.fields[-1]["bytes"] is None
+    finally:
+        release.set()
+        resp.close()
+
+def test_log_hook_records_content_length_header():
+    app, capture = _app(threading.Event())
+
+    resp = app.test_client().get("/plano")
+    assert resp.status_code == 200
+    assert capture.fields[-1]["bytes"] == 4
+    assert capture.fields[-1]["status"] == 200
@@ -0,0 +1,71 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+PDF = b"%PDF-1.4\n" + b"x" * 5000
+
+@pytest.fixture
+def uploaded(client, admin_headers, make_patient):
+    pid = make_patient()
+    resp = client.post(f"/api/v1/patients/{pid}/files", data={
+        "kind": "document", "file": (io.BytesIO(PDF), "estudio.pdf"),
+    }, headers=admin_headers, content_type="multipart/form-data")
+    assert resp.status_code == 201, resp.get_json()
+    return pid, resp.get_json()["data"]
+
+def _get(client, headers, url, **extra):
+    resp = client.get(url, headers=dict(headers, **extra))
+    body = resp.get_data()
+    resp.close()
+    return resp, body
+
+def test_serves_blob_of_a_live_file(client, nurse_headers, uploaded):
+    _, asset = uploaded
+    resp, body = _get(client, nurse_headers, asset["url"])
+    assert resp.status_code == 200
+    assert body == PDF
+    assert resp.headers["ETag"] == f'"{asset["content_sha256"]}"'
+
+def test_single_range_and_conditional_get(client, admin_headers, uploaded):
+    _, asset = uploaded
+    resp, body = _get(client, admin_headers, asset["url"], Range="bytes=0-9")
+    assert resp.status_code == 206 and body == PDF[:10]
+    assert resp.headers["Content-Range"] == f"bytes 0-9/{len(PDF)}"
+
+    resp, _ = _get(client, admin_headers, asset["url"], Range="bytes=9000-9100")
+    assert resp.status_code == 416
+
+    resp, _ = _get(client, admin_headers, asset["url"], **{"If-None-Match": f'"{asset["content_sha256"]}"'})
+    assert resp.status_code == 304
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+def test_multi_range_gets_the_full_file(client, admin_headers, uploaded, monkeypatch, zero_copy):
+    import app.routes.media as media
+    monkeypatch.setattr(media, "_is_zero_copy_server", lambda: zero_copy)
+    _, asset = uploaded
+    resp, body = _get(client, admin_headers, asset["url"], Range="bytes=0-9,20-29")
+    assert resp.status_code == 200
+    assert body == PDF
+    assert "Content-Range" not in resp.headers
+
+def test_blob_without_a_live_owner_is_not_served(app, client, admin_headers, uploaded):
+    pid, asset = uploaded
+    # un blob en disco que ningún FileAsset usa: conocer el hash no alcanza
+    data = b"%PDF-1.4\nhuerfano"
+    digest = hashlib.sha256(data).hexdigest()
+    rel = f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+    path = os.path.join(app.config["MEDIA_ROOT"], rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(data)
+    assert _get(client, admin_headers, f"/api/v1/media/{rel}")[0].status_code == 404
+
+    # el paciente borrado (lógicamente) ya no expone sus archivos
+    client.delete(f"/api/v1/patients/{pid}", headers=admin_headers)
+    assert _get(client, admin_headers, asset["url"])[0].status_code == 404
+
+def test_media_requires_authentication(client, uploaded):
+    _, asset = uploaded
+    assert client.get(asset["url"]).status_code == 401
@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+from sqlalchemy import select, update
+
+from app.extensions import db
+from app.models.change_log import ChangeLog
+from app.models.patient import Patient
+from app.services import patient_service
+from app.utils.time import CDMX_TZ, age_on
+
+
+def test_age_on_counts_completed_years():
+    assert age_on(date(2000, 5, 1), date(2026, 4, 30)) == 25
+    assert age_on(date(2000, 5, 1), date(2026, 5, 1)) == 26
+    # 29/feb cumple el 1/mar en años no bisiestos
+    assert age_on(date(2000, 2, 29), date(2027, 2, 28)) == 26
+    assert age_on(date(2000, 2, 29), date(2027, 3, 1)) == 27
+
+
+def test_recalc_uses_the_clinic_date(app, monkeypatch):
+    # 23:30 del 28/feb en CDMX ya es 1/mar en UTC: todavía no cumple
+    import app.models.patient as patient_module
+    monkeypatch.setattr(patient_module, "now_cdmx", lambda: datetime(2027, 2, 28, 23, 30, tzinfo=CDMX_TZ))
+    p = Patient(date_of_birth=date(2000, 3, 1))
+    p.recalc_age_and_bmi()
+    assert p.age_years == 26
+
+
+def test_recompute_updates_only_birthdays_since_last_run(app, make_patient):
+    today = date(2026, 10, 19)
+    birthday, other = make_patient(date_of_birth="1990-10-19"), make_patient(date_of_birth="1990-12-01")
+    with app.app_context():
+        # simula la edad guardada ayer
+        db.session.execute(update(Patient).where(Patient.id == birthday).values(age_years=35))
+        db.session.commit()
+        version = db.session.get(Patient, birthday).version_id
+        db.session.remove()
+
+        assert patient_service.recompute_ages(today=today) == 1
+        p = db.session.get(Patient, birthday)
+        assert p.age_years == 36 and p.version_id == version + 1
+        assert db.session.get(Patient, other).age_years == 35
+        ops = db.session.execute(
+            select(ChangeLog.op).where(ChangeLog.entity == "patients", ChangeLog.entity_id == birthday)
+        ).scalars().all()
+        assert ops[-1] == "update"
+
+        # misma fecha: nada que hacer
+        assert patient_service.recompute_ages(today=today) == 0
@@ -0,0 +1,63 @@
+import io
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.models.change_log import ChangeLog
+from app.models.patient import Patient
+
+HEADER = "First Name;Last Name;Date of Birth;Sex;Phone;Email;Privacy Notice Accepted\n"
+CSV = (
+    "\ufeff" + HEADER
+    + "Ana;López;1990-05-01;F;+52 222 123 4567;ANA@Example.com;sí\n"
+    + "Luis;Pérez;1985-01-10;M;+52 222 765 4321;no-es-email;no\n"
+    + "Marta;Ruiz;2001-12-24;F;+52 55 1234 5678;marta@example.com;1\n"
+)
+
+
+def _upload(client, headers, body: str, query: str = ""):
+    data = {"file": (io.BytesIO(body.encode("utf-8")), "pacientes.csv")}
+    return client.post(f"/api/v1/patients/import{query}", data=data, headers=headers,
+                       content_type="multipart/form-data")
+
+
+def test_import_reports_invalid_lines_and_keeps_the_rest(app, client, admin_headers):
+    resp = _upload(client, admin_headers, CSV)
+    assert resp.status_code == 200, resp.get_json()
+    report = resp.get_json()["data"]
+    assert (report["total"], report["inserted"], report["failed"]) == (3, 2, 1)
+    assert report["errors"][0]["line"] == 3 and "email" in report["errors"][0]["errors"]
+
+    with app.app_context():
+        rows = db.session.execute(select(Patient).order_by(Patient.id)).scalars().all()
+        assert [p.email for p in rows] == ["ana@example.com", "marta@example.com"]
+        assert rows[0].privacy_notice_accepted and rows[0].age_years is not None
+        # una alta en change_log por paciente importado (feed /changes, autocompletado)
+        logged = db.session.execute(
+            select(ChangeLog.entity_id).where(ChangeLog.entity == "patients", ChangeLog.op == "insert")
+        ).scalars().all()
+        assert sorted(logged) == [p.id for p in rows]
+
+
+def test_dry_run_validates_without_writing(app, client, admin_headers):
+    resp = _upload(client, admin_headers, CSV, "?dry_run=1")
+    report = resp.get_json()["data"]
+    assert report["dry_run"] and report["inserted"] == 2
+
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(Patient)) == 0
+        assert db.session.scalar(select(func.count()).select_from(ChangeLog)) == 0
+
+
+def test_error_list_is_truncated(app, client, admin_headers, monkeypatch):
+    monkeypatch.setitem(app.config, "PATIENT_IMPORT_MAX_ERRORS", 1)
+    bad = HEADER + "x;y;no-fecha;F;1;a;0\n" * 3
+    report = _upload(client, admin_headers, bad).get_json()["data"]
+    assert report["failed"] == 3 and len(report["errors"]) == 1 and report["errors_truncated"]
+
+
+def test_unsupported_format(client, admin_headers):
+    data = {"file": (io.BytesIO(b"{}"), "pacientes.json")}
+    resp = client.post("/api/v1/patients/import", data=data, headers=admin_headers,
+                       content_type="multipart/form-data")
+    assert resp.status_code == 415
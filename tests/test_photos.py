@@ -0,0 +1,95 @@
+import io
+import os
+
+from PIL import Image
+
+from app.utils.images import DERIVATIVES
+
+
+def _jpeg(size=(3000, 1500), color="red", orientation=None) -> bytes:
+    buf = io.BytesIO()
+    im = Image.new("RGB", size, color)
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    im.save(buf, "JPEG", quality=70, exif=exif)
+    return buf.getvalue()
+
+
+def _upload_photo(client, headers, pid, data, phase=None, order=None):
+    form = {"kind": "photo", "file": (io.BytesIO(data), "foto.jpg")}
+    if phase:
+        form.update(photo_phase=phase, photo_order=str(order))
+    return client.post(f"/api/v1/patients/{pid}/files", data=form, headers=headers,
+                       content_type="multipart/form-data")
+
+
+def _path(app, url: str) -> str:
+    return os.path.join(app.config["MEDIA_ROOT"], url.split("/media/", 1)[1])
+
+
+def test_photo_gets_webp_derivatives(app, client, admin_headers, make_patient):
+    resp = _upload_photo(client, admin_headers, make_patient(), _jpeg())
+    assert resp.status_code == 201
+    urls = resp.get_json()["data"]["derivatives"]
+    assert set(urls) == set(DERIVATIVES)
+    for name, side in DERIVATIVES.items():
+        with Image.open(_path(app, urls[name])) as im:
+            assert im.format == "WEBP" and im.size == (side, side // 2)
+
+
+def test_exif_orientation_is_applied(app, client, admin_headers, make_patient):
+    resp = _upload_photo(client, admin_headers, make_patient(), _jpeg(orientation=6))
+    with Image.open(_path(app, resp.get_json()["data"]["derivatives"]["thumb"])) as im:
+        assert im.size == (128, 256)  # girada 90°: vertical
+
+
+def test_derivatives_go_with_the_last_reference(app, client, admin_headers, make_patient):
+    data = _jpeg(color="blue")
+    first = _upload_photo(client, admin_headers, make_patient(), data).get_json()
+    second = _upload_photo(client, admin_headers, make_patient(), data).get_json()
+    assert second["deduplicated"] and second["data"]["derivatives"] == first["data"]["derivatives"]
+    thumb = _path(app, first["data"]["derivatives"]["thumb"])
+
+    client.delete(f"/api/v1/files/{first['data']['id']}", headers=admin_headers)
+    assert os.path.exists(thumb)
+    client.delete(f"/api/v1/files/{second['data']['id']}", headers=admin_headers)
+    assert not os.path.exists(thumb)
+
+
+def test_a_photo_must_be_an_image(client, admin_headers, make_patient):
+    resp = _upload_photo(client, admin_headers, make_patient(), b"%PDF-1.4\n" + b"x" * 100)
+    assert resp.status_code == 415
+
+
+def test_before_after_comparison_is_cached_by_photo_hashes(app, client, admin_headers, make_patient):
+    pid = make_patient()
+    url = f"/api/v1/patients/{pid}/photos/compare?order=1"
+    before = _upload_photo(client, admin_headers, pid, _jpeg((800, 600), "red"), "before", 1).get_json()["data"]
+    assert client.get(url, headers=admin_headers).status_code == 404  # falta "después"
+    _upload_photo(client, admin_headers, pid, _jpeg((600, 800), "green"), "after", 1)
+
+    resp = client.get(url, headers=admin_headers)
+    assert resp.status_code == 200 and resp.mimetype == "image/webp"
+    etag = resp.headers["ETag"]
+    with Image.open(io.BytesIO(resp.data)) as im:
+        assert im.height == 720
+    resp.close()
+    assert client.get(url, headers={**admin_headers, "If-None-Match": etag}).status_code == 304
+
+    # otra foto "después": otra clave, otro comparativo
+    _upload_photo(client, admin_headers, pid, _jpeg((600, 800), "blue"), "after", 1)
+    fresh = client.get(url, headers={**admin_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["ETag"] != etag
+    fresh.close()
+
+    # al liberar el blob de "antes" se van los comparativos que lo usan
+    composite = os.path.join(app.config["MEDIA_ROOT"], "composites", fresh.headers["ETag"].strip('"') + ".webp")
+    assert os.path.exists(composite)
+    client.delete(f"/api/v1/files/{before['id']}", headers=admin_headers)
+    assert not os.path.exists(composite)
+
+
+def test_comparison_requires_order(client, admin_headers, make_patient):
+    pid = make_patient()
+    assert client.get(f"/api/v1/patients/{pid}/photos/compare", headers=admin_headers).status_code == 400
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+# Como gunicorn con preload_app: un master de un solo hilo importa la app,
+# abre una conexión y hace fork. El proceso de pytest no sirve de master:
+# sus hilos de fondo (auditoría, SSE, autocompletado) no sobreviven al fork.
+MASTER = textwrap.dedent("""
+    import os, sys
+    from sqlalchemy import text
+    from app import create_app
+    from app.extensions import db, limiter, reset_after_fork
+
+    app = create_app()
+    with app.app_context():
+        db.session.execute(text("SELECT 1"))  # conexión del master en el pool
+        db.session.remove()
+        master_pool = db.engine.pool
+        master_conns = master_pool.checkedin()
+    storage = limiter._storage
+
+    pid = os.fork()
+    if pid == 0:
+        reset_after_fork(app)
+        with app.app_context():
+            fresh = db.engine.pool is not master_pool and db.engine.pool.checkedin() == 0
+            ok = db.session.execute(text("SELECT 1")).scalar() == 1
+        live = app.test_client().get("/api/v1/health/live").status_code == 200
+        os._exit(0 if fresh and ok and live and limiter._storage is not storage else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0, "worker"
+    # close=False: el hijo no cerró las conexiones que siguen siendo del master
+    with app.app_context():
+        assert master_conns == 1 and db.engine.pool is master_pool
+        assert db.session.execute(text("SELECT 1")).scalar() == 1
+    print("ok")
+""")
+
+
+def test_worker_gets_fresh_pool_and_limiter_after_fork(app):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", MASTER], cwd=root, env=os.environ.copy(),
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout.strip().endswith("ok")
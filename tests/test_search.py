@@ -0,0 +1,65 @@
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models.search_term import SearchTerm
+from app.services import search_service
+
+URL = "/api/v1/search"
+
+
+def _ids(client, headers, q, types="patients"):
+    resp = client.get(URL, query_string={"q": q, "types": types}, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return [r["id"] for r in resp.get_json()["data"][types]]
+
+
+def _postings():
+    return set(db.session.execute(
+        select(SearchTerm.term, SearchTerm.entity, SearchTerm.entity_id, SearchTerm.weight)
+    ).all())
+
+
+def test_every_word_is_a_prefix_and_whole_words_rank_first(client, admin_headers, make_patient):
+    ana = make_patient(first_name="Ana", last_name="López")
+    anabel = make_patient(first_name="Anabel", last_name="Ruiz")
+    make_patient(first_name="Marta", last_name="Lopera")
+
+    assert _ids(client, admin_headers, "ana") == [ana, anabel]
+    assert _ids(client, admin_headers, "ANA lop") == [ana]
+    assert _ids(client, admin_headers, "lopez") == [ana]  # sin acento
+    assert ana in _ids(client, admin_headers, "2221234567")
+
+
+def test_index_follows_updates_and_soft_deletes(client, admin_headers, make_patient):
+    pid = make_patient(first_name="Ana", last_name="López")
+    client.patch(f"/api/v1/patients/{pid}", json={"first_name": "Rocío"}, headers=admin_headers)
+    assert _ids(client, admin_headers, "ana") == []
+    assert _ids(client, admin_headers, "rocio") == [pid]
+
+    client.delete(f"/api/v1/patients/{pid}", headers=admin_headers)
+    assert _ids(client, admin_headers, "rocio") == []
+
+
+def test_users_are_hidden_from_nurses(client, nurse_headers):
+    resp = client.get(URL, query_string={"q": "prueba", "types": "users"}, headers=nurse_headers)
+    assert resp.status_code == 400
+    assert "users" not in client.get(URL, query_string={"q": "prueba"}, headers=nurse_headers).get_json()["data"]
+
+
+def test_short_query_is_rejected(client, admin_headers):
+    assert client.get(URL, query_string={"q": "a"}, headers=admin_headers).status_code == 400
+
+
+def test_reindex_rebuilds_the_same_index_and_drops_orphans(app, make_patient, admin_headers):
+    for i in range(5):
+        make_patient(first_name=f"Nombre{i}", last_name="Pérez")
+    with app.app_context():
+        maintained = _postings()
+        db.session.execute(insert(SearchTerm), [
+            {"term": "fantasma", "entity": "patients", "entity_id": 999_999, "weight": 3},
+        ])
+        db.session.commit()
+
+        counts = search_service.reindex(batch_size=2)
+        assert counts["patients"] == 5
+        assert _postings() == maintained
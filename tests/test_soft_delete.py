@@ -0,0 +1,52 @@
+from sqlalchemy import func, select, text
+
+from app.extensions import db
+from app.models.patient import Patient
+from app.models.prescription import Prescription
+from app.services import purge_service
+
+_ALL = {"include_deleted": True}
+
+def _prescription(client, headers, patient_id, diagnosis="Migraña"):
+    resp = client.post("/api/v1/prescriptions", json={
+        "patient_id": patient_id, "diagnosis": diagnosis,
+    }, headers=headers)
+    assert resp.status_code == 201, resp.get_json()
+    return resp.get_json()["data"]["id"]
+
+def test_soft_deleted_patient_is_hidden_from_reads(client, admin_headers, make_patient):
+    pid = make_patient()
+    _prescription(client, admin_headers, pid)
+
+    assert client.delete(f"/api/v1/patients/{pid}", headers=admin_headers).status_code == 200
+    assert client.get(f"/api/v1/patients/{pid}", headers=admin_headers).status_code == 404
+    listed = client.get("/api/v1/patients", headers=admin_headers).get_json()["data"]
+    assert pid not in [p["id"] for p in listed["items"]]
+
+def test_purge_removes_soft_deleted_patient_and_children(app, client, admin_headers, make_patient):
+    gone, kept = make_patient(), make_patient()
+    for _ in range(3):
+        _prescription(client, admin_headers, gone)
+    _prescription(client, admin_headers, kept)
+    client.delete(f"/api/v1/patients/{gone}", headers=admin_headers)
+
+    with app.app_context():
+        counts = purge_service.purge_deleted(older_than_days=0, batch_size=2, pause=0)
+        assert counts["patients"] == 1 and counts["prescriptions"] == 3
+        remaining = db.session.execute(
+            select(Prescription.patient_id, func.count()).group_by(Prescription.patient_id),
+            execution_options=_ALL,
+        ).all()
+        assert remaining == [(kept, 1)]
+        assert db.session.get(Patient, gone, execution_options=_ALL) is None
+
+def test_purge_lookup_by_patient_uses_a_full_index(app):
+    # La purga (y el FK de patients) buscan por patient_id también entre filas
+    # borradas: el índice parcial de filas vivas no sirve para eso
+    with app.app_context():
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM prescriptions "
+            "WHERE patient_id = 1 AND deleted_at IS NOT NULL ORDER BY id"
+        )).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_prescriptions_patient_id" in detail
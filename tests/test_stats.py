@@ -0,0 +1,52 @@
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.daily_stat import DailyStat
+from app.services import stats_service
+
+
+def _counters():
+    rows = db.session.execute(
+        select(DailyStat.day, DailyStat.professional_id, DailyStat.metric, DailyStat.value)
+    ).all()
+    return {(d, p, m): v for d, p, m, v in rows if v}
+
+
+def test_incremental_counters_match_a_full_rebuild(app, client, admin_headers, make_patient):
+    kept, dropped = make_patient(), make_patient()
+    appts = {}
+    for pid, start in ((kept, "2026-10-19T10:00:00"), (dropped, "2026-10-19T11:00:00")):
+        resp = client.post("/api/v1/appointments", headers=admin_headers, json={
+            "patient_id": pid, "title": "Consulta", "start_at": start, "duration_min": 30,
+        })
+        assert resp.status_code == 201, resp.get_json()
+        appts[pid] = resp.get_json()["data"]["id"]
+        client.post("/api/v1/prescriptions", headers=admin_headers,
+                    json={"patient_id": pid, "diagnosis": "Revisión"})
+    # cambio de estado (flush del ORM) y baja lógica en cascada (UPDATE masivo)
+    assert client.patch(f"/api/v1/appointments/{appts[kept]}", json={"status": "no_show"},
+                        headers=admin_headers).status_code == 200
+    assert client.delete(f"/api/v1/patients/{dropped}", headers=admin_headers).status_code == 200
+
+    with app.app_context():
+        incremental = _counters()
+        stats_service.rebuild()
+        assert incremental == _counters()
+        by_metric = {}
+        for (_, _, metric), v in incremental.items():
+            by_metric[metric] = by_metric.get(metric, 0) + v
+        assert by_metric == {
+            stats_service.PATIENTS_NEW: 1, stats_service.APPOINTMENTS: 1,
+            stats_service.APPT_STATUS + "no_show": 1, stats_service.PRESCRIPTIONS: 1,
+        }
+
+
+def test_dashboard_reads_the_counters(client, admin_headers, make_patient):
+    make_patient()
+    make_patient()
+    resp = client.get("/api/v1/stats/dashboard", headers=admin_headers)
+    assert resp.status_code == 200
+    assert sum(m["count"] for m in resp.get_json()["data"]["new_patients_by_month"]) == 2
+
+    bad = client.get("/api/v1/stats/dashboard?from=2026-10-20&to=2026-10-19", headers=admin_headers)
+    assert bad.status_code == 400
@@ -0,0 +1,37 @@
+from app.utils.validators import _normalize_phone, normalize_email, normalize_phone
+
+URL = "/api/v1/validation/contacts"
+
+
+def test_batch_normalizes_phones_and_emails(client, nurse_headers):
+    resp = client.post(URL, headers=nurse_headers, json={
+        "phones": ["55 1234 5678", "123", None],
+        "emails": ["Ana@Example.COM", "no-es-email"],
+    })
+    assert resp.status_code == 200
+    data = resp.get_json()["data"]
+    assert [(p["valid"], p["e164"]) for p in data["phones"]] == [
+        (True, "+525512345678"), (False, None), (False, None),
+    ]
+    assert [e["normalized"] for e in data["emails"]] == ["ana@example.com", None]
+
+
+def test_batch_size_and_shape_are_checked(app, client, nurse_headers, monkeypatch):
+    monkeypatch.setitem(app.config, "VALIDATION_BATCH_MAX", 2)
+    too_many = client.post(URL, headers=nurse_headers, json={"phones": ["1", "2"], "emails": ["a@b.mx"]})
+    assert too_many.status_code == 413
+    assert client.post(URL, headers=nurse_headers, json={"phones": "55"}).status_code == 400
+
+
+def test_cache_key_ignores_spaces_and_region_case():
+    _normalize_phone.cache_clear()
+    assert normalize_phone(" 5512345678 ", "mx") == normalize_phone("5512345678") == "+525512345678"
+    info = _normalize_phone.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+    assert normalize_email("") is None and normalize_phone("") is None
+
+
+def test_cache_stats_are_admin_only(client, admin_headers, nurse_headers):
+    assert client.get("/api/v1/validation/stats", headers=nurse_headers).status_code == 403
+    stats = client.get("/api/v1/validation/stats", headers=admin_headers).get_json()["data"]
+    assert set(stats) == {"email", "phone"}
@@ -0,0 +1,50 @@
+import pytest
+
+
+def _detail(client, headers, pid):
+    resp = client.get(f"/api/v1/patients/{pid}", headers=headers)
+    assert resp.status_code == 200
+    return resp.headers["ETag"]
+
+
+# phone: UPDATE ... WHERE version_id = :esperada; weight_kg: carga + flush (IMC)
+@pytest.mark.parametrize("change", [{"phone": "+52 222 000 0001"}, {"weight_kg": 61}])
+def test_stale_if_match_is_rejected(client, admin_headers, make_patient, change):
+    pid = make_patient()
+    url = f"/api/v1/patients/{pid}"
+    etag = _detail(client, admin_headers, pid)
+
+    first = client.patch(url, json=change, headers={**admin_headers, "If-Match": etag})
+    assert first.status_code == 200
+    assert first.headers["ETag"] != etag
+
+    # otra pestaña con el ETag viejo: no pisa el cambio
+    stale = client.patch(url, json={"first_name": "Otra"}, headers={**admin_headers, "If-Match": etag})
+    assert stale.status_code == 412
+    assert stale.get_json()["current_version"] == 2
+    assert client.get(url, headers=admin_headers).get_json()["data"]["first_name"] == "Ana"
+
+    fresh = client.patch(url, json={"first_name": "Otra"},
+                         headers={**admin_headers, "If-Match": first.headers["ETag"]})
+    assert fresh.status_code == 200
+    assert fresh.get_json()["data"]["first_name"] == "Otra"
+
+
+def test_without_if_match_last_write_wins(client, admin_headers, make_patient):
+    pid = make_patient()
+    url = f"/api/v1/patients/{pid}"
+    assert client.patch(url, json={"first_name": "Uno"}, headers=admin_headers).status_code == 200
+    assert client.patch(url, json={"first_name": "Dos"}, headers=admin_headers).status_code == 200
+
+
+def test_foreign_etag_never_matches(client, admin_headers, make_patient):
+    pid = make_patient()
+    resp = client.patch(f"/api/v1/patients/{pid}", json={"first_name": "X"},
+                        headers={**admin_headers, "If-Match": '"abc"'})
+    assert resp.status_code == 412
+
+
+def test_missing_patient_is_404_not_412(client, admin_headers):
+    resp = client.patch("/api/v1/patients/999999", json={"first_name": "X"},
+                        headers={**admin_headers, "If-Match": '"1-abc"'})
+    assert resp.status_code == 404
@@ -0,0 +1,66 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.extensions import db
+from app.models.prescription import Prescription
+from app.utils.downsample import bucket_stats, lttb
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def server_tz(monkeypatch):
+    # un servidor fuera de UTC no debe mover los tiempos de la serie
+    monkeypatch.setenv("TZ", "America/Mexico_City")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _add_vitals(app, pid, values):
+    with app.app_context():
+        db.session.add_all(
+            Prescription(patient_id=pid, issued_at=T0 + timedelta(days=i), bp_sys=v, heart_rate=70)
+            for i, v in enumerate(values)
+        )
+        db.session.commit()
+
+
+def test_series_is_columnar_in_utc_epoch_ms(app, client, admin_headers, make_patient, server_tz):
+    pid = make_patient()
+    _add_vitals(app, pid, [120, None, 130])
+    resp = client.get(f"/api/v1/patients/{pid}/vitals?metrics=bp_sys,heart_rate", headers=admin_headers)
+    assert resp.status_code == 200
+    data = resp.get_json()["data"]
+    ms = int(T0.timestamp() * 1000)
+    day = 86_400_000
+    assert data["count"] == 3 and not data["downsampled"]
+    assert data["series"]["bp_sys"] == {"t": [ms, ms + 2 * day], "v": [120, 130]}
+    assert data["series"]["heart_rate"]["t"] == [ms, ms + day, ms + 2 * day]
+
+
+def test_long_series_is_reduced(app, client, admin_headers, make_patient):
+    pid = make_patient()
+    _add_vitals(app, pid, [120 + (i % 7) for i in range(50)])
+    url = f"/api/v1/patients/{pid}/vitals?metrics=bp_sys&points=10"
+    data = client.get(url, headers=admin_headers).get_json()["data"]
+    assert data["downsampled"] and len(data["series"]["bp_sys"]["t"]) == 10
+
+    bad = client.get(f"/api/v1/patients/{pid}/vitals?metrics=peso", headers=admin_headers)
+    assert bad.status_code == 400
+
+
+def test_lttb_keeps_ends_and_peaks():
+    xs = list(range(100))
+    ys = [0.0] * 100
+    ys[37] = 50.0
+    idx = lttb(xs, ys, 10)
+    assert len(idx) == 10 and idx[0] == 0 and idx[-1] == 99 and 37 in idx
+
+
+def test_bucket_stats_summarises_each_interval():
+    b = bucket_stats([0, 1, 2, 3], [1, 3, 10, 20], 2)
+    assert b == {"x": [0.5, 2.5], "mean": [2, 15], "min": [1, 10], "max": [3, 20]}